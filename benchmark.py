@@ -0,0 +1,128 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Executor de benchmark: roda cada game.py sem janela (driver "dummy" do SDL)
+# por um número fixo de quadros, com passo de tempo fixo e sem esperar o
+# relógio. Cada jogo grava os tempos das suas fases (comum/cronometro.py) num
+# JSON; aqui eles são resumidos em percentis e salvos em JSON e CSV.
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+IMPLEMENTACOES = ["claude", "gemini", "gpt", "deepseek"]
+FASES = ["eventos", "fisica", "registro", "desenho", "captura", "codificacao", "painel", "apresentacao", "escrita"]
+PERCENTIS = [50, 90, 99]
+
+def executar(implementacao, passos, pasta):
+    # Roda o jogo numa pasta temporária para os vídeos gerados não
+    # sobrescreverem os do repositório
+    relatorio = os.path.join(pasta, f"{implementacao}.json")
+    ambiente = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy",
+                    BENCH_PASSOS=str(passos), BENCH_RELATORIO=relatorio)
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(RAIZ, implementacao, "game.py")],
+                   cwd=pasta, env=ambiente, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    duracao = time.perf_counter() - inicio
+    with open(relatorio) as arquivo:
+        dados = json.load(arquivo)
+    dados["duracao_processo"] = duracao
+    return dados
+
+def resumir(dados):
+    # Percentis e média de cada fase em milissegundos por quadro
+    duracoes = dict(dados["fases"])
+    if dados.get("escrita"):
+        duracoes["escrita"] = dados["escrita"]
+    linhas = []
+    for fase in FASES:
+        if not duracoes.get(fase):
+            continue
+        ms = np.asarray(duracoes[fase]) * 1000
+        linha = {"implementacao": dados["implementacao"], "fase": fase, "amostras": len(ms),
+                 "media_ms": float(ms.mean()), "max_ms": float(ms.max())}
+        for p, valor in zip(PERCENTIS, np.percentile(ms, PERCENTIS)):
+            linha[f"p{p}_ms"] = float(valor)
+        linhas.append(linha)
+
+    quadros = dados["quadros"]
+    # Com passo fixo a física pode rodar vários passos por quadro
+    passos_fisica = (dados.get("passo_fixo") or {}).get("passos", quadros)
+    total_fisica = sum(duracoes.get("fisica", []))
+    total_quadros = sum(sum(duracoes[fase]) for fase in dados["fases"])
+    resumo = {
+        "implementacao": dados["implementacao"],
+        "quadros": quadros,
+        "passos_fisica_por_segundo": passos_fisica / total_fisica if total_fisica else None,
+        "quadros_por_segundo": quadros / total_quadros if total_quadros else None,
+        "duracao_processo_s": dados["duracao_processo"],
+        "gravacao": dados.get("gravacao"),
+        "coletas_gc": resumir_coletas(dados.get("coletas", {})),
+    }
+    return resumo, linhas
+
+def resumir_coletas(coletas):
+    # Quantas coletas do gc houve (por geração e por fase) e quanto pararam o loop
+    pausas = [pausa for lista in coletas.values() for pausa in lista]
+    geracoes = [0, 0, 0]
+    for geracao, _ in pausas:
+        geracoes[geracao] += 1
+    return {
+        "total": len(pausas),
+        "por_geracao": geracoes,
+        "por_fase": {fase: len(lista) for fase, lista in coletas.items()},
+        "pausa_total_ms": sum(duracao for _, duracao in pausas) * 1000,
+        "pausa_max_ms": max((duracao for _, duracao in pausas), default=0.0) * 1000,
+    }
+
+def salvar_csv(caminho, linhas):
+    colunas = ["implementacao", "fase", "amostras", "media_ms"] + [f"p{p}_ms" for p in PERCENTIS] + ["max_ms"]
+    with open(caminho, "w", newline="") as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=colunas)
+        escritor.writeheader()
+        escritor.writerows(linhas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das implementações de game.py")
+    parser.add_argument("implementacoes", nargs="*", default=IMPLEMENTACOES,
+                        help=f"quais rodar (padrão: {' '.join(IMPLEMENTACOES)})")
+    parser.add_argument("--passos", type=int, default=600, help="quadros por implementação")
+    parser.add_argument("--json", default="benchmark.json", help="arquivo com o resumo completo")
+    parser.add_argument("--csv", default="benchmark.csv", help="arquivo com os percentis por fase")
+    args = parser.parse_args()
+
+    resumos = []
+    linhas = []
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as pasta:
+        for implementacao in args.implementacoes:
+            try:
+                dados = executar(implementacao, args.passos, pasta)
+            except subprocess.CalledProcessError as erro:
+                print(f"{implementacao}: falhou\n{erro.stderr.decode(errors='replace')}")
+                continue
+            resumo, linhas_fases = resumir(dados)
+            resumos.append(resumo)
+            linhas.extend(linhas_fases)
+            print(f"{implementacao:>9}: {resumo['passos_fisica_por_segundo']:10.0f} passos de física/s, "
+                  f"{resumo['quadros_por_segundo']:7.1f} quadros/s")
+            for linha in linhas_fases:
+                print(f"{'':>11}{linha['fase']:<13} p50 {linha['p50_ms']:7.3f} ms  "
+                      f"p99 {linha['p99_ms']:7.3f} ms")
+            coletas = resumo["coletas_gc"]
+            por_fase = ", ".join(f"{fase} {n}" for fase, n in coletas["por_fase"].items()) or "-"
+            print(f"{'':>11}gc: {coletas['total']} coletas "
+                  f"(geração 0/1/2: {'/'.join(map(str, coletas['por_geracao']))}), "
+                  f"pausa máx {coletas['pausa_max_ms']:.3f} ms; por fase: {por_fase}")
+
+    with open(args.json, "w") as arquivo:
+        json.dump({"passos": args.passos, "resumos": resumos, "fases": linhas}, arquivo, indent=2)
+    salvar_csv(args.csv, linhas)
+    print(f"Resultados salvos em '{args.json}' e '{args.csv}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.jogos import carregar_jogo
+
+_jogo = carregar_jogo("claude")
+Quadrado, Bola, VERMELHO, COLISAO_LOCAL = _jogo.Quadrado, _jogo.Bola, _jogo.VERMELHO, _jogo.COLISAO_LOCAL
+WIDTH, HEIGHT, FPS = _jogo.WIDTH, _jogo.HEIGHT, _jogo.FPS
+lado_quadrado, centro_x, centro_y = _jogo.lado_quadrado, _jogo.centro_x, _jogo.centro_y
+
+# Versão vetorizada de distancia_ponto_segmento: N pontos contra um segmento.
+# Retorna um array (N,) com a distância de cada ponto ao segmento.
+def distancia_pontos_segmento(pontos, segmento):
+    (x1, y1), (x2, y2) = segmento
+    C = x2 - x1
+    D = y2 - y1
+    A = pontos[:, 0] - x1
+    B = pontos[:, 1] - y1
+
+    len_sq = C * C + D * D
+    if len_sq == 0:
+        return np.hypot(A, B)
+
+    # Parâmetro da projeção limitado ao segmento [0, 1]
+    param = np.clip((A * C + B * D) / len_sq, 0.0, 1.0)
+    return np.hypot(A - param * C, B - param * D)
+
+# Versão vetorizada de calcular_normal para uma lista de segmentos.
+# Retorna um array (L, 2) com a normal unitária de cada lado.
+def calcular_normais(lados):
+    lados = np.asarray(lados, dtype=float)
+    d = lados[:, 1] - lados[:, 0]
+    normais = np.stack((-d[:, 1], d[:, 0]), axis=1)
+    comprimento = np.hypot(normais[:, 0], normais[:, 1])
+    comprimento[comprimento == 0] = 1.0
+    return normais / comprimento[:, None]
+
+# Muitas bolas guardadas em arrays NumPy, com a mesma física de Bola:
+# gravidade, escala de velocidade 10x, bordas da tela e reflexão amortecida
+# nos lados do quadrado. Cada passo testa todas as bolas contra os quatro
+# lados de uma só vez.
+class EnxameBolas:
+    def __init__(self, quantidade, raio=15, posicoes=None, semente=None):
+        modelo = Bola(0, 0, raio)
+        self.quantidade = quantidade
+        self.raio = raio
+        self.gravidade = modelo.gravidade
+        self.amortecimento = modelo.amortecimento
+        self.rng = np.random.default_rng(semente)
+
+        if posicoes is None:
+            posicoes = np.tile((float(centro_x), float(centro_y)), (quantidade, 1))
+        self.posicoes = np.array(posicoes, dtype=float).reshape(quantidade, 2)
+        self.velocidades = np.zeros((quantidade, 2))
+        self.cores = np.tile(np.array(VERMELHO, dtype=np.uint8), (quantidade, 1))
+
+        # Número de colisões de cada bola (útil para estatísticas)
+        self.colisoes = np.zeros(quantidade, dtype=np.int64)
+
+    @classmethod
+    def aleatorio(cls, quantidade, quadrado, raio=15, semente=None):
+        # Espalha as bolas dentro do quadrado (sem rotação), longe das bordas
+        rng = np.random.default_rng(semente)
+        limite = quadrado.lado / 2 - raio - 1
+        deslocamentos = rng.uniform(-limite, limite, size=(quantidade, 2))
+        posicoes = deslocamentos + (quadrado.x, quadrado.y)
+        return cls(quantidade, raio, posicoes, semente)
+
+    def atualizar(self, dt):
+        # Aplica a gravidade e atualiza as posições (mesma escala 10x de Bola)
+        self.velocidades[:, 1] += self.gravidade * dt
+        self.posicoes += self.velocidades * (dt * 10)
+
+        # Colisão com as bordas da tela
+        x = self.posicoes[:, 0]
+        y = self.posicoes[:, 1]
+        vx = self.velocidades[:, 0]
+        vy = self.velocidades[:, 1]
+        r = self.raio
+
+        fora = x - r < 0
+        x[fora] = r
+        vx[fora] *= -self.amortecimento
+        fora = x + r > WIDTH
+        x[fora] = WIDTH - r
+        vx[fora] *= -self.amortecimento
+
+        fora = y - r < 0
+        y[fora] = r
+        vy[fora] *= -self.amortecimento
+        fora = y + r > HEIGHT
+        y[fora] = HEIGHT - r
+        vy[fora] *= -self.amortecimento
+
+    def verificar_colisao(self, quadrado):
+        lados = quadrado.obter_lados()
+        normais = calcular_normais(lados)
+
+        # Distâncias (N, 4) e componente normal da velocidade (N, 4)
+        distancias = np.stack([distancia_pontos_segmento(self.posicoes, lado) for lado in lados], axis=1)
+        velocidade_dot_normal = self.velocidades @ normais.T
+
+        # Como em verificar_colisao: vale o primeiro lado tocado em que a bola
+        # não está se afastando da superfície
+        candidatos = (distancias <= self.raio) & (velocidade_dot_normal <= 0)
+        colidiu = candidatos.any(axis=1)
+        if not colidiu.any():
+            return colidiu
+
+        indices = np.nonzero(colidiu)[0]
+        lado = candidatos[indices].argmax(axis=1)
+        n = normais[lado]
+        vdn = velocidade_dot_normal[indices, lado]
+        d = distancias[indices, lado]
+
+        # Reflexão amortecida e afastamento da superfície
+        self.velocidades[indices] = (self.velocidades[indices] - 2 * vdn[:, None] * n) * self.amortecimento
+        self.posicoes[indices] += n * (self.raio - d + 0.1)[:, None]
+
+        # Troca a cor das bolas que colidiram (evitando cores muito escuras)
+        self.cores[indices] = self.rng.integers(100, 256, size=(len(indices), 3), dtype=np.uint8)
+        self.colisoes[indices] += 1
+        return colidiu
+
+    def verificar_colisao_local(self, quadrado):
+        # Como verificar_colisao_local de game.py: todas as bolas vão para o
+        # referencial do quadrado, onde as paredes são |u| = limite e
+        # |v| = limite, e a resposta volta rotacionada para o mundo
+        u, v = quadrado.para_local(self.posicoes[:, 0] - quadrado.x, self.posicoes[:, 1] - quadrado.y)
+        vu, vv = quadrado.para_local(self.velocidades[:, 0], self.velocidades[:, 1])
+        limite = quadrado.lado / 2 - self.raio
+        excesso_u = np.abs(u) - limite
+        excesso_v = np.abs(v) - limite
+        sinal_u = np.where(u > 0, 1.0, -1.0)
+        sinal_v = np.where(v > 0, 1.0, -1.0)
+
+        # Parede tocada e bola não se afastando dela; a mais penetrada vence
+        toca_u = (excesso_u >= 0) & (vu * sinal_u >= 0)
+        toca_v = (excesso_v >= 0) & (vv * sinal_v >= 0)
+        reflete_u = toca_u & (~toca_v | (excesso_u >= excesso_v))
+        reflete_v = toca_v & ~reflete_u
+        colidiu = reflete_u | reflete_v
+        if not colidiu.any():
+            return colidiu
+
+        vu[reflete_u] *= -1
+        u[reflete_u] = sinal_u[reflete_u] * (limite - 0.1)
+        vv[reflete_v] *= -1
+        v[reflete_v] = sinal_v[reflete_v] * (limite - 0.1)
+
+        indices = np.nonzero(colidiu)[0]
+        dx, dy = quadrado.para_mundo(u[indices], v[indices])
+        self.posicoes[indices, 0] = quadrado.x + dx
+        self.posicoes[indices, 1] = quadrado.y + dy
+        vx, vy = quadrado.para_mundo(vu[indices], vv[indices])
+        self.velocidades[indices, 0] = vx * self.amortecimento
+        self.velocidades[indices, 1] = vy * self.amortecimento
+
+        self.cores[indices] = self.rng.integers(100, 256, size=(len(indices), 3), dtype=np.uint8)
+        self.colisoes[indices] += 1
+        return colidiu
+
+    def passo(self, quadrado, dt, local=COLISAO_LOCAL):
+        quadrado.atualizar(dt)
+        self.atualizar(dt)
+        if local:
+            return self.verificar_colisao_local(quadrado)
+        return self.verificar_colisao(quadrado)
+
+    def desenhar(self, surface):
+        import pygame
+        raio = self.raio
+        for (x, y), cor in zip(self.posicoes.astype(int).tolist(), self.cores.tolist()):
+            pygame.draw.circle(surface, cor, (x, y), raio)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enxame de bolas no quadrado giratório (NumPy)")
+    parser.add_argument("--bolas", type=int, default=5000)
+    parser.add_argument("--passos", type=int, default=600)
+    parser.add_argument("--raio", type=int, default=5)
+    parser.add_argument("--semente", type=int, default=None)
+    parser.add_argument("--segmentos", action="store_true",
+                        help="testa a colisão contra os segmentos rotacionados em vez do referencial local")
+    args = parser.parse_args()
+
+    quadrado = Quadrado(centro_x, centro_y, lado_quadrado)
+    enxame = EnxameBolas.aleatorio(args.bolas, quadrado, args.raio, args.semente)
+
+    dt = 1.0 / FPS
+    inicio = time.perf_counter()
+    for _ in range(args.passos):
+        enxame.passo(quadrado, dt, local=not args.segmentos)
+    duracao = time.perf_counter() - inicio
+
+    print(f"{args.bolas} bolas, {args.passos} passos em {duracao:.3f}s "
+          f"({args.passos / duracao:.1f} passos/s)")
+    print(f"colisões totais: {int(enxame.colisoes.sum())}")
@@ -0,0 +1,190 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.colisao import tempo_de_impacto, refletir_velocidade, folga
+from comum.jogos import carregar_jogo
+
+_jogo = carregar_jogo("claude")
+FPS, criar_objetos, obter_estado, passo_fisica = _jogo.FPS, _jogo.criar_objetos, _jogo.obter_estado, _jogo.passo_fisica
+
+# Simulador orientado a eventos: entre dois quiques a bola segue uma parábola
+# conhecida e o quadrado gira com velocidade angular constante, então não é
+# preciso integrar quadro a quadro. O simulador calcula o instante do próximo
+# contato, salta direto para ele, aplica a reflexão com amortecimento e a
+# troca de cor, e só avalia a parábola nos instantes pedidos.
+class SimuladorEventos:
+    def __init__(self, quadrado=None, bola=None, horizonte=0.25, busca_maxima=10.0, passo_repouso=1.0 / FPS,
+                 velocidade_repouso=20.0, intervalo_minimo=1e-3, folga_repouso=2.0):
+        if quadrado is None or bola is None:
+            quadrado, bola = criar_objetos()
+        self.quadrado = quadrado
+        self.bola = bola
+        # Janela de busca do próximo contato, repetida até achar um ou até
+        # busca_maxima segundos à frente (a bola fora do quadrado nunca mais
+        # encosta nele: daí em diante vale o passo fixo, com as bordas da tela)
+        self.horizonte = horizonte
+        self.busca_maxima = busca_maxima
+
+        # Quando a bola sai de um quique quase sem velocidade em relação à
+        # parede (menos de velocidade_repouso pixels/s) ou quica de novo logo
+        # em seguida (menos de intervalo_minimo segundos, como presa num
+        # canto), ela está apoiada e os quiques seguintes ficariam
+        # infinitamente próximos. Nesse caso o simulador anda em passos fixos
+        # com o passo_fisica do jogo (colisão contínua e o teste discreto que
+        # afasta a bola da parede) até ela se soltar (folga maior que
+        # folga_repouso) e volta aos eventos.
+        self.passo_repouso = passo_repouso
+        self.velocidade_repouso = velocidade_repouso
+        self.intervalo_minimo = intervalo_minimo
+        self.folga_repouso = folga_repouso
+        self._apoiada = False
+
+        self.tempo = 0.0
+        self.quiques = 0
+        self.passos_repouso = 0
+        # Menor folga vista nos quiques e nos passos em repouso: bem abaixo de
+        # zero, algum contato foi perdido e a bola atravessou a parede
+        self.folga_minima = math.inf
+        self._proximo = None  # (tempo absoluto, normal, velocidade da parede)
+
+    def _aceleracao(self):
+        # Aceleração em pixels/s^2 (mesma escala de 10x de Bola.atualizar)
+        return (0.0, self.bola.gravidade * 10)
+
+    def _voar(self, dt):
+        # Move bola e quadrado dt segundos pela trajetória livre
+        bola = self.bola
+        g = bola.gravidade
+        bola.x += bola.velocidade_x * dt * 10
+        bola.y += (bola.velocidade_y * dt + g * dt * dt / 2) * 10
+        bola.velocidade_y += g * dt
+        self.quadrado.atualizar(dt)
+        self.tempo += dt
+
+    def _buscar_proximo(self):
+        # Procura o próximo contato, janela por janela, a partir do estado atual
+        bola, quadrado = self.bola, self.quadrado
+        posicao = (bola.x, bola.y)
+        velocidade = (bola.velocidade_x * 10, bola.velocidade_y * 10)
+        angulo = math.radians(quadrado.angulo)
+        velocidade_angular = math.radians(quadrado.velocidade_angular)
+        aceleracao = self._aceleracao()
+
+        inicio = 0.0
+        while inicio < self.busca_maxima:
+            impacto = tempo_de_impacto(posicao, velocidade, (quadrado.x, quadrado.y),
+                                       angulo + velocidade_angular * inicio, velocidade_angular,
+                                       quadrado.lado / 2, bola.raio, self.horizonte,
+                                       max_iteracoes=1000, aceleracao=aceleracao)
+            if impacto is not None:
+                t, normal, velocidade_parede = impacto
+                return self.tempo + inicio + t, normal, velocidade_parede
+
+            # Nenhum contato nesta janela: avança o início da busca
+            posicao = (posicao[0] + (velocidade[0] + aceleracao[0] * self.horizonte / 2) * self.horizonte,
+                       posicao[1] + (velocidade[1] + aceleracao[1] * self.horizonte / 2) * self.horizonte)
+            velocidade = (velocidade[0] + aceleracao[0] * self.horizonte,
+                          velocidade[1] + aceleracao[1] * self.horizonte)
+            inicio += self.horizonte
+        return None
+
+    def _quicar(self, normal, velocidade_parede, intervalo):
+        bola = self.bola
+        wx, wy = velocidade_parede
+        bola.velocidade_x, bola.velocidade_y = refletir_velocidade(
+            (bola.velocidade_x, bola.velocidade_y), normal, (wx / 10, wy / 10), bola.amortecimento)
+        bola.trocar_cor_aleatoria()
+        self.quiques += 1
+
+        # Velocidade com que a bola se afasta da parede, em pixels/s
+        afastamento = (bola.velocidade_x * 10 - wx) * normal[0] + (bola.velocidade_y * 10 - wy) * normal[1]
+        self._apoiada = afastamento < self.velocidade_repouso or intervalo < self.intervalo_minimo
+
+    def _folga(self):
+        quadrado, bola = self.quadrado, self.bola
+        return folga((bola.x, bola.y), (quadrado.x, quadrado.y), math.radians(quadrado.angulo),
+                     quadrado.lado / 2, bola.raio)
+
+    def _repousar(self, tempo):
+        # Bola praticamente apoiada na parede (ou sem contato à vista): passos
+        # fixos do jogo até ela se soltar ou até o instante pedido. Cada
+        # reflexão troca a cor da bola; os quiques são contados assim (no
+        # máximo um por passo).
+        bola = self.bola
+        while self.tempo < tempo:
+            passo = min(self.passo_repouso, tempo - self.tempo)
+            cor = bola.cor
+            passo_fisica(self.quadrado, bola, passo)
+            if bola.cor is not cor:
+                self.quiques += 1
+            self.tempo += passo
+            self.passos_repouso += 1
+            atual = self._folga()
+            self.folga_minima = min(self.folga_minima, atual)
+            if atual > self.folga_repouso:
+                self._apoiada = False
+                break
+
+    def avancar_ate(self, tempo):
+        # Processa todos os quiques até o instante pedido e posiciona a bola nele
+        while self.tempo < tempo:
+            if self._apoiada:
+                self._repousar(tempo)
+                continue
+
+            if self._proximo is None:
+                self._proximo = self._buscar_proximo()
+                if self._proximo is None:
+                    self._apoiada = True
+                    continue
+            instante, normal, velocidade_parede = self._proximo
+
+            if instante > tempo:
+                self._voar(tempo - self.tempo)
+                self.tempo = tempo
+                # Ainda vale: o movimento até o contato não mudou
+                break
+
+            intervalo = instante - self.tempo
+            self._voar(intervalo)
+            self.folga_minima = min(self.folga_minima, self._folga())
+            self._quicar(normal, velocidade_parede, intervalo)
+            self._proximo = None
+
+    def estado(self):
+        # "passos" aqui conta só os passos fixos dados em repouso
+        estado = obter_estado(self.quadrado, self.bola, self.passos_repouso, self.tempo)
+        estado["quiques"] = self.quiques
+        return estado
+
+    def amostrar(self, tempos):
+        # Gera o estado em cada instante pedido (em ordem crescente)
+        for tempo in tempos:
+            self.avancar_ate(tempo)
+            yield self.estado()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulação orientada a eventos (quique a quique)")
+    parser.add_argument("--segundos", type=float, default=3600.0, help="tempo simulado")
+    parser.add_argument("--amostras", type=int, default=0,
+                        help="número de estados igualmente espaçados a imprimir")
+    args = parser.parse_args()
+
+    simulador = SimuladorEventos()
+    inicio = time.perf_counter()
+    if args.amostras:
+        tempos = [args.segundos * (i + 1) / args.amostras for i in range(args.amostras)]
+        for estado in simulador.amostrar(tempos):
+            print(estado)
+    else:
+        simulador.avancar_ate(args.segundos)
+    duracao = time.perf_counter() - inicio
+
+    print(f"{args.segundos:.0f}s simulados em {duracao:.3f}s: {simulador.quiques} quiques, "
+          f"{simulador.passos_repouso} passos em repouso, folga mínima {simulador.folga_minima:.3f}px")
+    print(simulador.estado())
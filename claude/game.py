@@ -1,20 +1,20 @@
-import pygame
 import sys
 import math
 import random
 import os
-import cv2
+import argparse
 
-sys.path.append('/home/abner/Documentos/IFSP/7semestre/IA/teste-llm/.venv/lib/python3.12/site-packages')
-sys.path.insert(0, '/home/abner/Documentos/IFSP/7semestre/IA/teste-llm/.venv/lib/python3.12/site-packages')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Inicialização do Pygame
-pygame.init()
+# Só a física é importada aqui. O pygame, o OpenCV, o NumPy e os gravadores
+# são importados por main() e pelo desenho, quando uma execução precisa
+# deles: importar este módulo (enxame.py, eventos.py, workers) não abre
+# janela nem cria arquivos.
+from comum.colisao import tempo_de_impacto, refletir_velocidade
+from comum.poligono import PoligonoConvexo
 
 # Configurações da tela
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Jogo do Quadrado e Bola")
 
 # Cores
 BRANCO = (255, 255, 255)
@@ -23,7 +23,23 @@ VERMELHO = (255, 0, 0)
 
 # Configurações do jogo
 FPS = 60
-clock = pygame.time.Clock()
+COLISAO_CONTINUA = True  # Detecta o instante exato do contato dentro do passo
+MAX_IMPACTOS_POR_PASSO = 8
+COLISAO_LOCAL = True  # Testa a bola no referencial do quadrado (caixa alinhada aos eixos)
+RENDERIZACAO_PARCIAL = True  # Redesenha e envia à janela só as áreas que mudaram
+SPRITES_QUADRADO = True  # Desenha o quadrado com sprites pré-renderizados (um blit)
+PASSO_SPRITE = 0.5  # Quantização do ângulo dos sprites, em graus
+
+# Um sprite por ângulo quantizado no período de 90 graus do quadrado, criado
+# no primeiro desenho
+_cache_sprites = None
+
+def obter_cache_sprites():
+    global _cache_sprites
+    if _cache_sprites is None:
+        from comum.sprites import CacheSprites
+        _cache_sprites = CacheSprites(passo=PASSO_SPRITE, capacidade=int(round(90 / PASSO_SPRITE)))
+    return _cache_sprites
 
 # Classe do Quadrado
 class Quadrado:
@@ -42,31 +58,61 @@ class Quadrado:
             [lado/2, lado/2],    # Inferior direito
             [-lado/2, lado/2]    # Inferior esquerdo
         ]
+        # Dados dos lados no referencial do quadrado (normais, círculo inscrito)
+        self.poligono = PoligonoConvexo(self.vertices_originais)
         
-        # Inicializando os vértices atuais (serão atualizados durante a rotação)
-        self.vertices_atuais = list(self.vertices_originais)
+        # Seno e cosseno do ângulo atual, calculados uma vez por atualização
+        self._cos = 1.0
+        self._sin = 0.0
+        
+        # Vértices rotacionados, calculados só quando alguém precisa deles
+        # (desenho ou teste contra os segmentos)
+        self._vertices_atuais = [list(v) for v in self.vertices_originais]
+        self._angulo_vertices = self.angulo
         
     def atualizar(self, dt):
         # Atualiza o ângulo de rotação
         self.angulo += self.velocidade_angular * dt
         self.angulo %= 360  # Mantém o ângulo entre 0 e 360 graus
         
-        # Atualiza a posição dos vértices com base na rotação
         angulo_rad = math.radians(self.angulo)
-        for i, (vx, vy) in enumerate(self.vertices_originais):
-            # Aplica a matriz de rotação
-            x_rotacionado = vx * math.cos(angulo_rad) - vy * math.sin(angulo_rad)
-            y_rotacionado = vx * math.sin(angulo_rad) + vy * math.cos(angulo_rad)
-            
-            # Atualiza o vértice com a posição rotacionada + a posição central do quadrado
-            self.vertices_atuais[i] = [self.x + x_rotacionado, self.y + y_rotacionado]
+        self._cos = math.cos(angulo_rad)
+        self._sin = math.sin(angulo_rad)
+    
+    @property
+    def vertices_atuais(self):
+        # Atualiza a posição dos vértices com base na rotação, se o ângulo mudou
+        if self._angulo_vertices != self.angulo:
+            for i, (vx, vy) in enumerate(self.vertices_originais):
+                # Aplica a matriz de rotação
+                x_rotacionado, y_rotacionado = self.para_mundo(vx, vy)
+                
+                # Atualiza o vértice com a posição rotacionada + a posição central do quadrado
+                self._vertices_atuais[i] = [self.x + x_rotacionado, self.y + y_rotacionado]
+            self._angulo_vertices = self.angulo
+        return self._vertices_atuais
+    
+    def para_local(self, x, y):
+        # Rotaciona um vetor do mundo para o referencial do quadrado
+        return x * self._cos + y * self._sin, -x * self._sin + y * self._cos
+    
+    def para_mundo(self, u, v):
+        # Rotaciona um vetor do referencial do quadrado para o mundo
+        return u * self._cos - v * self._sin, u * self._sin + v * self._cos
     
     def desenhar(self, surface):
-        # Desenha as linhas do quadrado conectando os vértices
+        # Desenha as linhas do quadrado conectando os vértices e retorna a
+        # área alterada
+        if SPRITES_QUADRADO:
+            return obter_cache_sprites().desenhar(surface, self.vertices_originais, (self.x, self.y),
+                                                  self.angulo, BRANCO, self.espessura, periodo=90)
+        import pygame
+        areas = []
         for i in range(4):
             inicio = (int(self.vertices_atuais[i][0]), int(self.vertices_atuais[i][1]))
             fim = (int(self.vertices_atuais[(i+1)%4][0]), int(self.vertices_atuais[(i+1)%4][1]))
-            pygame.draw.line(surface, BRANCO, inicio, fim, self.espessura)
+            areas.append(pygame.draw.line(surface, BRANCO, inicio, fim, self.espessura))
+        return areas[0].unionall(areas[1:])
     
     def obter_lados(self):
         # Retorna os 4 lados do quadrado como segmentos de reta (para detecção de colisão)
@@ -97,6 +143,9 @@ class Bola:
         self.x += self.velocidade_x * dt * 10  # Aumenta a velocidade em 10x
         self.y += self.velocidade_y * dt * 10  # Aumenta a velocidade em 10x
         
+        self.limitar_na_tela()
+    
+    def limitar_na_tela(self):
         # Colisão com as bordas da tela (opcional, para evitar que a bola saia da tela)
         if self.x - self.raio < 0:
             self.x = self.raio
@@ -113,7 +162,8 @@ class Bola:
             self.velocidade_y *= -self.amortecimento
     
     def desenhar(self, surface):
-        pygame.draw.circle(surface, self.cor, (int(self.x), int(self.y)), self.raio)
+        import pygame
+        return pygame.draw.circle(surface, self.cor, (int(self.x), int(self.y)), self.raio)
     
     def trocar_cor_aleatoria(self):
         # Gera uma cor aleatória (evitando cores muito escuras)
@@ -174,8 +224,29 @@ def calcular_normal(segmento):
     
     return nx, ny
 
+# Função para refletir a bola em relação à normal da superfície
+def refletir(bola, nx, ny):
+    velocidade_dot_normal = (bola.velocidade_x * nx + bola.velocidade_y * ny)
+    
+    # Calcula a reflexão (componente normal é invertida, tangencial mantida)
+    vx_novo = bola.velocidade_x - 2 * velocidade_dot_normal * nx
+    vy_novo = bola.velocidade_y - 2 * velocidade_dot_normal * ny
+    
+    # Aplica o amortecimento e atualiza a velocidade
+    bola.velocidade_x = vx_novo * bola.amortecimento
+    bola.velocidade_y = vy_novo * bola.amortecimento
+    
+    # Troca a cor da bola
+    bola.trocar_cor_aleatoria()
+
 # Função para verificar e processar colisões entre a bola e o quadrado
 def verificar_colisao(bola, quadrado):
+    # Dentro do círculo inscrito menos o raio, nenhum lado alcança a bola
+    dx, dy = bola.x - quadrado.x, bola.y - quadrado.y
+    limite = quadrado.poligono.raio_inscrito - bola.raio
+    if limite > 0 and dx * dx + dy * dy < limite * limite:
+        return
+    
     lados = quadrado.obter_lados()
     
     # Verifica colisão com cada lado do quadrado
@@ -193,82 +264,314 @@ def verificar_colisao(bola, quadrado):
                 # Se a bola está se afastando da superfície, não reflete
                 continue
             
-            # Calcula a reflexão (componente normal é invertida, tangencial mantida)
-            vx_novo = bola.velocidade_x - 2 * velocidade_dot_normal * nx
-            vy_novo = bola.velocidade_y - 2 * velocidade_dot_normal * ny
-            
-            # Aplica o amortecimento e atualiza a velocidade
-            bola.velocidade_x = vx_novo * bola.amortecimento
-            bola.velocidade_y = vy_novo * bola.amortecimento
+            # Reflete a velocidade, aplica o amortecimento e troca a cor
+            refletir(bola, nx, ny)
             
             # Afasta ligeiramente a bola da superfície para evitar colisões múltiplas
             ajuste = bola.raio - distancia + 0.1
             bola.x += nx * ajuste
             bola.y += ny * ajuste
             
-            # Troca a cor da bola
-            bola.trocar_cor_aleatoria()
-            
             # Para evitar múltiplas colisões em um único frame, saímos após detectar a primeira
             break
 
+# Mesma colisão de verificar_colisao, mas no referencial do quadrado: a bola
+# é rotacionada uma vez para lá, onde o quadrado é uma caixa alinhada aos
+# eixos com normais constantes, e a resposta é rotacionada de volta. Não
+# usa os vértices nem raízes quadradas.
+def verificar_colisao_local(bola, quadrado):
+    u, v = quadrado.para_local(bola.x - quadrado.x, bola.y - quadrado.y)
+    limite = quadrado.lado / 2 - bola.raio
+    excesso_u = abs(u) - limite
+    excesso_v = abs(v) - limite
+    if excesso_u < 0 and excesso_v < 0:
+        return
+    
+    vu, vv = quadrado.para_local(bola.velocidade_x, bola.velocidade_y)
+    
+    # Testa primeiro a parede mais penetrada; num canto, a outra também vale
+    eixos = (0, 1) if excesso_u >= excesso_v else (1, 0)
+    for eixo in eixos:
+        coordenada, velocidade = (u, vu) if eixo == 0 else (v, vv)
+        if abs(coordenada) < limite:
+            continue
+        sinal = 1.0 if coordenada > 0 else -1.0
+        if velocidade * sinal < 0:
+            # Se a bola está se afastando da parede, não reflete
+            continue
+        
+        # Reflete a componente normal, aplica o amortecimento e afasta a bola
+        # ligeiramente da parede para evitar colisões múltiplas
+        if eixo == 0:
+            vu = -vu
+            u = sinal * (limite - 0.1)
+        else:
+            vv = -vv
+            v = sinal * (limite - 0.1)
+        vu *= bola.amortecimento
+        vv *= bola.amortecimento
+        
+        dx, dy = quadrado.para_mundo(u, v)
+        bola.x = quadrado.x + dx
+        bola.y = quadrado.y + dy
+        bola.velocidade_x, bola.velocidade_y = quadrado.para_mundo(vu, vv)
+        bola.trocar_cor_aleatoria()
+        break
+
 # Configurações iniciais dos objetos
 lado_quadrado = 200
 centro_x, centro_y = WIDTH // 2, HEIGHT // 2
-quadrado = Quadrado(centro_x, centro_y, lado_quadrado)
-bola = Bola(centro_x, centro_y, 15)  # Bola com raio de 15 pixels
+
+def criar_objetos():
+    quadrado = Quadrado(centro_x, centro_y, lado_quadrado)
+    bola = Bola(centro_x, centro_y, 15)  # Bola com raio de 15 pixels
+    return quadrado, bola
 
 # Configurações para gravação de vídeo
 video_nome = "gameplay_claude.mp4"
 gif_nome = "gameplay_claude.gif"
 quadro_tamanho = (WIDTH, HEIGHT)
 fps = 30
-quadro_codificador = cv2.VideoWriter_fourcc(*"mp4v")
-video_writer = cv2.VideoWriter(video_nome, quadro_codificador, fps, quadro_tamanho)
-
-# Função para converter MP4 para GIF
-def converter_para_gif(video_path, gif_path):
-    comando = f"ffmpeg -i {video_path} -vf 'fps=10,scale=320:-1:flags=lanczos' {gif_path}"
-    os.system(comando)
-
-# Loop principal do jogo
-running = True
-while running:
-    # Calcula o tempo decorrido desde o último frame
-    dt = clock.tick(FPS) / 1000.0  # Converte para segundos
-    
-    # Processa eventos
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-    
-    # Atualiza o quadrado
-    quadrado.atualizar(dt)
-    
-    # Atualiza a bola
-    bola.atualizar(dt)
-    
-    # Verifica colisões
-    verificar_colisao(bola, quadrado)
+capacidade_fila = 8
+politica_fila = "bloquear"  # "bloquear", "descartar" ou "subamostrar"
+
+# Registro compacto do estado de cada passo (reproduza com reproduzir.py)
+REGISTRAR_ESTADO = True
+registro_nome = "estado_claude.bin"
+
+def metadados_cena(quadrado, bola):
+    # Descrição da cena usada por reproduzir.py para redesenhar o registro
+    return {
+        "implementacao": "claude",
+        "largura": WIDTH,
+        "altura": HEIGHT,
+        "fps": FPS,
+        "centro": [quadrado.x, quadrado.y],
+        "vertices": quadrado.vertices_originais,
+        "espessura": quadrado.espessura,
+        "raio": bola.raio,
+        "cor_quadrado": BRANCO,
+        "fundo": PRETO,
+    }
+
+# Move a bola durante dt encontrando o instante exato de cada contato com o
+# quadrado girando: reflete nesse instante (em relação à parede, que se move)
+# e integra o resto do passo com a nova velocidade. Deve ser chamada antes de
+# quadrado.atualizar(dt).
+def mover_bola_continuo(bola, quadrado, dt):
+    # Aplica a gravidade (a posição anda em linha reta durante o passo)
+    bola.velocidade_y += bola.gravidade * dt
     
-    # Limpa a tela
-    screen.fill(PRETO)
+    centro = (quadrado.x, quadrado.y)
+    angulo = math.radians(quadrado.angulo)
+    velocidade_angular = math.radians(quadrado.velocidade_angular)
+    restante = dt
     
-    # Desenha os objetos
-    quadrado.desenhar(screen)
-    bola.desenhar(screen)
+    for _ in range(MAX_IMPACTOS_POR_PASSO):
+        velocidade = (bola.velocidade_x * 10, bola.velocidade_y * 10)  # Mesma escala de 10x
+        impacto = tempo_de_impacto((bola.x, bola.y), velocidade, centro, angulo,
+                                   velocidade_angular, quadrado.lado / 2, bola.raio, restante)
+        if impacto is None:
+            break
+        
+        # Avança até o contato e reflete nesse instante, em relação à
+        # velocidade da parede (que também está na escala de 10x)
+        t, normal, (wx, wy) = impacto
+        bola.x += velocidade[0] * t
+        bola.y += velocidade[1] * t
+        angulo += velocidade_angular * t
+        restante -= t
+        bola.velocidade_x, bola.velocidade_y = refletir_velocidade(
+            (bola.velocidade_x, bola.velocidade_y), normal, (wx / 10, wy / 10), bola.amortecimento)
+        bola.trocar_cor_aleatoria()
     
-    # Gravação de vídeo
-    frame = pygame.surfarray.array3d(pygame.display.get_surface())
-    frame = cv2.cvtColor(cv2.transpose(frame), cv2.COLOR_RGB2BGR)
-    video_writer.write(frame)
+    # Integra o resto do passo
+    bola.x += bola.velocidade_x * restante * 10
+    bola.y += bola.velocidade_y * restante * 10
+    bola.limitar_na_tela()
+
+# Um passo de física com dt fixo (mesma ordem do loop principal)
+def passo_fisica(quadrado, bola, dt, continua=COLISAO_CONTINUA, local=COLISAO_LOCAL):
+    verificar = verificar_colisao_local if local else verificar_colisao
+    if continua:
+        mover_bola_continuo(bola, quadrado, dt)
+        quadrado.atualizar(dt)
+        # Se a parede girando alcançou a bola parada, o teste discreto a afasta
+        verificar(bola, quadrado)
+        return
     
-    # Atualiza a tela
-    pygame.display.flip()
+    quadrado.atualizar(dt)
+    bola.atualizar(dt)
+    verificar(bola, quadrado)
+
+# Estado final da simulação em forma de dicionário
+def obter_estado(quadrado, bola, passos, tempo):
+    return {
+        "passos": passos,
+        "tempo": tempo,
+        "angulo": quadrado.angulo,
+        "x": bola.x,
+        "y": bola.y,
+        "velocidade_x": bola.velocidade_x,
+        "velocidade_y": bola.velocidade_y,
+        "cor": bola.cor,
+    }
+
+# Simulação sem janela, sem desenho e sem gravação, o mais rápido possível.
+# Informe o número de passos ou a duração simulada em segundos.
+def simular_headless(passos=None, segundos=None, dt=1.0 / FPS, quadrado=None, bola=None,
+                     continua=COLISAO_CONTINUA, local=COLISAO_LOCAL):
+    if passos is None and segundos is None:
+        raise ValueError("Informe 'passos' ou 'segundos'")
+    if dt <= 0:
+        raise ValueError("dt deve ser positivo")
+    if passos is None:
+        passos = int(round(segundos / dt))
 
-# Libera o gravador de vídeo e converte para GIF
-video_writer.release()
-converter_para_gif(video_nome, gif_nome)
+    if quadrado is None or bola is None:
+        quadrado, bola = criar_objetos()
+
+    for _ in range(passos):
+        passo_fisica(quadrado, bola, dt, continua, local)
+
+    return obter_estado(quadrado, bola, passos, passos * dt)
+
+def main():
+    import pygame
+    from comum.captura import AgendaCaptura, CapturaQuadro
+    from comum.cronometro import Cronometro, BENCHMARK, PERFIL_ATIVO, PERFIL_HUD, duracao_passo, continuar, salvar_relatorio
+    from comum.gif import GravadorGif
+    from comum.gravacao import GravadorAssincrono
+    from comum.memoria import EXPORTAR_MEMORIA, ExportadorQuadros, codificar_gif, codificar_mp4
+    from comum.painel import PainelPerfil
+    from comum.registro import GravadorEstado
+    from comum.retangulos import RetangulosSujos
+
+    # Inicialização do Pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Jogo do Quadrado e Bola")
+    clock = pygame.time.Clock()
+
+    quadrado, bola = criar_objetos()
+
+    # Com EXPORTAR=memoria o MP4 e o GIF são codificados em outros processos,
+    # que leem os quadros capturados de um anel em memória compartilhada
+    exportador = video_writer = gif_writer = None
+    if EXPORTAR_MEMORIA:
+        exportador = ExportadorQuadros(quadro_tamanho, capacidade_fila, consumidores=2, politica=politica_fila)
+        exportador.iniciar(codificar_mp4, video_nome, fps)
+        exportador.iniciar(codificar_gif, gif_nome, fps)
+    else:
+        video_writer = GravadorAssincrono(video_nome, fps, quadro_tamanho, capacidade_fila, politica_fila,
+                                          converter=None, medir_tempos=BENCHMARK)
+        # GIF montado durante a captura (reduzido para 320px a 10 fps)
+        gif_writer = GravadorGif(gif_nome, fps_entrada=fps, fps_saida=10, largura=320)
+    # O anel copia o quadro na hora, então um buffer de captura basta
+    captura = CapturaQuadro(pygame.display.get_surface(), num_buffers=1 if exportador else capacidade_fila + 2,
+                            tamanho_saida=quadro_tamanho)
+    # O loop roda a FPS quadros/s, o vídeo a fps: só os quadros necessários são capturados
+    agenda = AgendaCaptura(captura, fps)
+    registro = GravadorEstado(registro_nome, metadados_cena(quadrado, bola)) if REGISTRAR_ESTADO else None
+    tempo = 0.0
+    # Áreas desenhadas em cada quadro (para limpar e atualizar só elas)
+    retangulos = RetangulosSujos(screen, PRETO, ativo=RENDERIZACAO_PARCIAL)
 
-# Encerra o Pygame
-pygame.quit()
+    # Tempos de cada fase do quadro (em benchmark ou com PERFIL=1) e o painel
+    # com os percentis recentes (F3)
+    cronometro = Cronometro()
+    painel = PainelPerfil(cronometro, visivel=PERFIL_HUD) if PERFIL_ATIVO else None
+    quadros = 0
+
+    # Loop principal do jogo
+    running = True
+    while running and continuar(quadros):
+        # Calcula o tempo decorrido desde o último frame
+        dt = duracao_passo(clock, FPS)  # Em segundos
+        cronometro.iniciar()
+
+        # Processa eventos
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif painel:
+                painel.processar(event)
+        cronometro.marcar("eventos")
+
+        # Atualiza o quadrado, a bola e verifica colisões
+        passo_fisica(quadrado, bola, dt)
+        tempo += dt
+        cronometro.marcar("fisica")
+        if registro:
+            registro.registrar(tempo, quadrado.angulo, bola.x, bola.y,
+                               bola.velocidade_x, bola.velocidade_y, bola.cor)
+            cronometro.marcar("registro")
+
+        # Limpa a tela (ou só o que foi desenhado no quadro anterior)
+        retangulos.limpar()
+
+        # Desenha os objetos
+        retangulos.registrar(quadrado.desenhar(screen))
+        retangulos.registrar(bola.desenhar(screen))
+        cronometro.marcar("desenho")
+
+        # Gravação de vídeo: só os quadros que o vídeo de fps quadros/s
+        # precisa, pelo relógio da simulação (já em BGR; a escrita acontece
+        # em outra thread)
+        quadro_bgr, repeticoes = agenda.capturar(tempo, retangulos.areas_alteradas())
+        cronometro.marcar("captura")
+        if exportador:
+            exportador.escrever(quadro_bgr, tempo, repeticoes)
+        else:
+            for _ in range(repeticoes):
+                video_writer.escrever(quadro_bgr)
+                gif_writer.adicionar(quadro_bgr)
+        cronometro.marcar("codificacao")
+
+        # Painel de perfil (depois da captura, para não entrar no vídeo)
+        if painel:
+            retangulos.registrar(painel.desenhar(screen))
+            cronometro.marcar("painel")
+
+        # Atualiza a tela
+        retangulos.apresentar()
+        cronometro.marcar("apresentacao")
+        quadros += 1
+
+    # Libera o gravador de vídeo e finaliza o GIF
+    if exportador:
+        exportador.fechar()
+    else:
+        video_writer.fechar()
+        gif_writer.fechar()
+    gravacao = exportador.estatisticas() if exportador else video_writer.estatisticas()
+    if registro:
+        registro.fechar()
+    print("Gravação:", gravacao)
+    salvar_relatorio("claude", cronometro, quadros,
+                     {"escrita": None if exportador else video_writer.duracoes_escrita, "gravacao": gravacao,
+                      "agenda": agenda.estatisticas()})
+
+    # Encerra o Pygame
+    pygame.quit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quadrado giratório com bola")
+    parser.add_argument("--headless", action="store_true",
+                        help="simula sem janela, sem desenho e sem gravação")
+    parser.add_argument("--passos", type=int, help="número de passos da simulação headless")
+    parser.add_argument("--segundos", type=float, help="tempo simulado da simulação headless")
+    parser.add_argument("--dt", type=float, default=1.0 / FPS, help="passo fixo em segundos")
+    parser.add_argument("--discreta", action="store_true",
+                        help="usa só o teste de sobreposição no fim do passo")
+    parser.add_argument("--segmentos", action="store_true",
+                        help="testa a colisão contra os segmentos rotacionados em vez do referencial local")
+    args = parser.parse_args()
+
+    if args.headless:
+        estado = simular_headless(args.passos, args.segundos, args.dt, continua=not args.discreta,
+                                  local=not args.segmentos)
+        for chave, valor in estado.items():
+            print(f"{chave}: {valor}")
+    else:
+        main()
@@ -0,0 +1 @@
+# Utilitários compartilhados pelas quatro implementações (gravação, captura etc.)
@@ -0,0 +1,173 @@
+import math
+import sys
+
+import cv2
+import numpy as np
+import pygame
+
+# Captura de quadros direto do buffer de pixels da superfície, sem passar por
+# surfarray.array3d + cv2.transpose + cv2.cvtColor. O resultado já sai em
+# (altura, largura, BGR), pronto para o cv2.VideoWriter, com uma única cópia
+# para um array pré-alocado.
+#
+# Com tamanho_saida menor que a superfície, o quadro é reduzido (INTER_AREA)
+# já na captura: a superfície é copiada para um quadro base em resolução
+# cheia, mantido entre as capturas (só as áreas alteradas são relidas), e
+# reduzido direto no buffer de saída.
+class CapturaQuadro:
+    def __init__(self, superficie, num_buffers=1, tamanho_saida=None):
+        if num_buffers < 1:
+            raise ValueError("num_buffers deve ser pelo menos 1")
+        self.superficie = superficie
+        self.largura, self.altura = superficie.get_size()
+        self.tamanho_saida = tuple(tamanho_saida or (self.largura, self.altura))
+        largura_saida, altura_saida = self.tamanho_saida
+        self._base = None
+        if self.tamanho_saida != (self.largura, self.altura):
+            self._base = np.empty((self.altura, self.largura, 3), dtype=np.uint8)
+
+        # Vários buffers permitem entregar o quadro para outra thread (fila do
+        # gravador) enquanto o próximo é capturado. Com uma fila de capacidade
+        # N use N + 2 buffers: N na fila, um no codificador e um sendo escrito.
+        self._buffers = [np.empty((altura_saida, largura_saida, 3), dtype=np.uint8)
+                         for _ in range(num_buffers)]
+        self._proximo = 0
+        # Só dá para capturar por áreas depois de um quadro completo
+        self._capturados = False
+
+        self._fatia_bgr = self._calcular_fatia_bgr()
+        # Caso mais comum (pixels BGRA de 32 bits): o cv2 descarta o alfa e
+        # copia direto para o buffer de saída, bem mais rápido que np.copyto
+        self._bgra = self.superficie.get_bytesize() == 4 and self._fatia_bgr == slice(0, 3)
+
+    def _calcular_fatia_bgr(self):
+        # Posição de cada canal dentro do pixel, em bytes. Se B, G e R estão
+        # em bytes consecutivos (em qualquer ordem crescente ou decrescente),
+        # o buffer bruto vira uma vista BGR com uma fatia simples.
+        bytes_por_pixel = self.superficie.get_bytesize()
+        if bytes_por_pixel not in (3, 4):
+            return None
+
+        deslocamentos = []
+        for shift in self.superficie.get_shifts()[:3]:
+            byte = shift // 8
+            if sys.byteorder == "big":
+                byte = bytes_por_pixel - 1 - byte
+            deslocamentos.append(byte)
+        r, g, b = deslocamentos
+
+        if (b, g, r) == (0, 1, 2):
+            return slice(0, 3)
+        if (b, g, r) == (2, 1, 0):
+            return slice(2, None, -1)
+        if (b, g, r) == (1, 2, 3):
+            return slice(1, 4)
+        if (b, g, r) == (3, 2, 1):
+            return slice(3, 0, -1)
+        return None
+
+    def _vista_pixels(self):
+        # Vista (altura, largura, bytes por pixel) do buffer bruto, sem cópia
+        bytes_por_pixel = self.superficie.get_bytesize()
+        pitch = self.superficie.get_pitch()
+        bruto = np.frombuffer(self.superficie.get_buffer(), dtype=np.uint8)
+        linhas = bruto.reshape(self.altura, pitch)[:, :self.largura * bytes_por_pixel]
+        return linhas.reshape(self.altura, self.largura, bytes_por_pixel)
+
+    def _vista_bgr(self):
+        if self._fatia_bgr is not None:
+            return self._vista_pixels()[:, :, self._fatia_bgr]
+
+        # Formato de pixel incomum: vista RGB (largura, altura) reordenada
+        return pygame.surfarray.pixels3d(self.superficie).transpose(1, 0, 2)[:, :, ::-1]
+
+    def capturar(self, areas=None):
+        # Copia o quadro atual para o próximo buffer livre e o retorna. Com
+        # areas (lista de retângulos alterados desde a captura anterior), só
+        # essas regiões são lidas da superfície; o resto vem do quadro anterior.
+        saida = self._buffers[self._proximo]
+        anterior = self._buffers[self._proximo - 1]
+        self._proximo = (self._proximo + 1) % len(self._buffers)
+
+        if self._base is not None:
+            self._copiar(self._base, areas)
+            cv2.resize(self._base, self.tamanho_saida, dst=saida, interpolation=cv2.INTER_AREA)
+            return saida
+        if areas is not None and self._capturados and anterior is not saida:
+            np.copyto(saida, anterior)
+        self._copiar(saida, areas)
+        return saida
+
+    def _copiar(self, destino, areas):
+        # destino já contém a captura anterior: com areas, só elas são relidas
+        if areas is not None and self._capturados:
+            vista = self._vista_pixels() if self._bgra else self._vista_bgr()
+            for area in areas:
+                x, y, largura, altura = area
+                if largura <= 0 or altura <= 0:
+                    continue
+                regiao = vista[y:y + altura, x:x + largura]
+                if self._bgra:
+                    # A região não é contígua: converter para um array novo e
+                    # copiar é bem mais rápido que copiar a vista fatiada
+                    regiao = cv2.cvtColor(regiao, cv2.COLOR_BGRA2BGR)
+                np.copyto(destino[y:y + altura, x:x + largura], regiao)
+                del regiao
+            del vista
+            return
+        self._capturados = True
+
+        if self._bgra:
+            vista = self._vista_pixels()
+            cv2.cvtColor(vista, cv2.COLOR_BGRA2BGR, dst=destino)
+        else:
+            vista = self._vista_bgr()
+            np.copyto(destino, vista)
+        # Libera a vista para destravar a superfície antes de desenhar de novo
+        del vista
+
+# Agenda de captura guiada pelo relógio da simulação. O loop pode rodar a 60
+# quadros/s (ou variar), mas um vídeo de fps_saida quadros/s só precisa de um
+# quadro a cada 1/fps_saida segundos simulados: só esses são capturados e
+# codificados. Se um quadro do loop cobre vários instantes de saída (loop
+# mais lento que o vídeo), ele é entregue repetido, e o vídeo mantém a
+# velocidade certa.
+#
+# As áreas alteradas nos quadros não capturados são acumuladas, então a
+# captura parcial continua correta.
+class AgendaCaptura:
+    def __init__(self, captura, fps_saida):
+        if fps_saida <= 0:
+            raise ValueError("fps_saida deve ser positivo")
+        self.captura = captura
+        self.fps_saida = fps_saida
+        self.emitidos = 0    # Quadros de saída entregues (com repetições)
+        self.capturados = 0  # Capturas feitas
+        self.ignorados = 0   # Quadros do loop que o vídeo não precisou
+        self._areas = []     # Alteradas desde a última captura (None: tela toda)
+
+    def capturar(self, tempo, areas=None):
+        # tempo: instante simulado do quadro desenhado; areas: alteradas neste
+        # quadro (None se foi a tela toda). Retorna (quadro, repeticoes), com
+        # quadro None e repeticoes 0 quando o vídeo não precisa deste quadro.
+        if areas is None:
+            self._areas = None
+        elif self._areas is not None:
+            self._areas.extend(areas)
+
+        # Instantes de saída k / fps_saida (k = 1, 2, ...) já alcançados; a
+        # tolerância evita perder um por arredondamento do tempo acumulado
+        devidos = math.floor(tempo * self.fps_saida + 1e-6) - self.emitidos
+        if devidos <= 0:
+            self.ignorados += 1
+            return None, 0
+
+        quadro = self.captura.capturar(self._areas)
+        self._areas = []
+        self.emitidos += devidos
+        self.capturados += 1
+        return quadro, devidos
+
+    def estatisticas(self):
+        return {"fps_saida": self.fps_saida, "emitidos": self.emitidos,
+                "capturados": self.capturados, "ignorados": self.ignorados}
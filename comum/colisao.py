@@ -0,0 +1,142 @@
+import math
+
+# Colisão contínua (varrida) de uma bola dentro de um quadrado que gira em
+# torno do próprio centro. Tudo é feito no referencial do quadrado: lá as
+# paredes são fixas e o contato acontece quando max(|u|, |v|) = meio_lado - raio,
+# onde (u, v) é a posição da bola nesse referencial.
+#
+# Ângulos em radianos, velocidades em pixels por segundo. As normais
+# retornadas são unitárias, em coordenadas do mundo e apontam para dentro do
+# quadrado. Como as paredes se movem, "aproximar" é medido com a velocidade
+# relativa entre a bola e o ponto de contato da parede.
+
+def _coordenadas_locais(dx, dy, angulo):
+    # Rotaciona (dx, dy) por -angulo
+    c = math.cos(angulo)
+    s = math.sin(angulo)
+    return dx * c + dy * s, -dx * s + dy * c
+
+def _normal_interna(u, v, angulo):
+    # Normal da face mais próxima (eixo dominante), rotacionada para o mundo
+    if abs(u) >= abs(v):
+        nx, ny = (-1.0 if u > 0 else 1.0), 0.0
+    else:
+        nx, ny = 0.0, (-1.0 if v > 0 else 1.0)
+    c = math.cos(angulo)
+    s = math.sin(angulo)
+    return nx * c - ny * s, nx * s + ny * c
+
+def velocidade_da_parede(ponto, centro, velocidade_angular):
+    # Velocidade de um ponto do quadrado que gira em torno do centro
+    return (-velocidade_angular * (ponto[1] - centro[1]),
+            velocidade_angular * (ponto[0] - centro[0]))
+
+def refletir_velocidade(velocidade, normal, velocidade_parede, amortecimento=1.0):
+    # Reflete a velocidade relativa à parede e aplica o amortecimento. Com a
+    # parede parada equivale a (v - 2 (v . n) n) * amortecimento.
+    wx, wy = velocidade_parede
+    rx, ry = velocidade[0] - wx, velocidade[1] - wy
+    nx, ny = normal
+    rn = rx * nx + ry * ny
+    return (wx + (rx - 2 * rn * nx) * amortecimento,
+            wy + (ry - 2 * rn * ny) * amortecimento)
+
+def folga(posicao, centro, angulo, meio_lado, raio):
+    # Distância que a bola ainda pode andar até encostar na parede mais
+    # próxima (negativa se já estiver penetrando)
+    u, v = _coordenadas_locais(posicao[0] - centro[0], posicao[1] - centro[1], angulo)
+    return (meio_lado - raio) - max(abs(u), abs(v))
+
+def penetracao(posicao, centro, angulo, meio_lado, raio):
+    # Retorna (profundidade, normal_interna) se a bola estiver além da parede,
+    # ou None se estiver livre
+    u, v = _coordenadas_locais(posicao[0] - centro[0], posicao[1] - centro[1], angulo)
+    g = (meio_lado - raio) - max(abs(u), abs(v))
+    if g >= 0:
+        return None
+    return -g, _normal_interna(u, v, angulo)
+
+def tempo_de_impacto(posicao, velocidade, centro, angulo, velocidade_angular,
+                     meio_lado, raio, dt, tolerancia=1e-3, max_iteracoes=64, amostras=16,
+                     aceleracao=(0.0, 0.0)):
+    """
+    Primeiro instante t em [0, dt] em que a bola, andando com a velocidade
+    e a aceleração constante dadas (linha reta ou parábola), encosta numa
+    parede do quadrado que gira com velocidade_angular, com a velocidade
+    relativa apontando para a parede.
+
+    Usa avanço conservador de segunda ordem: a folga g(t) até cada parede
+    tem derivada g1 conhecida e |g''| <= A (aceleração da bola mais os
+    termos de Coriolis e centrífugo no referencial do quadrado), então é
+    seguro avançar o maior h com g + g1 h - A h^2 / 2 >= 0 para as quatro
+    paredes.
+
+    Retorna (t, normal_interna, velocidade_parede) ou None se não houver
+    contato no passo. velocidade_parede é a do ponto de contato em t.
+    """
+    px, py = posicao[0] - centro[0], posicao[1] - centro[1]
+    vx0, vy0 = velocidade
+    ax, ay = aceleracao
+    w = velocidade_angular
+    modulo_aceleracao = math.hypot(ax, ay)
+    rapidez = math.hypot(vx0, vy0) + modulo_aceleracao * dt
+    distancia_maxima = math.hypot(px, py) + rapidez * dt
+    aceleracao_maxima = (modulo_aceleracao + 2 * abs(w) * (rapidez + abs(w) * distancia_maxima)
+                         + w * w * distancia_maxima)
+    limite = meio_lado - raio
+
+    def faces(t):
+        # Folga e derivada da folga para as quatro faces. A mais distante de
+        # cada eixo também limita o passo: sem ela, uma bola que se afasta das
+        # duas mais próximas daria um passo maior que o intervalo até chegar
+        # do outro lado
+        angulo_t = angulo + w * t
+        c, sn = math.cos(angulo_t), math.sin(angulo_t)
+        x, y = px + (vx0 + ax * t / 2) * t, py + (vy0 + ay * t / 2) * t
+        vx, vy = vx0 + ax * t, vy0 + ay * t
+        u, v = _coordenadas_locais(x, y, angulo_t)
+        # Velocidade da bola em relação ao quadrado; a componente normal é a
+        # mesma no centro da bola e no ponto de contato
+        rx, ry = vx + w * y, vy - w * x
+        resultado = []
+        for coordenada, (ex, ey) in ((u, (c, sn)), (v, (-sn, c))):
+            for sinal in (-1.0, 1.0):
+                nx, ny = sinal * ex, sinal * ey
+                resultado.append((limite + sinal * coordenada, rx * nx + ry * ny, (nx, ny),
+                                  (x - nx * raio, y - ny * raio)))
+        return resultado
+
+    def contato(t, lista):
+        for g, g1, normal, ponto in sorted(lista):
+            if g <= tolerancia and g1 < 0:
+                return t, normal, velocidade_da_parede(ponto, (0.0, 0.0), w)
+        return None
+
+    def passo_seguro(g, g1):
+        if aceleracao_maxima == 0:
+            return g / -g1 if g1 < 0 else math.inf
+        if g > 0:
+            return (g1 + math.sqrt(g1 * g1 + 2 * aceleracao_maxima * g)) / aceleracao_maxima
+        # Já encostada mas se afastando: g não diminui enquanto g1 >= 0
+        return g1 / aceleracao_maxima
+
+    t = 0.0
+    for _ in range(max_iteracoes):
+        lista = faces(t)
+        encontrado = contato(t, lista)
+        if encontrado is not None:
+            return encontrado
+
+        h = min(passo_seguro(g, g1) for g, g1, _, _ in lista)
+        t += max(h, dt * 1e-6)
+        if t > dt:
+            return None
+
+    # Convergência lenta (contato rasante): procura por amostragem o primeiro
+    # instante do resto do passo em que a bola encosta vindo para a parede
+    for k in range(1, amostras + 1):
+        tk = t + (dt - t) * k / amostras
+        encontrado = contato(tk, faces(tk))
+        if encontrado is not None:
+            return encontrado
+    return None
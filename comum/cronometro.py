@@ -0,0 +1,205 @@
+import atexit
+import gc
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Modo benchmark, ligado pelo executor (benchmark.py) via variáveis de ambiente:
+# BENCH_PASSOS limita o número de quadros e BENCH_RELATORIO é o arquivo JSON
+# onde o jogo grava os tempos medidos.
+PASSOS_BENCHMARK = int(os.environ.get("BENCH_PASSOS", "0"))
+BENCHMARK = PASSOS_BENCHMARK > 0
+
+# Perfil em produção: PERFIL=1 mede as fases de todo quadro (com custo de
+# poucos microssegundos) e imprime um resumo ao sair; PERFIL=hud também mostra
+# o painel na tela desde o início (F3 liga e desliga). Desligado, marcar()
+# só testa um atributo e retorna.
+PERFIL = os.environ.get("PERFIL", "").lower()
+PERFIL_ATIVO = PERFIL not in ("", "0")
+PERFIL_HUD = PERFIL == "hud"
+
+# Quantas durações recentes de cada fase ficam guardadas (o anel é
+# reaproveitado; os percentis do painel saem dessa janela)
+JANELA = 1024
+
+# Faixas do histograma acumulado: 20 por década, de 1 µs a 10 s
+FAIXAS = np.logspace(-6, 1, 141)
+
+class Historico:
+    """
+    Durações de uma fase em memória fixa: as últimas len(amostras) num anel
+    e todas as anteriores dobradas num histograma de faixas logarítmicas.
+    """
+    def __init__(self, janela=JANELA):
+        self.amostras = np.zeros(janela)
+        self.indice = 0
+        self.total = 0
+        self.contagens = np.zeros(len(FAIXAS) + 1, dtype=np.int64)
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def adicionar(self, duracao):
+        self.amostras[self.indice] = duracao
+        self.indice += 1
+        self.total += 1
+        if self.indice == len(self.amostras):
+            # Anel cheio: as amostras entram no histograma de uma vez só
+            self._acumular(self.amostras)
+            self.indice = 0
+
+    def _acumular(self, valores):
+        if len(valores):
+            self.contagens += np.bincount(np.searchsorted(FAIXAS, valores), minlength=len(self.contagens))
+            self.soma += float(valores.sum())
+            self.maximo = max(self.maximo, float(valores.max()))
+
+    def recentes(self):
+        # Amostras da janela em ordem cronológica
+        if self.total < len(self.amostras):
+            return self.amostras[:self.indice]
+        return np.concatenate((self.amostras[self.indice:], self.amostras[:self.indice]))
+
+    def percentis(self, percentis):
+        # Percentis da janela recente (posto mais próximo; a ordem das
+        # amostras não importa, então o anel é ordenado direto)
+        recentes = self.amostras if self.total >= len(self.amostras) else self.amostras[:self.indice]
+        if not len(recentes):
+            return [0.0] * len(percentis)
+        ordenadas = np.sort(recentes)
+        return [float(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]) for p in percentis]
+
+    def resumo(self, percentis=(50, 90, 99)):
+        # Percentis de todo o período pelo histograma (limite superior da
+        # faixa, erro de até 12%), média e máximo exatos
+        contagens = self.contagens.copy()
+        pendentes = self.amostras[:self.indice]
+        soma, maximo = self.soma, self.maximo
+        if len(pendentes):
+            contagens += np.bincount(np.searchsorted(FAIXAS, pendentes), minlength=len(contagens))
+            soma += float(pendentes.sum())
+            maximo = max(maximo, float(pendentes.max()))
+        total = int(contagens.sum())
+        limites = np.append(FAIXAS, np.inf)
+        acumulado = np.cumsum(contagens)
+        valores = {}
+        for p in percentis:
+            faixa = int(np.searchsorted(acumulado, total * p / 100))
+            valores[f"p{p}"] = min(float(limites[faixa]), maximo) if total else 0.0
+        return dict(amostras=total, media=soma / total if total else 0.0, max=maximo, **valores)
+
+# Cronômetro de fases do quadro: marcar(fase) soma o tempo decorrido desde a
+# marca anterior à fase indicada. Cada fase tem um Historico; quadro guarda o
+# intervalo entre dois iniciar() (o quadro inteiro, com a espera do relógio).
+#
+# Também registra as pausas do coletor de lixo (gc): cada coleta feita na
+# thread do loop entra em coletas[fase] como [geração, duração] da fase em que
+# aconteceu; as disparadas por outras threads (gravação) vão para
+# coletas["segundo_plano"].
+class Cronometro:
+    def __init__(self, ativo=None, janela=None):
+        if ativo is None:
+            ativo = BENCHMARK or PERFIL_ATIVO
+        if janela is None:
+            # Em benchmark cabem todas as amostras, para o relatório completo
+            janela = max(PASSOS_BENCHMARK, 1) if BENCHMARK else JANELA
+        self.ativo = ativo
+        self.janela = janela
+        self.historicos = {}
+        self.quadro = Historico(janela)
+        self.coletas = {}
+        self._marca = 0.0
+        self._inicio_quadro = None
+        self._pendentes = []
+        self._inicio_coleta = 0.0
+        self._thread = threading.get_ident()
+        if ativo:
+            gc.callbacks.append(self._coleta)
+            if PERFIL_ATIVO and not BENCHMARK:
+                atexit.register(self.imprimir_resumo)
+
+    @property
+    def fases(self):
+        # Durações recentes de cada fase, em segundos (todas, em benchmark)
+        return {fase: historico.recentes().tolist() for fase, historico in self.historicos.items()}
+
+    def _coleta(self, etapa, info):
+        if etapa == "start":
+            self._inicio_coleta = time.perf_counter()
+            return
+        pausa = [info["generation"], time.perf_counter() - self._inicio_coleta]
+        if threading.get_ident() == self._thread:
+            self._pendentes.append(pausa)
+        else:
+            self.coletas.setdefault("segundo_plano", []).append(pausa)
+
+    def iniciar(self):
+        if not self.ativo:
+            return
+        self._marca = time.perf_counter()
+        if self._inicio_quadro is not None:
+            self.quadro.adicionar(self._marca - self._inicio_quadro)
+        self._inicio_quadro = self._marca
+
+    def marcar(self, fase):
+        if not self.ativo:
+            return
+        agora = time.perf_counter()
+        historico = self.historicos.get(fase)
+        if historico is None:
+            historico = self.historicos[fase] = Historico(self.janela)
+        historico.adicionar(agora - self._marca)
+        self._marca = agora
+        if self._pendentes:
+            self.coletas.setdefault(fase, []).extend(self._pendentes)
+            self._pendentes.clear()
+
+    def resumo(self):
+        # Percentis de todo o período, por fase e do quadro inteiro
+        resumo = {fase: historico.resumo() for fase, historico in self.historicos.items()}
+        if self.quadro.total:
+            resumo["quadro"] = self.quadro.resumo()
+        return resumo
+
+    def imprimir_resumo(self, arquivo=None):
+        arquivo = arquivo or sys.stderr
+        resumo = self.resumo()
+        if not resumo:
+            return
+        print(f"{'fase':<13}{'amostras':>9}{'média':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'máx':>10}  (ms)",
+              file=arquivo)
+        for fase, valores in resumo.items():
+            print(f"{fase:<13}{valores['amostras']:>9}" + "".join(
+                f"{valores[chave] * 1000:>10.3f}" for chave in ("media", "p50", "p90", "p99", "max")),
+                file=arquivo)
+        pausas = [duracao for lista in self.coletas.values() for _, duracao in lista]
+        if pausas:
+            print(f"gc: {len(pausas)} coletas, pausa máx {max(pausas) * 1000:.3f} ms", file=arquivo)
+
+# Passo de tempo do quadro: em benchmark é fixo e o loop não espera o relógio
+def duracao_passo(relogio, fps):
+    if BENCHMARK:
+        return 1.0 / fps
+    return relogio.tick(fps) / 1000.0
+
+def continuar(quadros):
+    # Em benchmark o loop termina após PASSOS_BENCHMARK quadros
+    return not BENCHMARK or quadros < PASSOS_BENCHMARK
+
+def salvar_relatorio(nome, cronometro, quadros, extras=None):
+    caminho = os.environ.get("BENCH_RELATORIO")
+    if not caminho:
+        return
+    relatorio = {
+        "implementacao": nome,
+        "quadros": quadros,
+        "fases": cronometro.fases,
+        "coletas": cronometro.coletas,
+        "resumo": cronometro.resumo(),
+    }
+    relatorio.update(extras or {})
+    with open(caminho, "w") as arquivo:
+        json.dump(relatorio, arquivo)
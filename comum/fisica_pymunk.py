@@ -0,0 +1,160 @@
+import math
+import time
+
+import pymunk
+
+# Simulação headless do quadrado giratório com pymunk, montada a partir de um
+# dicionário de parâmetros em vez das constantes de módulo de gpt/game.py e
+# deepseek/game.py. Cada chamada cria o seu próprio pymunk.Space, então várias
+# simulações podem rodar em processos separados sem estado compartilhado.
+
+PARAMETROS_PADRAO = {
+    "gravidade": 900.0,        # pixels/s^2, sempre "para baixo" na tela
+    "elasticidade": 1.0,
+    "atrito": 0.0,
+    "raio": 10.0,
+    "velocidade_angular": 60.0,  # graus por segundo
+    "lado": 200.0,
+    "espessura": 2.0,
+    # "cinematico": o corpo do quadrado gira de verdade (gpt);
+    # "estatico": só o ângulo muda, sem reindexar as formas (deepseek)
+    "corpo": "cinematico",
+    # "losango": vértices nos eixos (gpt); "quadrado": lados nos eixos (deepseek)
+    "forma": "losango",
+    "duracao": 10.0,           # segundos simulados
+    "dt": 1.0 / 60,
+    "amostragem_energia": 0.1,  # intervalo entre amostras de energia, em segundos
+}
+
+# Configurações equivalentes às de cada implementação
+PREDEFINIDOS = {
+    "gpt": {},
+    "deepseek": {
+        "gravidade": 981.0,
+        "elasticidade": 0.8,
+        "atrito": 0.5,
+        "raio": 15.0,
+        "corpo": "estatico",
+        "forma": "quadrado",
+    },
+}
+
+def parametros(predefinido="gpt", **alteracoes):
+    # Parâmetros padrão + os do predefinido + as alterações pedidas
+    desconhecidos = set(alteracoes) - set(PARAMETROS_PADRAO)
+    if desconhecidos:
+        raise ValueError(f"Parâmetros desconhecidos: {sorted(desconhecidos)}")
+    resultado = dict(PARAMETROS_PADRAO)
+    resultado.update(PREDEFINIDOS[predefinido])
+    resultado.update(alteracoes)
+    return resultado
+
+def _vertices(p):
+    meio = p["lado"] / 2
+    if p["forma"] == "losango":
+        return [(math.cos(i * math.pi / 2) * meio, math.sin(i * math.pi / 2) * meio) for i in range(4)]
+    return [(-meio, -meio), (meio, -meio), (meio, meio), (-meio, meio)]
+
+def criar_espaco(p):
+    # Monta o espaço com o quadrado e a bola no centro dele. Usa Y para baixo,
+    # como a tela, para as duas implementações.
+    espaco = pymunk.Space()
+    espaco.gravity = (0, p["gravidade"])
+
+    tipo = pymunk.Body.KINEMATIC if p["corpo"] == "cinematico" else pymunk.Body.STATIC
+    quadrado = pymunk.Body(body_type=tipo)
+    quadrado.position = (0, 0)
+    vertices = _vertices(p)
+    lados = []
+    for i in range(4):
+        lado = pymunk.Segment(quadrado, vertices[i], vertices[(i + 1) % 4], p["espessura"])
+        lado.elasticity = p["elasticidade"]
+        lado.friction = p["atrito"]
+        lados.append(lado)
+    espaco.add(quadrado, *lados)
+
+    massa = 1
+    bola = pymunk.Body(massa, pymunk.moment_for_circle(massa, 0, p["raio"]))
+    bola.position = (0, 0)
+    forma_bola = pymunk.Circle(bola, p["raio"])
+    forma_bola.elasticity = p["elasticidade"]
+    forma_bola.friction = p["atrito"]
+    espaco.add(bola, forma_bola)
+    return espaco, quadrado, bola, vertices
+
+def _dentro(ponto, vertices):
+    # Centro da bola do lado de dentro de todas as paredes (polígono convexo)
+    x, y = ponto
+    sinais = set()
+    for i in range(len(vertices)):
+        ax, ay = vertices[i]
+        bx, by = vertices[(i + 1) % len(vertices)]
+        sinais.add((bx - ax) * (y - ay) - (by - ay) * (x - ax) > 0)
+    return len(sinais) == 1
+
+def energia(bola, gravidade):
+    # Cinética (translação + rotação) + potencial, com a altura medida para cima
+    v = bola.velocity
+    return (0.5 * bola.mass * v.dot(v) + 0.5 * bola.moment * bola.angular_velocity ** 2
+            - bola.mass * gravidade * bola.position.y)
+
+def simular(p):
+    """
+    Roda uma configuração e devolve as métricas: quiques (contatos que
+    começam), fugas (vezes em que o centro da bola sai do quadrado),
+    instante da primeira fuga, série de energia e passos por segundo.
+    """
+    espaco, quadrado, bola, vertices = criar_espaco(p)
+
+    quiques = [0]
+    def contar(arbiter, space, data):
+        quiques[0] += 1
+        return True
+    espaco.add_default_collision_handler().begin = contar
+
+    dt = p["dt"]
+    passos = int(round(p["duracao"] / dt))
+    a_cada = max(1, int(round(p["amostragem_energia"] / dt)))
+    velocidade_angular = math.radians(p["velocidade_angular"])
+    estatico = p["corpo"] == "estatico"
+    angulo = 0.0
+
+    energias = [energia(bola, p["gravidade"])]
+    fugas = 0
+    primeira_fuga = None
+    dentro = True
+    inicio = time.perf_counter()
+    for passo in range(1, passos + 1):
+        if estatico:
+            # Igual a deepseek/game.py: o ângulo muda mas as formas estáticas
+            # não são reindexadas, então as paredes continuam onde estavam
+            quadrado.angle += velocidade_angular * dt
+        else:
+            # Igual a gpt/game.py: o ângulo acumulado é atribuído a cada passo
+            # (sem velocidade angular no corpo)
+            angulo += velocidade_angular * dt
+            quadrado.angle = angulo
+        espaco.step(dt)
+
+        # As paredes estáticas nunca giram: a fuga é medida sem a rotação
+        posicao = bola.position if estatico else quadrado.world_to_local(bola.position)
+        agora = _dentro(posicao, vertices)
+        if dentro and not agora:
+            fugas += 1
+            if primeira_fuga is None:
+                primeira_fuga = passo * dt
+        dentro = agora
+        if passo % a_cada == 0:
+            energias.append(energia(bola, p["gravidade"]))
+    duracao = time.perf_counter() - inicio
+
+    return {
+        "quiques": quiques[0],
+        "fugas": fugas,
+        "primeira_fuga": primeira_fuga,
+        "energia_inicial": energias[0],
+        "energia_final": energias[-1],
+        "energia": energias,
+        "passos": passos,
+        "passos_por_segundo": passos / duracao if duracao > 0 else None,
+    }
@@ -0,0 +1,104 @@
+import struct
+
+import cv2
+from PIL import Image, GifImagePlugin
+
+_escrever_quadro = getattr(GifImagePlugin, "_write_frame_data", None)
+
+# Gravador de GIF incremental: cada quadro aceito é reduzido, ganha uma paleta
+# própria e é escrito no arquivo na hora. Não há MP4 intermediário nem ffmpeg;
+# o GIF está pronto assim que fechar() é chamado.
+class GravadorGif:
+    def __init__(self, caminho, fps_entrada, fps_saida=10, largura=320, repetir=True):
+        if fps_entrada <= 0 or fps_saida <= 0:
+            raise ValueError("As taxas de quadros devem ser positivas")
+        self.caminho = caminho
+        self.fps_entrada = fps_entrada
+        self.fps_saida = min(fps_saida, fps_entrada)
+        self.largura = largura
+        self.repetir = repetir
+        # Duração de cada quadro do GIF em milissegundos
+        self.duracao = int(round(1000 / self.fps_saida))
+        self._parametros = {"duration": self.duracao, "include_color_table": True}
+
+        self._arquivo = open(caminho, "wb")
+        self._tamanho = None
+        # Começa "cheio" para que o primeiro quadro sempre entre
+        self._acumulado = float(fps_entrada)
+
+        self.recebidos = 0
+        self.escritos = 0
+
+    def _escrever_cabecalho(self, largura, altura):
+        # Cabeçalho GIF89a sem paleta global (cada quadro traz a sua)
+        self._arquivo.write(b"GIF89a" + struct.pack("<HHBBB", largura, altura, 0, 0, 0))
+        if self.repetir:
+            # Extensão NETSCAPE2.0: repetição infinita
+            self._arquivo.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    def adicionar(self, quadro):
+        # Recebe um quadro (altura, largura, BGR) na taxa fps_entrada e só
+        # codifica os necessários para a taxa fps_saida
+        self.recebidos += 1
+        if self._acumulado < self.fps_entrada:
+            self._acumulado += self.fps_saida
+            return False
+        self._acumulado += self.fps_saida - self.fps_entrada
+
+        if self._tamanho is None:
+            altura, largura = quadro.shape[:2]
+            nova_largura = min(self.largura, largura)
+            nova_altura = max(1, int(round(altura * nova_largura / largura)))
+            self._tamanho = (nova_largura, nova_altura)
+            self._escrever_cabecalho(*self._tamanho)
+
+        reduzido = cv2.resize(quadro, self._tamanho, interpolation=cv2.INTER_AREA)
+        reduzido = cv2.cvtColor(reduzido, cv2.COLOR_BGR2RGB)
+
+        # Paleta adaptativa do próprio quadro (a cena tem poucas cores)
+        imagem = Image.fromarray(reduzido).quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        # Escreve o quadro direto no arquivo. GifImagePlugin.getdata faria o
+        # mesmo, mas define uma classe nova a cada chamada, e esse lixo cíclico
+        # só sai nas coletas do gc (pausas no meio do loop). A função é
+        # privada: nas versões do Pillow sem ela, volta para o getdata público
+        if _escrever_quadro is not None:
+            _escrever_quadro(self._arquivo, imagem, (0, 0), self._parametros)
+        else:
+            for dados in GifImagePlugin.getdata(imagem, (0, 0), **self._parametros):
+                self._arquivo.write(dados)
+        self.escritos += 1
+        return True
+
+    def fechar(self):
+        if self._arquivo.closed:
+            return
+        self._arquivo.write(b";")
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+def concatenar_gif(segmentos, caminho_saida):
+    # Junta GIFs gravados por GravadorGif com o mesmo tamanho, sem recodificar:
+    # cada quadro já traz a própria paleta, então basta manter o cabeçalho do
+    # primeiro segmento e copiar os quadros de todos
+    laco = b"!\xff\x0bNETSCAPE2.0"
+    with open(caminho_saida, "wb") as saida:
+        for numero, caminho in enumerate(segmentos):
+            with open(caminho, "rb") as arquivo:
+                dados = arquivo.read()
+            if not dados.startswith(b"GIF89a") or not dados.endswith(b";"):
+                raise ValueError(f"'{caminho}' não é um GIF completo")
+            inicio = 13  # Assinatura + descritor da tela (sem paleta global)
+            if dados[inicio:inicio + len(laco)] == laco:
+                inicio += 19
+            if numero == 0:
+                tamanho = dados[6:10]
+                saida.write(dados[:inicio])
+            elif dados[6:10] != tamanho:
+                raise ValueError(f"'{caminho}' tem outro tamanho")
+            saida.write(dados[inicio:-1])
+        saida.write(b";")
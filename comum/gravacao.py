@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+
+import cv2
+
+# Políticas para quando a fila de quadros está cheia
+BLOQUEAR = "bloquear"        # o loop do jogo espera o codificador
+DESCARTAR = "descartar"      # o quadro novo é descartado
+SUBAMOSTRAR = "subamostrar"  # com a fila quase cheia, só metade dos quadros entra
+POLITICAS = (BLOQUEAR, DESCARTAR, SUBAMOSTRAR)
+
+# Marcador de fim da fila
+_FIM = object()
+
+# Converte um quadro de pygame.surfarray.array3d (largura, altura, RGB)
+# para o formato do cv2.VideoWriter (altura, largura, BGR)
+def converter_rgb_para_bgr(quadro):
+    return cv2.cvtColor(cv2.transpose(quadro), cv2.COLOR_RGB2BGR)
+
+# Gravador de vídeo em segundo plano: o loop do jogo só coloca os quadros
+# numa fila limitada e uma thread faz a conversão de cor e a escrita do MP4.
+class GravadorAssincrono:
+    def __init__(self, caminho, fps, tamanho, capacidade=8, politica=BLOQUEAR,
+                 codec="mp4v", converter=converter_rgb_para_bgr, medir_tempos=False):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconhecida: {politica!r} (use uma de {POLITICAS})")
+        if capacidade < 1:
+            raise ValueError("A capacidade da fila deve ser pelo menos 1")
+
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.politica = politica
+        self.converter = converter
+
+        self._writer = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*codec), fps, tamanho)
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._erro = None
+        self._fechado = False
+
+        # Quadros pulados pela subamostragem, somados ao próximo quadro aceito
+        # para que a duração do vídeo continue correta
+        self._pendentes = 0
+        self._alternar = False
+
+        # Estatísticas
+        self.enfileirados = 0
+        self.escritos = 0
+        self.descartados = 0
+        self.subamostrados = 0
+        self.profundidade_maxima = 0
+        self._soma_profundidade = 0
+        self._amostras_profundidade = 0
+        # Tempo de conversão + escrita de cada quadro (só se medir_tempos)
+        self.duracoes_escrita = [] if medir_tempos else None
+
+        self._thread = threading.Thread(target=self._trabalhar, name="gravador-video", daemon=True)
+        self._thread.start()
+
+    def escrever(self, quadro):
+        if self._fechado:
+            raise RuntimeError("O gravador já foi fechado")
+        if self._erro is not None:
+            raise self._erro
+
+        profundidade = self._fila.qsize()
+        self._soma_profundidade += profundidade
+        self._amostras_profundidade += 1
+        self.profundidade_maxima = max(self.profundidade_maxima, profundidade)
+
+        if self.politica == SUBAMOSTRAR and profundidade >= self.capacidade * 3 // 4:
+            # Fila quase cheia: aceita um quadro sim, outro não
+            self._alternar = not self._alternar
+            if self._alternar:
+                self._pendentes += 1
+                self.subamostrados += 1
+                return False
+
+        item = (quadro, 1 + self._pendentes)
+        if self.politica == BLOQUEAR:
+            self._fila.put(item)
+        else:
+            try:
+                self._fila.put_nowait(item)
+            except queue.Full:
+                self.descartados += 1
+                if self.politica == SUBAMOSTRAR:
+                    self._pendentes += 1
+                return False
+
+        self._pendentes = 0
+        self.enfileirados += 1
+        return True
+
+    def _trabalhar(self):
+        while True:
+            item = self._fila.get()
+            if item is _FIM:
+                break
+            if self._erro is not None:
+                # Depois de um erro apenas esvazia a fila
+                continue
+            quadro, repeticoes = item
+            inicio = time.perf_counter()
+            try:
+                if self.converter is not None:
+                    quadro = self.converter(quadro)
+                for _ in range(repeticoes):
+                    self._writer.write(quadro)
+                    self.escritos += 1
+            except Exception as erro:
+                self._erro = erro
+            if self.duracoes_escrita is not None:
+                self.duracoes_escrita.append(time.perf_counter() - inicio)
+
+    def estatisticas(self):
+        media = self._soma_profundidade / self._amostras_profundidade if self._amostras_profundidade else 0.0
+        return {
+            "politica": self.politica,
+            "capacidade": self.capacidade,
+            "enfileirados": self.enfileirados,
+            "escritos": self.escritos,
+            "descartados": self.descartados,
+            "subamostrados": self.subamostrados,
+            "profundidade_atual": self._fila.qsize(),
+            "profundidade_maxima": self.profundidade_maxima,
+            "profundidade_media": media,
+        }
+
+    def fechar(self):
+        # Espera o codificador esvaziar a fila e libera o arquivo
+        if self._fechado:
+            return
+        self._fechado = True
+        self._fila.put(_FIM)
+        self._thread.join()
+        self._writer.release()
+        if self._erro is not None:
+            raise self._erro
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
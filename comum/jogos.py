@@ -0,0 +1,17 @@
+import importlib.util
+import os
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_jogos = {}
+
+def carregar_jogo(implementacao):
+    # Importa <implementacao>/game.py (sem abrir janela nem criar gravadores).
+    # Os quatro módulos se chamam game.py; cada um é carregado com um nome próprio.
+    if implementacao not in _jogos:
+        caminho = os.path.join(RAIZ, implementacao, "game.py")
+        spec = importlib.util.spec_from_file_location(f"jogo_{implementacao}", caminho)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        _jogos[implementacao] = modulo
+    return _jogos[implementacao]
@@ -0,0 +1,321 @@
+import multiprocessing
+import os
+import time
+import zipfile
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from comum.gravacao import BLOQUEAR, SUBAMOSTRAR, POLITICAS
+
+# Exportação de quadros por memória compartilhada: o loop do jogo copia cada
+# quadro capturado para um anel de posições pré-alocadas num bloco
+# multiprocessing.shared_memory, e um ou mais processos codificadores (MP4,
+# GIF, miniaturas...) leem direto de lá, em outros núcleos e fora do GIL do
+# jogo. Não há pickle nem cópia além da escrita no anel.
+#
+# Layout do bloco (int64 e float64 nativos, alinhados a 64 bytes):
+#   cabeçalho  MAGICO, posições, altura, largura, consumidores
+#   controle   publicados, fechado, lidos[consumidor]..., prontos[consumidor]...
+#   posições   índice do quadro de saída, tempo simulado e repetições de cada uma
+#   quadros    posições x (altura, largura, BGR) uint8
+#
+# Cada contador tem um único escritor: publicados e fechado são do jogo, e
+# lidos[c] e prontos[c] são do consumidor c. O jogo escreve o quadro e o
+# cabeçalho da posição antes de incrementar publicados, e o consumidor só
+# incrementa lidos[c] depois de terminar de usar o quadro; a espera dos dois
+# lados é por sondagem (ESPERA segundos entre tentativas).
+#
+# Com EXPORTAR=memoria no ambiente os jogos usam este modo em vez dos
+# gravadores em threads.
+EXPORTAR_MEMORIA = os.environ.get("EXPORTAR", "").lower() == "memoria"
+
+MAGICO = 0x51554144524f53  # "QUADROS"
+ESPERA = 0.0005
+_ALINHAMENTO = 64
+
+def _alinhar(tamanho):
+    return -(-tamanho // _ALINHAMENTO) * _ALINHAMENTO
+
+class _Anel:
+    # Vistas NumPy sobre o bloco compartilhado, iguais no jogo e nos consumidores
+    def _mapear(self, posicoes, altura, largura, consumidores):
+        buffer = self._memoria.buf
+        deslocamento = 0
+
+        def vista(forma, tipo):
+            nonlocal deslocamento
+            array = np.ndarray(forma, dtype=tipo, buffer=buffer, offset=deslocamento)
+            deslocamento += _alinhar(array.nbytes)
+            return array
+
+        self._cabecalho = vista((5,), np.int64)
+        self._controle = vista((2 + 2 * consumidores,), np.int64)
+        self._lidos = self._controle[2:2 + consumidores]
+        self._prontos = self._controle[2 + consumidores:]
+        self._indices = vista((posicoes,), np.int64)
+        self._tempos = vista((posicoes,), np.float64)
+        self._repeticoes = vista((posicoes,), np.int64)
+        self._quadros = vista((posicoes, altura, largura, 3), np.uint8)
+        return deslocamento
+
+    def _liberar_vistas(self):
+        # As vistas precisam sumir antes de fechar o bloco
+        self._cabecalho = self._controle = self._lidos = self._prontos = self._indices = None
+        self._tempos = self._repeticoes = self._quadros = None
+
+    @staticmethod
+    def tamanho_bloco(posicoes, altura, largura, consumidores):
+        return (_alinhar(5 * 8) + _alinhar((2 + 2 * consumidores) * 8) + 3 * _alinhar(posicoes * 8) +
+                _alinhar(posicoes * altura * largura * 3))
+
+class ExportadorQuadros(_Anel):
+    def __init__(self, tamanho, posicoes=8, consumidores=1, politica=BLOQUEAR, nome=None):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconhecida: {politica!r} (use uma de {POLITICAS})")
+        if posicoes < 1 or consumidores < 1:
+            raise ValueError("O anel precisa de pelo menos uma posição e um consumidor")
+
+        largura, altura = tamanho
+        self.tamanho = (largura, altura)
+        self.posicoes = posicoes
+        self.consumidores = consumidores
+        self.politica = politica
+        self._memoria = shared_memory.SharedMemory(
+            name=nome, create=True, size=self.tamanho_bloco(posicoes, altura, largura, consumidores))
+        self.nome = self._memoria.name
+        self._mapear(posicoes, altura, largura, consumidores)
+        self._cabecalho[:] = (MAGICO, posicoes, altura, largura, consumidores)
+        self._controle[:] = 0
+        self._processos = []
+        self._fechado = False
+
+        # Quadros de saída já entregues (índice do próximo) e repetições de
+        # quadros pulados, somadas ao próximo publicado como no GravadorAssincrono
+        self._indice = 0
+        self._pendentes = 0
+        self._alternar = False
+
+        # Estatísticas
+        self.publicados = 0
+        self.descartados = 0
+        self.subamostrados = 0
+        self.ocupacao_maxima = 0
+        self.tempo_espera = 0.0
+
+    def iniciar(self, funcao, *args, esperar=True):
+        # Inicia funcao(nome, consumidor, *args) num processo novo, como o
+        # próximo consumidor do anel. O contexto "spawn" não herda a janela,
+        # as threads nem o estado do pygame. Com esperar, só retorna quando o
+        # consumidor abriu o anel (sem isso, com DESCARTAR, os primeiros
+        # quadros se perderiam enquanto o processo importa os módulos).
+        consumidor = len(self._processos)
+        if consumidor >= self.consumidores:
+            raise ValueError(f"O anel foi criado para {self.consumidores} consumidor(es)")
+        contexto = multiprocessing.get_context("spawn")
+        processo = contexto.Process(target=funcao, args=(self.nome, consumidor, *args),
+                                    name=f"codificador-{consumidor}", daemon=True)
+        processo.start()
+        self._processos.append(processo)
+        while esperar and not self._prontos[consumidor]:
+            self._verificar_processos()
+            time.sleep(ESPERA)
+        return processo
+
+    def _ocupacao(self):
+        return self.publicados - int(self._lidos.min())
+
+    def _verificar_processos(self):
+        for processo in self._processos:
+            if processo.exitcode is not None and (processo.exitcode != 0 or not self._fechado):
+                raise RuntimeError(f"O codificador {processo.name} terminou com código {processo.exitcode}")
+
+    def escrever(self, quadro, tempo, repeticoes=1):
+        # Publica o quadro (altura, largura, BGR), que vale repeticoes quadros
+        # de saída a partir do instante tempo. Retorna se ele entrou no anel.
+        if self._fechado:
+            raise RuntimeError("O exportador já foi fechado")
+        if repeticoes <= 0:
+            return False
+        indice = self._indice
+        self._indice += repeticoes
+
+        ocupacao = self._ocupacao()
+        self.ocupacao_maxima = max(self.ocupacao_maxima, ocupacao)
+        if self.politica == SUBAMOSTRAR and ocupacao >= self.posicoes * 3 // 4:
+            # Anel quase cheio: aceita um quadro sim, outro não
+            self._alternar = not self._alternar
+            if self._alternar:
+                self._pendentes += repeticoes
+                self.subamostrados += 1
+                return False
+
+        if ocupacao >= self.posicoes:
+            if self.politica == BLOQUEAR:
+                inicio = time.perf_counter()
+                while self._ocupacao() >= self.posicoes:
+                    self._verificar_processos()
+                    time.sleep(ESPERA)
+                self.tempo_espera += time.perf_counter() - inicio
+            else:
+                self.descartados += 1
+                if self.politica == SUBAMOSTRAR:
+                    self._pendentes += repeticoes
+                return False
+
+        posicao = self.publicados % self.posicoes
+        np.copyto(self._quadros[posicao], quadro)
+        self._indices[posicao] = indice - self._pendentes
+        self._tempos[posicao] = tempo
+        self._repeticoes[posicao] = repeticoes + self._pendentes
+        self._pendentes = 0
+        self.publicados += 1
+        self._controle[0] = self.publicados
+        return True
+
+    def estatisticas(self):
+        return {
+            "nome": self.nome,
+            "politica": self.politica,
+            "posicoes": self.posicoes,
+            "consumidores": self.consumidores,
+            "publicados": self.publicados,
+            "quadros_saida": self._indice,
+            "descartados": self.descartados,
+            "subamostrados": self.subamostrados,
+            "ocupacao_maxima": self.ocupacao_maxima,
+            "tempo_espera": self.tempo_espera,
+        }
+
+    def fechar(self, tempo_limite=None):
+        # Avisa o fim aos consumidores, espera que leiam o que falta (e que os
+        # processos iniciados aqui terminem) e remove o bloco
+        if self._fechado:
+            return
+        self._fechado = True
+        self._controle[1] = 1
+        limite = None if tempo_limite is None else time.monotonic() + tempo_limite
+        erro = None
+        try:
+            while self._ocupacao() > 0 and (limite is None or time.monotonic() < limite):
+                if self._processos and all(p.exitcode is not None for p in self._processos):
+                    break
+                time.sleep(ESPERA)
+            for processo in self._processos:
+                processo.join(None if limite is None else max(0.0, limite - time.monotonic()))
+            self._verificar_processos()
+        except RuntimeError as excecao:
+            erro = excecao
+        finally:
+            self._liberar_vistas()
+            self._memoria.close()
+            self._memoria.unlink()
+        if erro is not None:
+            raise erro
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+class LeitorQuadros(_Anel):
+    def __init__(self, nome, consumidor):
+        self._memoria = shared_memory.SharedMemory(name=nome)
+        # Quem remove o bloco é o exportador. Um processo independente tem
+        # rastreador de recursos próprio, que o removeria na saída; os
+        # iniciados pelo multiprocessing usam o do exportador, e lá o registro
+        # já existe (removê-lo aqui faria o unlink do exportador falhar).
+        if multiprocessing.parent_process() is None:
+            resource_tracker.unregister(self._memoria._name, "shared_memory")
+        cabecalho = np.ndarray((5,), dtype=np.int64, buffer=self._memoria.buf)
+        if cabecalho[0] != MAGICO:
+            raise ValueError(f"{nome!r} não é um anel de quadros")
+        self.posicoes, altura, largura, consumidores = (int(valor) for valor in cabecalho[1:])
+        del cabecalho
+        if not 0 <= consumidor < consumidores:
+            raise ValueError(f"Consumidor {consumidor} fora do intervalo [0, {consumidores})")
+        self.nome = nome
+        self.consumidor = consumidor
+        self.tamanho = (largura, altura)
+        self._mapear(self.posicoes, altura, largura, consumidores)
+        self.lidos = int(self._lidos[consumidor])
+        self._prontos[consumidor] = 1
+
+    def processar(self, funcao):
+        # Chama funcao(indice, tempo, repeticoes, quadro) para cada quadro
+        # publicado, em ordem, até o exportador fechar. O quadro é uma vista do
+        # anel: vale só durante a chamada (copie se precisar guardar).
+        controle = self._controle
+        while True:
+            if controle[0] <= self.lidos:
+                if controle[1] and controle[0] <= self.lidos:
+                    return self.lidos
+                time.sleep(ESPERA)
+                continue
+            posicao = self.lidos % self.posicoes
+            funcao(int(self._indices[posicao]), float(self._tempos[posicao]),
+                   int(self._repeticoes[posicao]), self._quadros[posicao])
+            self.lidos += 1
+            self._lidos[self.consumidor] = self.lidos
+
+    def fechar(self):
+        self._liberar_vistas()
+        self._memoria.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+# ---------------------------------------------------------------------------
+# Consumidores (rodam em outro processo: ExportadorQuadros.iniciar)
+# ---------------------------------------------------------------------------
+
+def codificar_mp4(nome, consumidor, caminho, fps, codec="mp4v"):
+    import cv2
+
+    with LeitorQuadros(nome, consumidor) as leitor:
+        writer = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*codec), fps, leitor.tamanho)
+
+        def escrever(indice, tempo, repeticoes, quadro):
+            for _ in range(repeticoes):
+                writer.write(quadro)
+
+        try:
+            leitor.processar(escrever)
+        finally:
+            writer.release()
+
+def codificar_gif(nome, consumidor, caminho, fps, fps_saida=10, largura=320):
+    from comum.gif import GravadorGif
+
+    with LeitorQuadros(nome, consumidor) as leitor, \
+            GravadorGif(caminho, fps_entrada=fps, fps_saida=fps_saida, largura=largura) as gif:
+
+        def adicionar(indice, tempo, repeticoes, quadro):
+            for _ in range(repeticoes):
+                gif.adicionar(quadro)
+
+        leitor.processar(adicionar)
+
+def arquivar_miniaturas(nome, consumidor, caminho, intervalo=1.0, largura=160, qualidade=85):
+    # Um JPEG reduzido a cada intervalo segundos simulados, num arquivo ZIP
+    import cv2
+
+    proxima = [0.0]
+    with LeitorQuadros(nome, consumidor) as leitor, zipfile.ZipFile(caminho, "w") as arquivo:
+        largura_original, altura_original = leitor.tamanho
+        largura = min(largura, largura_original)
+        tamanho = (largura, max(1, round(altura_original * largura / largura_original)))
+
+        def arquivar(indice, tempo, repeticoes, quadro):
+            if tempo + 1e-9 < proxima[0]:
+                return
+            proxima[0] = tempo + intervalo
+            reduzido = cv2.resize(quadro, tamanho, interpolation=cv2.INTER_AREA)
+            _, jpeg = cv2.imencode(".jpg", reduzido, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+            arquivo.writestr(f"quadro_{indice:06d}_{tempo:09.3f}s.jpg", jpeg.tobytes())
+
+        leitor.processar(arquivar)
@@ -0,0 +1,261 @@
+import struct
+
+# Junção de arquivos MP4 sem recodificar: lê as tabelas de amostras de cada
+# segmento (tamanho, posição, duração e quadros-chave), copia os dados
+# codificados para um único mdat e monta um moov novo a partir do moov do
+# primeiro segmento. Os segmentos precisam ter uma única trilha de vídeo com
+# a mesma configuração do codificador, como os gravados pelo cv2.VideoWriter
+# com os mesmos tamanho, fps e codec.
+
+# Caixas que só contêm outras caixas
+_CONTEINERES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"dinf", b"edts"}
+_TABELAS = {b"stts", b"stss", b"stsc", b"stsz", b"stco", b"co64", b"ctts"}
+
+def _caixas(dados, inicio=0, fim=None):
+    # Gera (tipo, início do conteúdo, fim da caixa) de cada caixa em dados[inicio:fim]
+    fim = len(dados) if fim is None else fim
+    posicao = inicio
+    while posicao + 8 <= fim:
+        tamanho, tipo = struct.unpack(">I4s", dados[posicao:posicao + 8])
+        cabecalho = 8
+        if tamanho == 1:
+            tamanho = struct.unpack(">Q", dados[posicao + 8:posicao + 16])[0]
+            cabecalho = 16
+        elif tamanho == 0:
+            tamanho = fim - posicao
+        yield tipo, posicao + cabecalho, posicao + tamanho
+        posicao += tamanho
+
+def _caixa(tipo, conteudo):
+    if len(conteudo) + 8 > 0xFFFFFFFF:
+        return struct.pack(">I4sQ", 1, tipo, len(conteudo) + 16) + conteudo
+    return struct.pack(">I4s", len(conteudo) + 8, tipo) + conteudo
+
+def _achar(dados, caminho, inicio=0, fim=None):
+    # Conteúdo (início, fim) da caixa no caminho dado, ex.: [b"moov", b"trak"]
+    for tipo, comeco, final in _caixas(dados, inicio, fim):
+        if tipo == caminho[0]:
+            if len(caminho) == 1:
+                return comeco, final
+            return _achar(dados, caminho[1:], comeco, final)
+    raise ValueError(f"Caixa {b'/'.join(caminho).decode()} não encontrada")
+
+def _entradas(dados, inicio, formato):
+    # Lê a lista de entradas de uma caixa de tabela (versão/flags + contagem)
+    (quantidade,) = struct.unpack(">I", dados[inicio + 4:inicio + 8])
+    tamanho = struct.calcsize(formato)
+    return [struct.unpack(formato, dados[inicio + 8 + i * tamanho:inicio + 8 + (i + 1) * tamanho])
+            for i in range(quantidade)]
+
+def _descritor(dados, posicao):
+    # Descritor MPEG-4 (tag, tamanho variável): retorna (tag, início, fim)
+    tag = dados[posicao]
+    tamanho = 0
+    posicao += 1
+    while True:
+        byte = dados[posicao]
+        posicao += 1
+        tamanho = (tamanho << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return tag, posicao, posicao + tamanho
+
+def _configuracao(stsd):
+    # O que precisa ser igual entre segmentos: a entrada de amostra (codec,
+    # largura, altura...) e os dados de configuração do decodificador. As
+    # taxas de bits do esds e a caixa btrt são só estatísticas e variam.
+    entrada = stsd[8:]
+    (tamanho,) = struct.unpack(">I", entrada[:4])
+    entrada = entrada[:tamanho]
+    chave = [entrada[4:8 + 78]]
+    for tipo, comeco, final in _caixas(entrada, 8 + 78):
+        if tipo == b"btrt":
+            continue
+        if tipo == b"esds":
+            tag, inicio, fim = _descritor(entrada, comeco + 4)  # ES_Descriptor
+            flags = entrada[inicio + 2]
+            posicao = inicio + 3
+            if flags & 0x80:
+                posicao += 2
+            if flags & 0x40:
+                posicao += 1 + entrada[posicao]
+            if flags & 0x20:
+                posicao += 2
+            tag, inicio, fim = _descritor(entrada, posicao)  # DecoderConfigDescriptor
+            chave.append(entrada[inicio:inicio + 2])  # tipo do objeto e do fluxo
+            if inicio + 13 < fim:
+                tag, inicio, fim = _descritor(entrada, inicio + 13)  # DecoderSpecificInfo
+                chave.append(entrada[inicio:fim])
+            continue
+        chave.append(entrada[comeco - 8:final])
+    return b"".join(chave)
+
+def ler_amostras(caminho):
+    """
+    Lê um MP4 de uma trilha e retorna um dicionário com o conteúdo do arquivo,
+    o stsd e as listas de posição, tamanho, duração e quadro-chave de cada amostra.
+    """
+    with open(caminho, "rb") as arquivo:
+        dados = arquivo.read()
+    stbl = _achar(dados, [b"moov", b"trak", b"mdia", b"minf", b"stbl"])
+    mdhd = _achar(dados, [b"moov", b"trak", b"mdia", b"mdhd"])
+    caixas = {tipo: (comeco, final) for tipo, comeco, final in _caixas(dados, *stbl)}
+    if b"ctts" in caixas:
+        raise ValueError(f"'{caminho}': quadros B (ctts) não são suportados")
+
+    inicio, _ = caixas[b"stsz"]
+    tamanho_fixo, quantidade = struct.unpack(">II", dados[inicio + 4:inicio + 12])
+    if tamanho_fixo:
+        tamanhos = [tamanho_fixo] * quantidade
+    else:
+        tamanhos = list(struct.unpack(f">{quantidade}I", dados[inicio + 12:inicio + 12 + 4 * quantidade]))
+
+    if b"co64" in caixas:
+        blocos = [o for (o,) in _entradas(dados, caixas[b"co64"][0], ">Q")]
+    else:
+        blocos = [o for (o,) in _entradas(dados, caixas[b"stco"][0], ">I")]
+
+    # stsc: (primeiro bloco, amostras por bloco, descrição), valendo até a próxima entrada
+    stsc = _entradas(dados, caixas[b"stsc"][0], ">III")
+    posicoes = []
+    amostra = 0
+    for i, (primeiro, por_bloco, _) in enumerate(stsc):
+        ultimo = stsc[i + 1][0] - 1 if i + 1 < len(stsc) else len(blocos)
+        for bloco in range(primeiro - 1, ultimo):
+            posicao = blocos[bloco]
+            for _ in range(por_bloco):
+                posicoes.append(posicao)
+                posicao += tamanhos[amostra]
+                amostra += 1
+
+    duracoes = []
+    for contagem, delta in _entradas(dados, caixas[b"stts"][0], ">II"):
+        duracoes.extend([delta] * contagem)
+
+    if b"stss" in caixas:
+        chaves = {n - 1 for (n,) in _entradas(dados, caixas[b"stss"][0], ">I")}
+    else:
+        chaves = set(range(quantidade))
+
+    versao = dados[mdhd[0]]
+    escala = struct.unpack(">I", dados[mdhd[0] + (20 if versao == 1 else 12):][:4])[0]
+    return {
+        "dados": dados,
+        "stsd": dados[slice(*caixas[b"stsd"])],
+        "escala": escala,
+        "posicoes": posicoes,
+        "tamanhos": tamanhos,
+        "duracoes": duracoes,
+        "chaves": [i in chaves for i in range(quantidade)],
+    }
+
+def _com_duracao(tipo, conteudo, duracao):
+    # Reescreve o campo de duração de mvhd, tkhd ou mdhd (versão 0 ou 1)
+    versao = conteudo[0]
+    if tipo == b"tkhd":
+        posicao, formato = (28, ">Q") if versao == 1 else (20, ">I")
+    else:
+        posicao, formato = (24, ">Q") if versao == 1 else (16, ">I")
+    if formato == ">I" and duracao > 0xFFFFFFFF:
+        raise ValueError("Duração grande demais para a caixa versão 0")
+    return conteudo[:posicao] + struct.pack(formato, duracao) + conteudo[posicao + struct.calcsize(formato):]
+
+def _elst(conteudo, duracao):
+    # Lista de edição de uma entrada: só ajusta a duração do trecho
+    versao = conteudo[0]
+    (quantidade,) = struct.unpack(">I", conteudo[4:8])
+    if quantidade != 1:
+        return conteudo
+    formato = ">Q" if versao == 1 else ">I"
+    return conteudo[:8] + struct.pack(formato, duracao) + conteudo[8 + struct.calcsize(formato):]
+
+def _tabelas(tamanhos, duracoes, chaves, posicao_mdat):
+    # Tabelas de amostras do arquivo final: um único bloco com tudo
+    stts = []
+    for delta in duracoes:
+        if stts and stts[-1][1] == delta:
+            stts[-1][0] += 1
+        else:
+            stts.append([1, delta])
+    indices_chave = [i + 1 for i, chave in enumerate(chaves) if chave]
+    return [
+        _caixa(b"stts", struct.pack(">II", 0, len(stts)) + b"".join(struct.pack(">II", *e) for e in stts)),
+        _caixa(b"stss", struct.pack(">II", 0, len(indices_chave))
+               + struct.pack(f">{len(indices_chave)}I", *indices_chave)),
+        _caixa(b"stsc", struct.pack(">IIIII", 0, 1, 1, len(tamanhos), 1)),
+        _caixa(b"stsz", struct.pack(">III", 0, 0, len(tamanhos)) + struct.pack(f">{len(tamanhos)}I", *tamanhos)),
+        _caixa(b"co64", struct.pack(">IIQ", 0, 1, posicao_mdat)),
+    ]
+
+def _reconstruir(dados, inicio, fim, substituir):
+    # Copia as caixas de dados[inicio:fim], reconstruindo os contêineres e
+    # trocando o conteúdo das caixas que substituir(tipo, conteudo) alterar
+    saida = []
+    for tipo, comeco, final in _caixas(dados, inicio, fim):
+        if tipo in _CONTEINERES:
+            conteudo = _reconstruir(dados, comeco, final, substituir)
+            if tipo == b"stbl":
+                conteudo = b"".join(c for c in conteudo if c[4:8] not in _TABELAS)
+                conteudo = [conteudo] + substituir(b"tabelas", None)
+            saida.append(_caixa(tipo, b"".join(conteudo)))
+        else:
+            novo = substituir(tipo, dados[comeco:final])
+            if novo is not None:
+                saida.append(_caixa(tipo, novo))
+    return saida
+
+def concatenar_mp4(segmentos, caminho_saida):
+    """
+    Junta os MP4 em segmentos, na ordem, em caminho_saida, copiando os
+    quadros já codificados. Retorna o número de quadros do arquivo final.
+    """
+    if not segmentos:
+        raise ValueError("Nenhum segmento para juntar")
+    primeiro = ler_amostras(segmentos[0])
+    dados = primeiro["dados"]
+    tamanhos, duracoes, chaves = [], [], []
+
+    ftyp = dados[slice(*_achar(dados, [b"ftyp"]))]
+    with open(caminho_saida, "wb") as saida:
+        saida.write(_caixa(b"ftyp", ftyp))
+        # mdat com tamanho de 64 bits, preenchido no fim
+        posicao_mdat_caixa = saida.tell()
+        saida.write(struct.pack(">I4sQ", 1, b"mdat", 0))
+        posicao_mdat = saida.tell()
+
+        for caminho in segmentos:
+            segmento = primeiro if caminho == segmentos[0] else ler_amostras(caminho)
+            if (_configuracao(segmento["stsd"]) != _configuracao(primeiro["stsd"])
+                    or segmento["escala"] != primeiro["escala"]):
+                raise ValueError(f"'{caminho}' foi codificado com outra configuração")
+            conteudo = segmento["dados"]
+            for posicao, tamanho in zip(segmento["posicoes"], segmento["tamanhos"]):
+                saida.write(conteudo[posicao:posicao + tamanho])
+            tamanhos.extend(segmento["tamanhos"])
+            duracoes.extend(segmento["duracoes"])
+            chaves.extend(segmento["chaves"])
+            del segmento, conteudo
+
+        fim_mdat = saida.tell()
+        saida.seek(posicao_mdat_caixa + 8)
+        saida.write(struct.pack(">Q", fim_mdat - posicao_mdat_caixa))
+        saida.seek(fim_mdat)
+
+        mvhd = dados[slice(*_achar(dados, [b"moov", b"mvhd"]))]
+        escala_filme = struct.unpack(">I", mvhd[20 if mvhd[0] == 1 else 12:][:4])[0]
+        duracao_midia = sum(duracoes)
+        duracao_filme = duracao_midia * escala_filme // primeiro["escala"]
+
+        def substituir(tipo, conteudo):
+            if tipo == b"tabelas":
+                return _tabelas(tamanhos, duracoes, chaves, posicao_mdat)
+            if tipo in (b"mvhd", b"tkhd"):
+                return _com_duracao(tipo, conteudo, duracao_filme)
+            if tipo == b"mdhd":
+                return _com_duracao(tipo, conteudo, duracao_midia)
+            if tipo == b"elst":
+                return _elst(conteudo, duracao_filme)
+            return conteudo
+
+        moov = _achar(dados, [b"moov"])
+        saida.write(_caixa(b"moov", b"".join(_reconstruir(dados, moov[0], moov[1], substituir))))
+    return len(tamanhos)
@@ -0,0 +1,61 @@
+import pygame
+
+# Painel de perfil sobre a tela: p50 e p99 de cada fase na janela recente do
+# Cronometro, e do quadro inteiro. O texto só é refeito a cada intervalo
+# quadros; nos outros o painel pronto é apenas copiado para a tela.
+#
+# Deve ser desenhado depois da captura, para não aparecer no vídeo, e antes
+# de apresentar, registrando a área retornada nos retângulos sujos para que
+# ela seja apagada no quadro seguinte.
+TECLA = pygame.K_F3
+COR = (255, 255, 0)
+
+class PainelPerfil:
+    def __init__(self, cronometro, visivel=False, intervalo=30, posicao=(8, 8), tamanho_fonte=16):
+        self.cronometro = cronometro
+        self.visivel = visivel
+        self.intervalo = intervalo
+        self.posicao = posicao
+        self._fonte = pygame.font.Font(None, tamanho_fonte)
+        self._imagem = None
+        self._contador = 0
+
+    def processar(self, evento):
+        # F3 mostra ou esconde o painel
+        if evento.type == pygame.KEYDOWN and evento.key == TECLA:
+            self.visivel = not self.visivel
+            self._imagem = None
+
+    def desenhar(self, superficie):
+        # Retorna a área ocupada (vazia com o painel escondido)
+        if not self.visivel or not self.cronometro.ativo:
+            return pygame.Rect(self.posicao, (0, 0))
+        self._contador += 1
+        if self._imagem is None or self._contador >= self.intervalo:
+            self._imagem = self._montar()
+            self._contador = 0
+        return superficie.blit(self._imagem, self.posicao)
+
+    def _montar(self):
+        linhas = [("fase", "p50", "p99")]
+        historicos = list(self.cronometro.historicos.items())
+        if self.cronometro.quadro.total:
+            historicos.append(("quadro", self.cronometro.quadro))
+        for fase, historico in historicos:
+            p50, p99 = historico.percentis([50, 99])
+            linhas.append((fase, f"{p50 * 1000:.2f}", f"{p99 * 1000:.2f}"))
+
+        # A fonte é proporcional: cada campo é renderizado à parte, com os
+        # números alinhados à direita da sua coluna
+        coluna_nome = self._fonte.size("apresentacao ")[0]
+        coluna_numero = self._fonte.size(" 000.00")[0]
+        altura_linha = self._fonte.get_linesize()
+        painel = pygame.Surface((coluna_nome + 2 * coluna_numero + 8, altura_linha * len(linhas) + 8))
+        painel.fill((20, 20, 20))
+        for numero, (fase, *valores) in enumerate(linhas):
+            y = 4 + numero * altura_linha
+            painel.blit(self._fonte.render(fase, True, COR), (4, y))
+            for coluna, valor in enumerate(valores, 1):
+                texto = self._fonte.render(valor, True, COR)
+                painel.blit(texto, (4 + coluna_nome + coluna * coluna_numero - texto.get_width(), y))
+        return painel
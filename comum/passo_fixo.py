@@ -0,0 +1,62 @@
+# Física com passo fixo e acumulador de tempo: o tempo real de cada quadro
+# entra no acumulador e a física avança em passos de tamanho fixo enquanto
+# houver tempo acumulado. O resultado da simulação depende só do número de
+# passos, não da taxa de quadros nem das suas variações, e o custo por
+# segundo simulado é sempre o mesmo.
+#
+# O que sobra no acumulador (menos de um passo) é usado para desenhar: a
+# posição mostrada é interpolada entre os dois últimos estados da física com
+# o fator alfa, então o movimento fica suave mesmo que a tela e a física
+# rodem em taxas diferentes.
+class PassoFixo:
+    def __init__(self, dt, max_passos=8):
+        if dt <= 0:
+            raise ValueError("O passo de física deve ser positivo")
+        if max_passos < 1:
+            raise ValueError("max_passos deve ser pelo menos 1")
+        self.dt = dt
+        self.max_passos = max_passos
+        self.acumulado = 0.0
+        self.tempo = 0.0       # Tempo simulado
+        self.passos = 0        # Passos de física executados
+        self.descartado = 0.0  # Tempo real jogado fora pela proteção abaixo
+
+    @classmethod
+    def por_quadro(cls, fps, subpassos=1, max_quadros=3):
+        # subpassos passos de física por quadro de 1/fps segundos; num quadro
+        # atrasado roda no máximo o equivalente a max_quadros quadros
+        return cls(1.0 / (fps * subpassos), max_passos=subpassos * max_quadros)
+
+    def avancar(self, dt_real):
+        # Acumula o tempo real do quadro e retorna quantos passos rodar agora
+        self.acumulado += dt_real
+        # A tolerância evita perder um passo por arredondamento (1/30 não é
+        # exatamente 4 vezes 1/120 em ponto flutuante)
+        passos = int(self.acumulado / self.dt + 1e-6)
+        if passos > self.max_passos:
+            # Proteção contra a "espiral da morte": se a física não acompanha
+            # o relógio, cada quadro demora mais e pede ainda mais passos. O
+            # excesso é descartado; a simulação fica mais lenta que o tempo
+            # real por um instante, mas o jogo não trava.
+            excesso = passos - self.max_passos
+            self.descartado += excesso * self.dt
+            self.acumulado -= excesso * self.dt
+            passos = self.max_passos
+        self.acumulado = max(0.0, self.acumulado - passos * self.dt)
+        self.tempo += passos * self.dt
+        self.passos += passos
+        return passos
+
+    @property
+    def alfa(self):
+        # Fração do próximo passo já decorrida, em [0, 1)
+        return min(self.acumulado / self.dt, 1.0)
+
+    def estatisticas(self):
+        return {"dt": self.dt, "passos": self.passos, "tempo_simulado": self.tempo,
+                "descartado": self.descartado}
+
+def interpolar(anterior, atual, alfa):
+    # Estado desenhado entre o penúltimo e o último passo da física (números,
+    # ou vetores que aceitam soma e multiplicação, como Vec2d e Vector2)
+    return anterior + (atual - anterior) * alfa
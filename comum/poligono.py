@@ -0,0 +1,140 @@
+import bisect
+import math
+
+# Contêiner poligonal convexo para a colisão de bolas por dentro, no
+# referencial do polígono (origem no centro, sem rotação): quem usa
+# rotaciona a bola para lá uma vez e a resposta de volta. O quadrado é o
+# caso de 4 lados.
+#
+# Os dados de cada lado são calculados uma vez: normal para dentro,
+# distância da origem à reta do lado, ponto médio, direção e meia extensão.
+# O teste de uma bola evita percorrer todos os lados:
+#   - dentro do círculo inscrito menos o raio, nenhum lado a alcança;
+#   - senão, um ponto da borda a menos de raio da bola está, visto da origem,
+#     a no máximo asin(raio / |p|) da direção dela. Os vértices estão em ordem
+#     de ângulo, então o lado nessa direção sai de uma busca binária e só os
+#     vizinhos dentro dessa abertura são testados;
+#   - em cada um, a distância à reta do lado (suporte) descarta o lado antes
+#     do cálculo do ponto mais próximo no segmento.
+# O custo por bola depende de quantos lados cabem na abertura, não do total
+# de lados.
+#
+# A regra de contato é a de gemini/game.py: a bola cruza a reta do lado
+# (distância ao longo da normal menor que o raio) e está a menos de raio do
+# segmento; vale o lado de maior penetração.
+class PoligonoConvexo:
+    def __init__(self, vertices):
+        if len(vertices) < 3:
+            raise ValueError("O polígono precisa de pelo menos 3 vértices")
+        # Em ordem crescente de ângulo em torno da origem (sentido anti-horário)
+        vertices = sorted(((float(x), float(y)) for x, y in vertices), key=lambda v: math.atan2(v[1], v[0]))
+        self.vertices = vertices
+        self.angulos = [math.atan2(y, x) for x, y in vertices]
+        self.normais = []          # Normal unitária, para dentro
+        self.distancias = []       # Distância da origem à reta do lado
+        self.centros = []          # Ponto médio do lado
+        self.tangentes = []        # Direção unitária do lado
+        self.meias_extensoes = []  # Meio comprimento do lado
+
+        quantidade = len(vertices)
+        for k in range(quantidade):
+            (ax, ay), (bx, by) = vertices[k], vertices[(k + 1) % quantidade]
+            comprimento = math.hypot(bx - ax, by - ay)
+            if comprimento == 0:
+                raise ValueError("O polígono tem vértices repetidos")
+            tx, ty = (bx - ax) / comprimento, (by - ay) / comprimento
+            # À esquerda de cada lado fica o interior (sentido anti-horário)
+            nx, ny = -ty, tx
+            distancia = -(nx * ax + ny * ay)
+            if distancia <= 0:
+                raise ValueError("A origem precisa estar dentro do polígono")
+            self.normais.append((nx, ny))
+            self.distancias.append(distancia)
+            self.centros.append(((ax + bx) / 2, (ay + by) / 2))
+            self.tangentes.append((tx, ty))
+            self.meias_extensoes.append(comprimento / 2)
+
+        for k in range(quantidade):
+            (tx, ty), (ux, uy) = self.tangentes[k], self.tangentes[(k + 1) % quantidade]
+            if tx * uy - ty * ux < -1e-12:
+                raise ValueError("O polígono precisa ser convexo")
+
+        # Ângulos dos vértices na volta anterior, nesta e na seguinte: o
+        # vértice k (de -n a 2n - 1) fica em _voltas[k + n]
+        self._voltas = ([a - 2 * math.pi for a in self.angulos] + self.angulos +
+                        [a + 2 * math.pi for a in self.angulos])
+        self.raio_inscrito = min(self.distancias)
+        self.raio_circunscrito = max(math.hypot(x, y) for x, y in vertices)
+
+    @classmethod
+    def regular(cls, lados, raio, angulo=0.0):
+        # Polígono regular com os vértices a raio da origem, o primeiro no
+        # ângulo dado (radianos)
+        return cls([(raio * math.cos(angulo + 2 * math.pi * k / lados),
+                     raio * math.sin(angulo + 2 * math.pi * k / lados)) for k in range(lados)])
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def _profundidade(self, k, x, y, raio):
+        # Penetração da bola no lado k, ou -1 se ela não o alcança
+        nx, ny = self.normais[k]
+        suporte = nx * x + ny * y + self.distancias[k]
+        if suporte >= raio:
+            return -1.0
+        cx, cy = self.centros[k]
+        tx, ty = self.tangentes[k]
+        meia = self.meias_extensoes[k]
+        t = (x - cx) * tx + (y - cy) * ty
+        if t > meia:
+            t = meia
+        elif t < -meia:
+            t = -meia
+        dx, dy = x - cx - t * tx, y - cy - t * ty
+        distancia_quadrada = dx * dx + dy * dy
+        # O limite inferior evita problemas com ponto flutuante (bola sobre a borda)
+        if 1e-10 < distancia_quadrada < raio * raio:
+            return raio - suporte
+        return -1.0
+
+    def contato(self, x, y, raio):
+        # Contato da bola de centro (x, y) (no referencial do polígono) com a
+        # borda: (profundidade, nx, ny) do lado mais penetrado, com a normal
+        # para dentro, ou None
+        distancia_quadrada = x * x + y * y
+        limite = self.raio_inscrito - raio
+        if limite > 0 and distancia_quadrada < limite * limite:
+            return None
+
+        quantidade = len(self.vertices)
+        distancia = math.sqrt(distancia_quadrada)
+        melhor, lado = 0.0, -1
+        if distancia <= raio:
+            # Bola sobre o centro (polígono menor que ela): todos os lados
+            for k in range(quantidade):
+                profundidade = self._profundidade(k, x, y, raio)
+                if profundidade > melhor:
+                    melhor, lado = profundidade, k
+        else:
+            direcao = math.atan2(y, x)
+            abertura = math.asin(raio / distancia)
+            # Lado que contém a direção da bola (índice -1: o que fecha a volta)
+            inicio = bisect.bisect_right(self.angulos, direcao) - 1
+            voltas = self._voltas
+            k = inicio
+            while k < inicio + quantidade and voltas[k + quantidade] <= direcao + abertura:
+                profundidade = self._profundidade(k % quantidade, x, y, raio)
+                if profundidade > melhor:
+                    melhor, lado = profundidade, k % quantidade
+                k += 1
+            k = inicio - 1
+            while k > inicio - quantidade and voltas[k + 1 + quantidade] >= direcao - abertura:
+                profundidade = self._profundidade(k % quantidade, x, y, raio)
+                if profundidade > melhor:
+                    melhor, lado = profundidade, k % quantidade
+                k -= 1
+
+        if lado < 0:
+            return None
+        nx, ny = self.normais[lado]
+        return melhor, nx, ny
@@ -0,0 +1,86 @@
+import json
+import struct
+
+import numpy as np
+
+# Registro binário do estado de cada passo: em vez de guardar ~1,4 MB de
+# pixels por quadro, guarda 32 bytes (ângulo do quadrado, posição, velocidade
+# e cor da bola e se houve colisão). O vídeo pode ser gerado depois, só do
+# trecho desejado, com reproduzir.py.
+#
+# Formato do arquivo: MAGICO, tamanho do cabeçalho (uint32), cabeçalho JSON
+# com os metadados da cena e o dtype, e em seguida os registros em sequência.
+MAGICO = b"QBOL1\n"
+
+ESTADO = np.dtype([
+    ("tempo", "<f8"),      # segundos desde o início
+    ("angulo", "<f4"),     # ângulo do quadrado na tela, em graus
+    ("x", "<f4"),          # posição da bola na tela
+    ("y", "<f4"),
+    ("velocidade_x", "<f4"),
+    ("velocidade_y", "<f4"),
+    ("cor", "u1", (3,)),   # cor da bola (RGB)
+    ("colisao", "u1"),     # 1 se a bola trocou de cor (colidiu) neste passo
+])
+
+class GravadorEstado:
+    def __init__(self, caminho, metadados, tamanho_bloco=4096):
+        # metadados: dicionário serializável em JSON que descreve a cena
+        # (tamanho da tela, centro e vértices do quadrado, raio da bola...)
+        self.caminho = caminho
+        self._arquivo = open(caminho, "wb")
+        cabecalho = json.dumps(dict(metadados, dtype=ESTADO.descr)).encode()
+        self._arquivo.write(MAGICO + struct.pack("<I", len(cabecalho)) + cabecalho)
+
+        # Os registros são acumulados num bloco pré-alocado e escritos de uma vez
+        self._bloco = np.zeros(tamanho_bloco, dtype=ESTADO)
+        self._usados = 0
+        self.registrados = 0
+        self._cor_anterior = None
+
+    def registrar(self, tempo, angulo, x, y, velocidade_x, velocidade_y, cor):
+        # A cor da bola muda a cada colisão em todas as implementações, então
+        # a troca de cor marca o passo como colisão
+        cor = tuple(cor)[:3]
+        colisao = self._cor_anterior is not None and cor != self._cor_anterior
+        self._bloco[self._usados] = (tempo, angulo, x, y, velocidade_x, velocidade_y, cor, colisao)
+        self._cor_anterior = cor
+
+        self._usados += 1
+        self.registrados += 1
+        if self._usados == len(self._bloco):
+            self._descarregar()
+
+    def _descarregar(self):
+        self._arquivo.write(self._bloco[:self._usados].tobytes())
+        self._usados = 0
+
+    def fechar(self):
+        if self._arquivo.closed:
+            return
+        self._descarregar()
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+def ler_estado(caminho):
+    # Retorna (metadados, registros); os registros são um memmap somente
+    # leitura, então abrir um arquivo grande não carrega tudo na memória
+    with open(caminho, "rb") as arquivo:
+        if arquivo.read(len(MAGICO)) != MAGICO:
+            raise ValueError(f"'{caminho}' não é um registro de estado")
+        (tamanho,) = struct.unpack("<I", arquivo.read(4))
+        metadados = json.loads(arquivo.read(tamanho))
+        inicio = arquivo.tell()
+        arquivo.seek(0, 2)
+        vazio = arquivo.tell() == inicio
+    dtype = np.dtype([tuple(tuple(c) if isinstance(c, list) else c for c in campo)
+                      for campo in metadados.pop("dtype")])
+    if vazio:
+        return metadados, np.zeros(0, dtype=dtype)
+    registros = np.memmap(caminho, dtype=dtype, mode="r", offset=inicio)
+    return metadados, registros
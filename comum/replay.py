@@ -0,0 +1,105 @@
+import threading
+
+import cv2
+import numpy as np
+
+from comum.gif import GravadorGif
+
+# "Replay instantâneo": guarda só os últimos segundos de jogo num buffer
+# circular de quadros reduzidos, pré-alocado. A memória usada é fixa, não
+# importa quanto tempo a sessão dure.
+class BufferReplay:
+    def __init__(self, segundos, fps_entrada, fps_saida=30, tamanho=(320, 240)):
+        if segundos <= 0 or fps_entrada <= 0 or fps_saida <= 0:
+            raise ValueError("Duração e taxas de quadros devem ser positivas")
+        self.fps_entrada = fps_entrada
+        self.fps_saida = min(fps_saida, fps_entrada)
+        self.tamanho = tamanho
+        self.capacidade = max(1, int(round(segundos * self.fps_saida)))
+
+        largura, altura = tamanho
+        self._quadros = np.empty((self.capacidade, altura, largura, 3), dtype=np.uint8)
+        self._inicio = 0
+        self._quantidade = 0
+        self._acumulado = float(fps_entrada)
+
+        self._salvamento = None
+
+    @property
+    def bytes_usados(self):
+        return self._quadros.nbytes
+
+    def __len__(self):
+        return self._quantidade
+
+    def limpar(self):
+        self._inicio = 0
+        self._quantidade = 0
+        self._acumulado = float(self.fps_entrada)
+
+    def adicionar(self, quadro):
+        # Recebe quadros (altura, largura, BGR) a fps_entrada e guarda só os
+        # necessários para fps_saida, reduzidos direto no slot do buffer
+        if self._acumulado < self.fps_entrada:
+            self._acumulado += self.fps_saida
+            return False
+        self._acumulado += self.fps_saida - self.fps_entrada
+
+        if self._quantidade < self.capacidade:
+            slot = (self._inicio + self._quantidade) % self.capacidade
+            self._quantidade += 1
+        else:
+            # Buffer cheio: sobrescreve o quadro mais antigo
+            slot = self._inicio
+            self._inicio = (self._inicio + 1) % self.capacidade
+
+        cv2.resize(quadro, self.tamanho, dst=self._quadros[slot], interpolation=cv2.INTER_AREA)
+        return True
+
+    def instantaneo(self):
+        # Cópia dos quadros guardados, do mais antigo para o mais recente
+        indices = (self._inicio + np.arange(self._quantidade)) % self.capacidade
+        return self._quadros[indices]
+
+    @property
+    def salvando(self):
+        return self._salvamento is not None and self._salvamento.is_alive()
+
+    def salvar(self, caminho_mp4=None, caminho_gif=None, fps_gif=10):
+        # Copia o conteúdo atual e grava em outra thread, sem pausar o jogo.
+        # Retorna False se ainda houver um salvamento em andamento.
+        if self.salvando:
+            return False
+        quadros = self.instantaneo()
+        self._salvamento = threading.Thread(
+            target=_gravar_quadros,
+            args=(quadros, self.fps_saida, caminho_mp4, caminho_gif, fps_gif),
+            name="salvar-replay",
+            daemon=True,
+        )
+        self._salvamento.start()
+        return True
+
+    def aguardar(self):
+        if self._salvamento is not None:
+            self._salvamento.join()
+
+def _gravar_quadros(quadros, fps, caminho_mp4, caminho_gif, fps_gif):
+    if len(quadros) == 0:
+        print("Replay vazio, nada para salvar.")
+        return
+    altura, largura = quadros.shape[1:3]
+
+    if caminho_mp4:
+        writer = cv2.VideoWriter(caminho_mp4, cv2.VideoWriter_fourcc(*"mp4v"), fps, (largura, altura))
+        for quadro in quadros:
+            writer.write(quadro)
+        writer.release()
+
+    if caminho_gif:
+        with GravadorGif(caminho_gif, fps_entrada=fps, fps_saida=fps_gif, largura=largura) as gif:
+            for quadro in quadros:
+                gif.adicionar(quadro)
+
+    salvos = " e ".join(f"'{c}'" for c in (caminho_mp4, caminho_gif) if c)
+    print(f"Replay de {len(quadros) / fps:.1f}s salvo como {salvos}")
@@ -0,0 +1,65 @@
+import pygame
+
+# Renderização por retângulos sujos: em vez de preencher a tela inteira e
+# chamar display.flip() todo quadro, apaga só as áreas desenhadas no quadro
+# anterior, redesenha os objetos e envia para a janela apenas a união das
+# áreas antigas e novas com display.update(retangulos).
+class RetangulosSujos:
+    def __init__(self, superficie, fundo, ativo=True):
+        self.superficie = superficie
+        self.fundo = fundo
+        self.ativo = ativo
+        self._anteriores = []
+        self._atuais = []
+        self._tela_inteira = superficie.get_rect()
+        # O primeiro quadro sempre limpa e envia a tela toda
+        self._completo = True
+
+    def invalidar(self):
+        # Força o próximo quadro a ser completo (ex.: janela redimensionada)
+        self._completo = True
+
+    def limpar(self):
+        if not self.ativo or self._completo:
+            self.superficie.fill(self.fundo)
+        else:
+            for retangulo in self._anteriores:
+                self.superficie.fill(self.fundo, retangulo)
+
+    def registrar(self, retangulo):
+        # Guarda a área retornada por pygame.draw.* (ou outra já calculada)
+        if retangulo:
+            self._atuais.append(pygame.Rect(retangulo))
+        return retangulo
+
+    def areas_alteradas(self):
+        # Áreas que mudaram neste quadro (None se foi a tela inteira)
+        if not self.ativo or self._completo:
+            return None
+        return _juntar([r.clip(self._tela_inteira) for r in self._anteriores + self._atuais])
+
+    def apresentar(self):
+        # Envia o quadro para a janela e retorna as áreas alteradas
+        sujos = self.areas_alteradas()
+        if sujos is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(sujos)
+        self._anteriores = self._atuais
+        self._atuais = []
+        self._completo = False
+        return sujos
+
+def _juntar(retangulos):
+    # Junta retângulos que se sobrepõem (a posição antiga e a nova de um objeto
+    # quase sempre se sobrepõem), para não limpar nem copiar a mesma área duas vezes
+    juntos = []
+    for retangulo in retangulos:
+        if not retangulo:
+            continue
+        indice = retangulo.collidelist(juntos)
+        while indice != -1:
+            retangulo = retangulo.union(juntos.pop(indice))
+            indice = retangulo.collidelist(juntos)
+        juntos.append(retangulo)
+    return juntos
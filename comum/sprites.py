@@ -0,0 +1,86 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+# Cache de sprites de polígonos rotacionados: em vez de rasterizar o contorno
+# girado a cada quadro, desenha o polígono uma vez por ângulo quantizado
+# (múltiplos de passo graus) e depois só faz blit. O ângulo é reduzido ao
+# período de simetria do polígono (90 graus para o quadrado), então um giro
+# contínuo reutiliza sempre os mesmos sprites.
+#
+# Um único cache atende polígonos de qualquer tamanho, cor e espessura de
+# borda; a chave inclui tudo isso. Quando passa de capacidade sprites, o usado
+# há mais tempo é descartado (LRU). Para um giro contínuo a capacidade deve
+# cobrir todos os ângulos do período (periodo / passo), senão o LRU descarta
+# justamente o próximo sprite que será usado.
+class CacheSprites:
+    def __init__(self, passo=0.5, capacidade=256):
+        if passo <= 0:
+            raise ValueError("O passo de quantização deve ser positivo")
+        if capacidade < 1:
+            raise ValueError("A capacidade deve ser pelo menos 1")
+        self.passo = passo
+        self.capacidade = capacidade
+        self._sprites = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    @property
+    def erro_maximo(self):
+        # Maior diferença, em graus, entre o ângulo pedido e o desenhado
+        return self.passo / 2
+
+    @property
+    def bytes_usados(self):
+        return sum(sprite.get_bytesize() * sprite.get_width() * sprite.get_height()
+                   for sprite, _ in self._sprites.values())
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def limpar(self):
+        self._sprites.clear()
+
+    def desenhar(self, superficie, vertices, centro, angulo, cor, espessura=0, periodo=360):
+        """
+        Desenha o polígono de vértices locais (relativos ao centro de
+        rotação) girado de angulo graus em torno de centro. Retorna a área
+        alterada, como pygame.draw.polygon.
+        """
+        passos_periodo = max(1, int(round(periodo / self.passo)))
+        indice = int(round((angulo % periodo) / self.passo)) % passos_periodo
+        chave = (tuple(map(tuple, vertices)), tuple(cor), espessura, indice * self.passo)
+
+        item = self._sprites.get(chave)
+        if item is None:
+            self.faltas += 1
+            item = self._criar(vertices, indice * self.passo, cor, espessura)
+            self._sprites[chave] = item
+            if len(self._sprites) > self.capacidade:
+                self._sprites.popitem(last=False)
+        else:
+            self.acertos += 1
+            self._sprites.move_to_end(chave)
+
+        sprite, (ox, oy) = item
+        return superficie.blit(sprite, (int(round(centro[0])) - ox, int(round(centro[1])) - oy))
+
+    def _criar(self, vertices, angulo, cor, espessura):
+        # Rasteriza o polígono girado numa superfície do tamanho da sua caixa,
+        # com fundo transparente por colorkey (blit com RLE é o mais rápido)
+        c = math.cos(math.radians(angulo))
+        s = math.sin(math.radians(angulo))
+        girados = [(x * c - y * s, x * s + y * c) for x, y in vertices]
+        margem = espessura + 1
+        ox = int(math.ceil(-min(x for x, _ in girados))) + margem
+        oy = int(math.ceil(-min(y for _, y in girados))) + margem
+        largura = int(math.ceil(max(x for x, _ in girados))) + ox + margem
+        altura = int(math.ceil(max(y for _, y in girados))) + oy + margem
+
+        transparente = (255, 0, 255) if tuple(cor)[:3] != (255, 0, 255) else (0, 255, 0)
+        sprite = pygame.Surface((largura, altura))
+        sprite.fill(transparente)
+        pygame.draw.polygon(sprite, cor, [(x + ox, y + oy) for x, y in girados], espessura)
+        sprite.set_colorkey(transparente, pygame.RLEACCEL)
+        return sprite, (ox, oy)
@@ -0,0 +1,273 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+import pymunk
+import pymunk.batch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comum.jogos import carregar_jogo
+
+_jogo = carregar_jogo("deepseek")
+WIDTH, HEIGHT, BLACK, WHITE = _jogo.WIDTH, _jogo.HEIGHT, _jogo.BLACK, _jogo.WHITE
+SQUARE_SIZE, SQUARE_BORDER, SQUARE_ROTATION_SPEED, GRAVITY = (
+    _jogo.SQUARE_SIZE, _jogo.SQUARE_BORDER, _jogo.SQUARE_ROTATION_SPEED, _jogo.GRAVITY)
+
+# Milhares de bolas de pymunk dentro do quadrado giratório.
+#
+# - Broad phase por hash espacial (use_spatial_hash) com células de ~1,5
+#   diâmetro de bola, no lugar da árvore de caixas padrão: cada bola cai em
+#   poucas células e só é testada contra as das células vizinhas.
+# - Tipos de colisão: só bola x parede tem handler (begin, uma vez por contato
+#   novo). Bola x bola não chama Python nenhuma vez e é resolvida toda em C.
+# - As bolas tocadas num passo trocam de cor juntas, num array NumPy, depois
+#   do passo.
+# - Posições lidas de uma vez com pymunk.batch e bolas desenhadas carimbando
+#   um disco direto nos pixels da tela, em vez de um pygame.draw.circle por bola.
+#
+# Ao contrário de game.py (corpo estático cujo ângulo só muda no desenho), o
+# quadrado aqui é cinemático e gira de verdade na física.
+TIPO_BOLA = 1
+TIPO_PAREDE = 2
+
+class EnxamePymunk:
+    def __init__(self, quantidade, raio=2, lado=SQUARE_SIZE, espessura=None,
+                 hash_espacial=True, celula=None, semente=None):
+        self.quantidade = quantidade
+        self.raio = raio
+        self.lado = lado
+        self.centro = (WIDTH / 2, HEIGHT / 2)
+        self.rng = np.random.default_rng(semente)
+
+        self.espaco = pymunk.Space()
+        self.espaco.gravity = (0, GRAVITY)
+        if hash_espacial:
+            # Célula de ~1,5 diâmetro e tabela com ~10 entradas por forma (com
+            # raio 2, células de 4 a 12 px ficaram a menos de 20% umas das
+            # outras; a árvore de caixas foi 3 a 15 vezes mais lenta)
+            self.celula = celula or 3 * raio
+            self.espaco.use_spatial_hash(self.celula, 10 * (quantidade + 4))
+        else:
+            self.celula = None
+
+        # Quadrado cinemático girando com velocidade constante. As paredes
+        # precisam ser grossas: uma bola que atravessa o quadrado caindo
+        # chega a ~1000 px/s, 8 px por passo de 1/120 s, e com paredes finas
+        # o centro dela passa para o outro lado num passo só
+        espessura = espessura or max(SQUARE_BORDER, 4 * raio)
+        self.espessura = espessura
+        self.quadrado = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
+        self.quadrado.position = self.centro
+        self.quadrado.angular_velocity = math.radians(SQUARE_ROTATION_SPEED)
+        meio = lado / 2
+        vertices = [(-meio, -meio), (meio, -meio), (meio, meio), (-meio, meio)]
+        # Com o hash, cada lado vira vários segmentos curtos: um segmento
+        # inteiro girado ocupa milhares de células e é reinserido em todas a
+        # cada passo
+        pedacos = max(1, round(lado / (10 * self.celula))) if self.celula else 1
+        self.vertices = vertices
+        paredes = []
+        for i in range(4):
+            (ax, ay), (bx, by) = vertices[i], vertices[(i + 1) % 4]
+            for k in range(pedacos):
+                inicio = (ax + (bx - ax) * k / pedacos, ay + (by - ay) * k / pedacos)
+                fim = (ax + (bx - ax) * (k + 1) / pedacos, ay + (by - ay) * (k + 1) / pedacos)
+                parede = pymunk.Segment(self.quadrado, inicio, fim, espessura)
+                parede.elasticity = 0.8
+                parede.friction = 0.5
+                parede.collision_type = TIPO_PAREDE
+                paredes.append(parede)
+        self.espaco.add(self.quadrado, *paredes)
+
+        # Bolas numa grade dentro do quadrado, sem sobreposição, enchendo de
+        # baixo para cima (caindo do alto, as primeiras chegariam rápidas o
+        # bastante para atravessar a parede num passo)
+        espacamento = 2 * raio + 1
+        por_linha = int((lado - 2 * espessura - 2) // espacamento)
+        if por_linha * por_linha < quantidade:
+            raise ValueError(f"Cabem no máximo {por_linha * por_linha} bolas de raio {raio} "
+                             f"num quadrado de lado {lado}")
+        primeira = (por_linha - 1) * espacamento / 2
+        momento = pymunk.moment_for_circle(1, 0, raio)
+        self.corpos = []
+        for indice in range(quantidade):
+            linha, coluna = divmod(indice, por_linha)
+            corpo = pymunk.Body(1, momento)
+            corpo.position = (self.centro[0] - primeira + coluna * espacamento,
+                              self.centro[1] + primeira - linha * espacamento)
+            corpo.velocity = tuple(self.rng.uniform(-50, 50, size=2))
+            forma = pymunk.Circle(corpo, raio)
+            forma.elasticity = 0.8
+            forma.friction = 0.5
+            forma.collision_type = TIPO_BOLA
+            forma.indice = indice
+            self.espaco.add(corpo, forma)
+            self.corpos.append(corpo)
+
+        # Troca de cor só quando a bola encosta numa parede (não a cada passo
+        # de um contato que continua)
+        handler = self.espaco.add_collision_handler(TIPO_BOLA, TIPO_PAREDE)
+        handler.begin = self._tocou_parede
+        self._tocadas = []
+
+        self.cores = np.tile(np.array((255, 0, 0), dtype=np.uint8), (quantidade, 1))
+        self.colisoes = np.zeros(quantidade, dtype=np.int64)
+
+        # Leitura em lote: ids dos corpos ordenados para achar o índice de cada bola
+        ids = np.array([corpo.id for corpo in self.corpos], dtype=np.uintp)
+        self._ordem = np.argsort(ids)
+        self._ids_ordenados = ids[self._ordem]
+        self._buffer = pymunk.batch.Buffer()
+        self.posicoes = np.zeros((quantidade, 2))
+
+        # Deslocamentos dos pixels de um disco de raio raio (o carimbo)
+        dx, dy = np.mgrid[-raio:raio + 1, -raio:raio + 1]
+        dentro = dx * dx + dy * dy <= raio * raio
+        self._disco = list(zip(dx[dentro].tolist(), dy[dentro].tolist()))
+
+    def _tocou_parede(self, arbiter, space, data):
+        self._tocadas.append(arbiter.shapes[0].indice)
+        return True
+
+    def passo(self, dt):
+        self.espaco.step(dt)
+        if self._tocadas:
+            # Todas as cores do passo de uma vez
+            indices = np.array(self._tocadas)
+            self.cores[indices] = self.rng.integers(50, 256, size=(len(indices), 3), dtype=np.uint8)
+            np.add.at(self.colisoes, indices, 1)
+            self._tocadas.clear()
+
+    def atualizar_posicoes(self):
+        # Posições de todas as bolas numa só chamada (sem um Body.position por bola)
+        self._buffer.clear()
+        pymunk.batch.get_space_bodies(
+            self.espaco, pymunk.batch.BodyFields.BODY_ID | pymunk.batch.BodyFields.POSITION, self._buffer)
+        ids = np.frombuffer(self._buffer.int_buf(), dtype=np.uintp)
+        xy = np.frombuffer(self._buffer.float_buf(), dtype=np.float64).reshape(-1, 2)
+        # O corpo do quadrado também vem na lista; só as bolas são copiadas
+        k = np.searchsorted(self._ids_ordenados, ids).clip(max=self.quantidade - 1)
+        bolas = self._ids_ordenados[k] == ids
+        self.posicoes[self._ordem[k[bolas]]] = xy[bolas]
+        return self.posicoes
+
+    def fugas(self):
+        # Bolas fora do quadrado (atravessaram uma parede)
+        angulo = self.quadrado.angle
+        dx = self.posicoes[:, 0] - self.centro[0]
+        dy = self.posicoes[:, 1] - self.centro[1]
+        c, s = math.cos(angulo), math.sin(angulo)
+        u = dx * c + dy * s
+        v = -dx * s + dy * c
+        return int(np.count_nonzero(np.maximum(np.abs(u), np.abs(v)) > self.lado / 2))
+
+    def desenhar_quadrado(self, superficie):
+        pontos = [self.quadrado.local_to_world(vertice) for vertice in self.vertices]
+        return pygame.draw.polygon(superficie, WHITE, pontos, int(2 * self.espessura))
+
+    def desenhar(self, superficie):
+        # Carimba o disco de todas as bolas direto nos pixels: um laço pelos
+        # pixels do disco, cada um escrito para todas as bolas de uma vez
+        largura, altura = superficie.get_size()
+        x = np.rint(self.posicoes[:, 0]).astype(np.intp)
+        y = np.rint(self.posicoes[:, 1]).astype(np.intp)
+        r, g, b = (self.cores[:, i].astype(np.uint32) for i in range(3))
+        dr, dg, db, _ = superficie.get_shifts()
+        mapeadas = (r << dr) | (g << dg) | (b << db)
+        pixels = pygame.surfarray.pixels2d(superficie)
+        for ox, oy in self._disco:
+            pixels[(x + ox).clip(0, largura - 1), (y + oy).clip(0, altura - 1)] = mapeadas
+        del pixels
+
+    def desenhar_circulos(self, superficie):
+        # Referência: um pygame.draw.circle por bola
+        for (x, y), cor in zip(np.rint(self.posicoes).astype(int).tolist(), self.cores.tolist()):
+            pygame.draw.circle(superficie, cor, (x, y), self.raio)
+
+def medir(quantidade, args):
+    enxame = EnxamePymunk(quantidade, args.raio, args.lado, hash_espacial=not args.sem_hash,
+                          celula=args.celula, semente=args.semente)
+    superficie = pygame.Surface((WIDTH, HEIGHT), depth=32)
+    dt = 1.0 / (60 * args.subpassos)
+
+    # Aquecimento: as bolas caem e se acomodam antes de medir
+    for _ in range(args.subpassos * 30):
+        enxame.passo(dt)
+
+    fisica = desenho = circulos = 0.0
+    for _ in range(args.passos):
+        inicio = time.perf_counter()
+        for _ in range(args.subpassos):
+            enxame.passo(dt)
+        fisica += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        enxame.atualizar_posicoes()
+        superficie.fill(BLACK)
+        enxame.desenhar(superficie)
+        desenho += time.perf_counter() - inicio
+
+        if args.circulos:
+            inicio = time.perf_counter()
+            superficie.fill(BLACK)
+            enxame.desenhar_circulos(superficie)
+            circulos += time.perf_counter() - inicio
+
+    resultado = {"bolas": quantidade, "fisica_ms": fisica / args.passos * 1000,
+                 "desenho_ms": desenho / args.passos * 1000, "fugas": enxame.fugas(),
+                 "colisoes": int(enxame.colisoes.sum())}
+    if args.circulos:
+        resultado["circulos_ms"] = circulos / args.passos * 1000
+    return resultado
+
+def mostrar(args):
+    # Janela ao vivo com a primeira quantidade pedida
+    enxame = EnxamePymunk(args.bolas[0], args.raio, args.lado, hash_espacial=not args.sem_hash,
+                          celula=args.celula, semente=args.semente)
+    # game.py só abre a janela em main(); aqui ela é aberta à parte
+    pygame.init()
+    tela = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Enxame no Quadrado Giratório")
+    relogio = pygame.time.Clock()
+    dt = 1.0 / (60 * args.subpassos)
+    while not any(evento.type == pygame.QUIT for evento in pygame.event.get()):
+        for _ in range(args.subpassos):
+            enxame.passo(dt)
+        enxame.atualizar_posicoes()
+        tela.fill(BLACK)
+        enxame.desenhar_quadrado(tela)
+        enxame.desenhar(tela)
+        pygame.display.flip()
+        relogio.tick(60)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Milhares de bolas de pymunk no quadrado giratório")
+    parser.add_argument("--bolas", type=int, nargs="+", default=[500, 1000, 2000, 4000, 8000],
+                        help="quantidades a medir (a escala deve ser quase linear)")
+    parser.add_argument("--raio", type=int, default=2)
+    parser.add_argument("--lado", type=float, default=560, help="lado do quadrado (game.py usa 200)")
+    parser.add_argument("--passos", type=int, default=120, help="quadros medidos por quantidade")
+    parser.add_argument("--subpassos", type=int, default=2, help="passos de física por quadro de 1/60 s")
+    parser.add_argument("--celula", type=float, default=None, help="tamanho da célula do hash (padrão: 3 * raio)")
+    parser.add_argument("--sem-hash", action="store_true", help="usa a árvore de caixas padrão do pymunk")
+    parser.add_argument("--circulos", action="store_true", help="mede também um pygame.draw.circle por bola")
+    parser.add_argument("--semente", type=int, default=None)
+    parser.add_argument("--mostrar", action="store_true", help="abre a janela com a primeira quantidade")
+    args = parser.parse_args()
+
+    if args.mostrar:
+        mostrar(args)
+    else:
+        print(f"{'bolas':>7}{'física ms':>11}{'µs/bola':>9}{'desenho ms':>12}{'µs/bola':>9}"
+              + (f"{'círculos ms':>13}" if args.circulos else "") + f"{'fugas':>7}")
+        for quantidade in args.bolas:
+            r = medir(quantidade, args)
+            print(f"{quantidade:>7}{r['fisica_ms']:>11.2f}{r['fisica_ms'] * 1000 / quantidade:>9.2f}"
+                  f"{r['desenho_ms']:>12.3f}{r['desenho_ms'] * 1000 / quantidade:>9.3f}"
+                  + (f"{r['circulos_ms']:>13.3f}" if args.circulos else "") + f"{r['fugas']:>7}")
+    pygame.quit()
@@ -1,19 +1,17 @@
-import pygame
 import pymunk
-import pymunk.pygame_util
 import random
 import math
-import imageio
 import os
-import cv2
+import sys
 
-# Inicialização do Pygame
-pygame.init()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importar este módulo só carrega o pymunk (enxame.py usa as constantes). O
+# pygame, a janela e os gravadores ficam em main(), e draw_scene() importa o
+# pygame quando é chamada.
 
 # Configurações da tela
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Bola no Quadrado Giratório")
 
 # Cores
 WHITE = (255, 255, 255)
@@ -29,11 +27,19 @@ SQUARE_BORDER = 2
 BALL_RADIUS = 15
 GRAVITY = 981  # pixels/s²
 
-# Espaço de física Pymunk
-space = pymunk.Space()
-space.gravity = (0, GRAVITY)  # Gravidade para baixo
+# Renderização parcial: limpa e envia à janela só as áreas que mudaram
+PARTIAL_RENDERING = True
+
+# Passos de física por quadro (passo fixo de 1 / (60 * PHYSICS_SUBSTEPS) s)
+PHYSICS_SUBSTEPS = 1
+
+# Espaço de física Pymunk (um novo para cada simulação)
+def create_space():
+    space = pymunk.Space()
+    space.gravity = (0, GRAVITY)  # Gravidade para baixo
+    return space
 
-def create_rotating_square():
+def create_rotating_square(space):
     # Criamos um corpo estático (não afetado por física)
     body = pymunk.Body(body_type=pymunk.Body.STATIC)
     body.position = (WIDTH//2, HEIGHT//2)
@@ -63,7 +69,7 @@ def create_rotating_square():
     
     return body, segments
 
-def create_ball():
+def create_ball(space):
     # Corpo dinâmico (afetado por física)
     mass = 1
     moment = pymunk.moment_for_circle(mass, 0, BALL_RADIUS)
@@ -96,40 +102,142 @@ def handle_collision(arbiter, space, data):
     )
     return True
 
-def setup_collision_handler(ball_shape):
+def setup_collision_handler(space, ball_shape):
     handler = space.add_default_collision_handler()
     handler.post_solve = handle_collision
     handler.data["ball_shape"] = ball_shape
 
+# Desenha o quadrado (manualmente para rotação suave) e a bola com o ângulo e
+# a posição dados e retorna as áreas alteradas
+def draw_scene(screen, angle, ball_position, ball_color):
+    import pygame
+    half_size = SQUARE_SIZE // 2
+    points = [
+        (WIDTH//2 + half_size * math.cos(angle) - half_size * math.sin(angle),
+         HEIGHT//2 + half_size * math.sin(angle) + half_size * math.cos(angle)),
+        (WIDTH//2 + half_size * math.cos(angle) + half_size * math.sin(angle),
+         HEIGHT//2 + half_size * math.sin(angle) - half_size * math.cos(angle)),
+        (WIDTH//2 - half_size * math.cos(angle) + half_size * math.sin(angle),
+         HEIGHT//2 - half_size * math.sin(angle) - half_size * math.cos(angle)),
+        (WIDTH//2 - half_size * math.cos(angle) - half_size * math.sin(angle),
+         HEIGHT//2 - half_size * math.sin(angle) + half_size * math.cos(angle))
+    ]
+    square_area = pygame.draw.polygon(screen, WHITE, points, SQUARE_BORDER)
+    
+    # Desenhamos a bola
+    ball_pos = int(ball_position.x), int(ball_position.y)
+    ball_area = pygame.draw.circle(screen, ball_color, ball_pos, BALL_RADIUS)
+    return square_area, ball_area
+
 # Configurações para gravação de vídeo
 video_nome = "gameplay_deepseek.mp4"
 gif_nome = "gameplay_deepseek.gif"
 quadro_tamanho = (WIDTH, HEIGHT)
 fps = 30
-quadro_codificador = cv2.VideoWriter_fourcc(*"mp4v")
-video_writer = cv2.VideoWriter(video_nome, quadro_codificador, fps, quadro_tamanho)
+CAPACIDADE_FILA = 8
+POLITICA_FILA = "bloquear"  # "bloquear", "descartar" ou "subamostrar"
+
+# Registro compacto do estado de cada passo
+RECORD_STATE = True
+STATE_LOG_NAME = "estado_deepseek.bin"
+
+def scene_metadata():
+    # Descrição da cena usada por reproduzir.py para redesenhar o registro
+    half_size = SQUARE_SIZE // 2
+    return {
+        "implementacao": "deepseek",
+        "largura": WIDTH,
+        "altura": HEIGHT,
+        "fps": 60,
+        "centro": [WIDTH // 2, HEIGHT // 2],
+        "vertices": [[half_size, half_size], [half_size, -half_size],
+                     [-half_size, -half_size], [-half_size, half_size]],
+        "espessura": SQUARE_BORDER,
+        "raio": BALL_RADIUS,
+        "cor_quadrado": WHITE,
+        "fundo": BLACK,
+    }
 
-# Função para converter MP4 para GIF
-def converter_para_gif(video_path, gif_path):
-    comando = f"ffmpeg -i {video_path} -vf 'fps=10,scale=320:-1:flags=lanczos' {gif_path}"
-    os.system(comando)
+# Replay instantâneo (teclas G e S): últimos segundos em memória fixa
+REPLAY_SEGUNDOS = 10
+REPLAY_FPS = 30
+REPLAY_TAMANHO = (320, 240)
 
 def main():
+    import pygame
+    from comum.captura import AgendaCaptura, CapturaQuadro
+    from comum.cronometro import Cronometro, BENCHMARK, PERFIL_ATIVO, PERFIL_HUD, duracao_passo, continuar, salvar_relatorio
+    from comum.gif import GravadorGif
+    from comum.gravacao import GravadorAssincrono
+    from comum.memoria import EXPORTAR_MEMORIA, ExportadorQuadros, codificar_gif, codificar_mp4
+    from comum.painel import PainelPerfil
+    from comum.passo_fixo import PassoFixo, interpolar
+    from comum.registro import GravadorEstado
+    from comum.retangulos import RetangulosSujos
+    from comum.replay import BufferReplay
+
+    # Inicialização do Pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Bola no Quadrado Giratório")
     clock = pygame.time.Clock()
     running = True
     
     # Criamos os objetos do jogo
-    square_body, square_segments = create_rotating_square()
-    ball_body, ball_shape = create_ball()
+    space = create_space()
+    square_body, square_segments = create_rotating_square(space)
+    ball_body, ball_shape = create_ball(space)
     
     # Configuramos o handler de colisão
-    setup_collision_handler(ball_shape)
+    setup_collision_handler(space, ball_shape)
     
-    # Para gravação
-    frames = []
+    # Com EXPORTAR=memoria o MP4 e o GIF são codificados em outros processos,
+    # que leem os quadros capturados de um anel em memória compartilhada
+    exportador = video_writer = gif_writer = None
+    if EXPORTAR_MEMORIA:
+        exportador = ExportadorQuadros(quadro_tamanho, CAPACIDADE_FILA, consumidores=2, politica=POLITICA_FILA)
+        exportador.iniciar(codificar_mp4, video_nome, fps)
+        exportador.iniciar(codificar_gif, gif_nome, fps)
+    else:
+        # Gravador em segundo plano (a escrita acontece em outra thread)
+        video_writer = GravadorAssincrono(video_nome, fps, quadro_tamanho, CAPACIDADE_FILA, POLITICA_FILA,
+                                          converter=None, medir_tempos=BENCHMARK)
+        # GIF montado durante a captura (reduzido para 320px a 10 fps)
+        gif_writer = GravadorGif(gif_nome, fps_entrada=fps, fps_saida=10, largura=320)
+    # O anel copia o quadro na hora, então um buffer de captura basta
+    captura = CapturaQuadro(pygame.display.get_surface(), num_buffers=1 if exportador else CAPACIDADE_FILA + 2,
+                            tamanho_saida=quadro_tamanho)
+    # O loop roda a 60 quadros/s, o vídeo a fps: só os quadros necessários são capturados
+    agenda = AgendaCaptura(captura, fps)
+
+    # Para gravação: buffer circular com os últimos REPLAY_SEGUNDOS (recebe
+    # os quadros da agenda, a fps quadros/s)
+    replay = BufferReplay(REPLAY_SEGUNDOS, fps_entrada=fps, fps_saida=REPLAY_FPS, tamanho=REPLAY_TAMANHO)
+    gravando_replay = False
+
+    # Áreas desenhadas em cada quadro (para limpar e atualizar só elas)
+    retangulos = RetangulosSujos(screen, BLACK, ativo=PARTIAL_RENDERING)
+
+    # Registro compacto do estado de cada passo (reproduza com reproduzir.py)
+    registro = GravadorEstado(STATE_LOG_NAME, scene_metadata()) if RECORD_STATE else None
+    sim_time = 0.0
+
+    # Tempos de cada fase do quadro (em benchmark ou com PERFIL=1) e o painel
+    # com os percentis recentes (F3)
+    cronometro = Cronometro()
+    painel = PainelPerfil(cronometro, visivel=PERFIL_HUD) if PERFIL_ATIVO else None
+    quadros = 0
     
-    while running:
-        dt = 1/60.0  # Tempo fixo para física estável
+    # Física em passo fixo (PHYSICS_SUBSTEPS passos por quadro de 1/60 s),
+    # alimentada pelo tempo real de cada quadro
+    passo_fixo = PassoFixo.por_quadro(60, PHYSICS_SUBSTEPS)
+    # Estado antes do último passo, para interpolar o desenho
+    previous_angle = square_body.angle
+    previous_position = ball_body.position
+
+    while running and continuar(quadros):
+        dt = duracao_passo(clock, 60)  # Tempo real do quadro
+        cronometro.iniciar()
         
         # Processamento de eventos
         for event in pygame.event.get():
@@ -140,64 +248,94 @@ def main():
                     running = False
                 elif event.key == pygame.K_r:  # Reset com R
                     space.remove(ball_body, ball_shape)
-                    ball_body, ball_shape = create_ball()
-                    setup_collision_handler(ball_shape)
+                    ball_body, ball_shape = create_ball(space)
+                    setup_collision_handler(space, ball_shape)
+                    previous_position = ball_body.position
                 elif event.key == pygame.K_g:  # Gravar vídeo
-                    # Iniciar gravação
-                    frames = []
-                    print("Gravação iniciada...")
-                elif event.key == pygame.K_s:  # Parar gravação e salvar
-                    # Parar gravação
-                    print("Gravação parada. Salvando vídeo...")
-                    # Salvar como MP4
-                    imageio.mimsave('gravacao.mp4', frames, fps=60)
-                    # Converter para GIF
-                    imageio.mimsave('gravacao.gif', frames, fps=60)
-                    print("Vídeo salvo como 'gravacao.mp4' e 'gravacao.gif'")
-        
-        # Atualização do quadrado
-        update_square_rotation(square_body, dt)
+                    # Iniciar gravação (descarta o que havia no buffer)
+                    replay.limpar()
+                    gravando_replay = True
+                    print(f"Gravação iniciada (últimos {REPLAY_SEGUNDOS}s, "
+                          f"{replay.bytes_usados / 2**20:.0f} MB)...")
+                elif event.key == pygame.K_s:  # Salvar os últimos segundos
+                    # Salva em segundo plano; o jogo continua rodando
+                    if not replay.salvar('gravacao.mp4', 'gravacao.gif'):
+                        print("Ainda salvando o replay anterior...")
+                    else:
+                        print("Salvando vídeo em segundo plano...")
+            if painel:
+                painel.processar(event)
+        cronometro.marcar("eventos")
         
-        # Atualização da física
-        space.step(dt)
+        for _ in range(passo_fixo.avancar(dt)):
+            previous_angle = square_body.angle
+            previous_position = ball_body.position
+
+            # Atualização do quadrado
+            update_square_rotation(square_body, passo_fixo.dt)
+
+            # Atualização da física
+            space.step(passo_fixo.dt)
+        sim_time = passo_fixo.tempo
+        cronometro.marcar("fisica")
+        if registro:
+            registro.registrar(sim_time, math.degrees(square_body.angle),
+                               ball_body.position.x, ball_body.position.y,
+                               ball_body.velocity.x, ball_body.velocity.y, ball_shape.color)
+            cronometro.marcar("registro")
         
         # Desenho
-        screen.fill(BLACK)
+        retangulos.limpar()
         
-        # Desenhamos o quadrado (manualmente para rotação suave)
-        angle = square_body.angle
-        half_size = SQUARE_SIZE // 2
-        points = [
-            (WIDTH//2 + half_size * math.cos(angle) - half_size * math.sin(angle),
-             HEIGHT//2 + half_size * math.sin(angle) + half_size * math.cos(angle)),
-            (WIDTH//2 + half_size * math.cos(angle) + half_size * math.sin(angle),
-             HEIGHT//2 + half_size * math.sin(angle) - half_size * math.cos(angle)),
-            (WIDTH//2 - half_size * math.cos(angle) + half_size * math.sin(angle),
-             HEIGHT//2 - half_size * math.sin(angle) - half_size * math.cos(angle)),
-            (WIDTH//2 - half_size * math.cos(angle) - half_size * math.sin(angle),
-             HEIGHT//2 - half_size * math.sin(angle) + half_size * math.cos(angle))
-        ]
-        pygame.draw.polygon(screen, WHITE, points, SQUARE_BORDER)
+        # Desenhamos o quadrado e a bola na posição interpolada entre os dois
+        # últimos passos da física
+        alpha = passo_fixo.alfa
+        for area in draw_scene(screen, interpolar(previous_angle, square_body.angle, alpha),
+                               interpolar(previous_position, ball_body.position, alpha), ball_shape.color):
+            retangulos.registrar(area)
+        cronometro.marcar("desenho")
         
-        # Desenhamos a bola
-        ball_pos = int(ball_body.position.x), int(ball_body.position.y)
-        pygame.draw.circle(screen, ball_shape.color, ball_pos, BALL_RADIUS)
+        # Gravação de vídeo: só os quadros que o vídeo de fps quadros/s
+        # precisa, pelo relógio da simulação (já em BGR; a escrita acontece
+        # em outra thread)
+        quadro_bgr, repeticoes = agenda.capturar(sim_time, retangulos.areas_alteradas())
+        cronometro.marcar("captura")
+        if exportador:
+            exportador.escrever(quadro_bgr, sim_time, repeticoes)
+        for _ in range(repeticoes):
+            if video_writer:
+                video_writer.escrever(quadro_bgr)
+                gif_writer.adicionar(quadro_bgr)
+            if gravando_replay:
+                replay.adicionar(quadro_bgr)
+        cronometro.marcar("codificacao")
         
-        # Gravação de vídeo
-        frame = pygame.surfarray.array3d(pygame.display.get_surface())
-        frame = cv2.cvtColor(cv2.transpose(frame), cv2.COLOR_RGB2BGR)
-        video_writer.write(frame)
+        # Painel de perfil (depois da captura, para não entrar no vídeo)
+        if painel:
+            retangulos.registrar(painel.desenhar(screen))
+            cronometro.marcar("painel")
         
         # Atualização da tela
-        pygame.display.flip()
-        clock.tick(60)
+        retangulos.apresentar()
+        cronometro.marcar("apresentacao")
+        quadros += 1
     
     # Certifique-se de que o gravador de vídeo seja liberado corretamente
-    video_writer.release()
-    # Verifica se o arquivo MP4 foi gerado antes de converter para GIF
-    if os.path.exists(video_nome):
-        converter_para_gif(video_nome, gif_nome)
+    if exportador:
+        exportador.fechar()
     else:
+        video_writer.fechar()
+        gif_writer.fechar()
+    gravacao = exportador.estatisticas() if exportador else video_writer.estatisticas()
+    if registro:
+        registro.fechar()
+    replay.aguardar()
+    print("Gravação:", gravacao)
+    salvar_relatorio("deepseek", cronometro, quadros,
+                     {"escrita": None if exportador else video_writer.duracoes_escrita, "gravacao": gravacao,
+                      "passo_fixo": passo_fixo.estatisticas(), "agenda": agenda.estatisticas()})
+    # Verifica se o arquivo MP4 foi gerado
+    if not os.path.exists(video_nome):
         print(f"Erro: O arquivo {video_nome} não foi gerado corretamente.")
 
     pygame.quit()
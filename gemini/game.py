@@ -1,22 +1,38 @@
 import pygame
+import gc
 import math
 import random
-import cv2
 import os
 import sys
-sys.path.insert(0, '/home/abner/Documentos/IFSP/7semestre/IA/teste-llm/.venv/lib/python3.12/site-packages')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Inicialização do Pygame
-pygame.init()
+# A física usa os vetores do pygame, mas importar este módulo não inicializa o
+# pygame nem abre janela: a tela, o OpenCV, o NumPy e os gravadores ficam em
+# main().
+from comum.colisao import tempo_de_impacto, refletir_velocidade, penetracao
+from comum.poligono import PoligonoConvexo
+from comum.sprites import CacheSprites
 
 # Constantes da tela
 LARGURA_TELA = 800
 ALTURA_TELA = 600
-TELA = pygame.display.set_mode((LARGURA_TELA, ALTURA_TELA))
-pygame.display.set_caption("Quadrado Giratório e Bola Quicante")
-RELOGIO = pygame.time.Clock()
 FPS = 60
 
+# Colisão contínua: encontra o instante exato do contato dentro do passo, então
+# o limite de dt pode ser bem maior sem a bola atravessar as paredes. O limite
+# de 0.25 só vale enquanto tempo_de_impacto passar na verificação de
+# microbenchmark.py (contatos perdidos com dt até 0.25); senão, volta a 0.1
+COLISAO_CONTINUA = True
+MAX_IMPACTOS_POR_PASSO = 8
+DT_MAXIMO = 0.25 if COLISAO_CONTINUA else 0.1
+
+# Renderização parcial: limpa e envia à janela só as áreas que mudaram
+RENDERIZACAO_PARCIAL = True
+
+# Sprites do quadrado pré-renderizados a cada PASSO_SPRITE graus (um blit por quadro)
+SPRITES_QUADRADO = True
+PASSO_SPRITE = 0.5
+
 # Cores
 BRANCO = (255, 255, 255)
 PRETO = (0, 0, 0)
@@ -27,7 +43,6 @@ LADO_QUADRADO = 200
 ESPESSURA_BORDA_QUADRADO = 2
 CENTRO_QUADRADO = pygame.math.Vector2(LARGURA_TELA / 2, ALTURA_TELA / 2)
 VELOCIDADE_ANGULAR_QUADRADO = 60  # graus por segundo
-angulo_quadrado_atual = 0.0  # ângulo em graus
 
 # Vértices locais do quadrado (em torno da origem 0,0) antes da rotação e translação.
 # Definidos em sentido horário para facilitar o cálculo da normal externa.
@@ -38,173 +53,356 @@ vertices_locais_quadrado = [
     pygame.math.Vector2(-LADO_QUADRADO / 2, LADO_QUADRADO / 2),  # Inferior Esquerdo
 ]
 
+# Um sprite por ângulo quantizado no período de 90 graus do quadrado
+cache_sprites = CacheSprites(passo=PASSO_SPRITE, capacidade=int(round(90 / PASSO_SPRITE)))
+
 # Propriedades da Bola
 RAIO_BOLA = 10
-posicao_bola = pygame.math.Vector2(CENTRO_QUADRADO.x, CENTRO_QUADRADO.y)
-velocidade_bola = pygame.math.Vector2(0, 0)
-cor_bola = pygame.Color(VERMELHO)
 
 # Gravidade: No Pygame, o eixo Y positivo é para baixo.
 ACELERACAO_GRAVIDADE = pygame.math.Vector2(0, 350)  # pixels/s^2
 
-# Para gravação
-gravando = False
-frames = []
-
 # Configurações para gravação de vídeo
 video_nome = "gameplay_gemini.mp4"
 gif_nome = "gameplay_gemini.gif"
 quadro_tamanho = (LARGURA_TELA, ALTURA_TELA)
 fps = 30
-quadro_codificador = cv2.VideoWriter_fourcc(*"mp4v")
-video_writer = cv2.VideoWriter(video_nome, quadro_codificador, fps, quadro_tamanho)
+CAPACIDADE_FILA = 8
+POLITICA_FILA = "bloquear"  # "bloquear", "descartar" ou "subamostrar"
+
+# Registro compacto do estado de cada passo (reproduza com reproduzir.py)
+REGISTRAR_ESTADO = True
+registro_nome = "estado_gemini.bin"
+METADADOS_CENA = {
+    "implementacao": "gemini",
+    "largura": LARGURA_TELA,
+    "altura": ALTURA_TELA,
+    "fps": FPS,
+    "centro": [CENTRO_QUADRADO.x, CENTRO_QUADRADO.y],
+    "vertices": [[v.x, v.y] for v in vertices_locais_quadrado],
+    "espessura": ESPESSURA_BORDA_QUADRADO,
+    "raio": RAIO_BOLA,
+    "cor_quadrado": BRANCO,
+    "fundo": PRETO,
+}
 
-def rotacionar_vertices(vertices_locais, angulo_graus, centro_rotacao):
+class EstadoQuadrado:
     """
-    Rotaciona uma lista de vértices locais em torno da origem e depois os translada para o centro_rotacao.
+    Vértices globais e normais externas dos lados do quadrado girado. Os
+    vetores são criados uma vez e atualizados no lugar por girar(), só quando
+    o ângulo muda, para o loop não alocar nada a cada quadro. A colisão usa o
+    polígono no referencial local (poligono), com o seno e o cosseno do
+    ângulo atual.
     """
-    angulo_rad = math.radians(angulo_graus)
-    cos_ang = math.cos(angulo_rad)
-    sin_ang = math.sin(angulo_rad)
-    
-    vertices_globais_rotacionados = []
-    for vertice_local in vertices_locais:
-        x_rot = vertice_local.x * cos_ang - vertice_local.y * sin_ang
-        y_rot = vertice_local.x * sin_ang + vertice_local.y * cos_ang
-        vertices_globais_rotacionados.append(pygame.math.Vector2(x_rot + centro_rotacao.x, y_rot + centro_rotacao.y))
-    return vertices_globais_rotacionados
-
-def ponto_mais_proximo_no_segmento(ponto_externo, seg_ponto_a, seg_ponto_b):
+    __slots__ = ("centro", "angulo", "vertices", "normais", "poligono", "cos", "sin",
+                 "_locais", "_normais_locais")
+
+    def __init__(self, vertices_locais, centro):
+        self.centro = centro
+        self._locais = [(v.x, v.y) for v in vertices_locais]
+        self.poligono = PoligonoConvexo(self._locais)
+        # Normal externa de cada lado (i, i + 1) com os vértices em sentido horário
+        self._normais_locais = []
+        for i, (ax, ay) in enumerate(self._locais):
+            bx, by = self._locais[(i + 1) % len(self._locais)]
+            comprimento = math.hypot(bx - ax, by - ay)
+            if comprimento == 0: # Lado degenerado: sem normal, nunca colide
+                self._normais_locais.append((0.0, 0.0))
+            else:
+                self._normais_locais.append(((by - ay) / comprimento, -(bx - ax) / comprimento))
+        self.vertices = [pygame.math.Vector2() for _ in self._locais]
+        self.normais = [pygame.math.Vector2() for _ in self._locais]
+        self.angulo = None
+        self.girar(0.0)
+
+    def girar(self, angulo_graus):
+        if angulo_graus == self.angulo:
+            return
+        self.angulo = angulo_graus
+        angulo_rad = math.radians(angulo_graus)
+        c = math.cos(angulo_rad)
+        s = math.sin(angulo_rad)
+        self.cos, self.sin = c, s
+        cx, cy = self.centro.x, self.centro.y
+        for i in range(len(self._locais)):
+            x, y = self._locais[i]
+            self.vertices[i].update(x * c - y * s + cx, x * s + y * c + cy)
+            nx, ny = self._normais_locais[i]
+            self.normais[i].update(nx * c - ny * s, nx * s + ny * c)
+
+class ResultadoColisao:
     """
-    Encontra o ponto em um segmento de reta [seg_ponto_a, seg_ponto_b] que é o mais próximo de ponto_externo.
+    Colisão mais profunda encontrada no passo (reutilizado a cada quadro no
+    lugar de um dicionário novo).
     """
-    vetor_segmento = seg_ponto_b - seg_ponto_a
-    if vetor_segmento.length_squared() == 0: # Se o segmento for um ponto
-        return seg_ponto_a
-    
-    vetor_ap = ponto_externo - seg_ponto_a
-    # Projeta o vetor_ap no vetor_segmento
-    # t é a proporção ao longo do vetor_segmento onde a projeção cai
-    t = vetor_ap.dot(vetor_segmento) / vetor_segmento.length_squared()
-    
-    # Limita t para estar entre 0 e 1 (dentro do segmento)
-    if t < 0.0:
-        return seg_ponto_a # Ponto mais próximo é o início do segmento
-    elif t > 1.0:
-        return seg_ponto_b # Ponto mais próximo é o fim do segmento
-    else:
-        return seg_ponto_a + t * vetor_segmento # Projeção está no segmento
+    __slots__ = ("houve", "profundidade", "normal")
 
-# Função para converter MP4 para GIF
-def converter_para_gif(video_path, gif_path):
-    comando = f"ffmpeg -i {video_path} -vf 'fps=10,scale=320:-1:flags=lanczos' {gif_path}"
-    os.system(comando)
+    def __init__(self):
+        self.normal = pygame.math.Vector2()
+        self.reiniciar()
 
-# Loop principal do jogo
-rodando = True
-while rodando:
-    dt = RELOGIO.tick(FPS) / 1000.0
-    if dt > 0.1: # Limitar dt para evitar saltos muito grandes em caso de lag
-        dt = 0.1
+    def reiniciar(self):
+        self.houve = False
+        self.profundidade = 0.0 # Quão "fundo" a bola entrou, ao longo da normal
 
-    for evento in pygame.event.get():
-        if evento.type == pygame.QUIT:
-            rodando = False
+def detectar_colisao(quadrado, posicao, raio, resultado):
+    """
+    Procura a penetração mais profunda da bola nos lados do quadrado e a
+    guarda em resultado. Retorna se houve colisão.
+
+    O teste é feito no referencial do quadrado: a bola dentro do círculo
+    inscrito (menos o raio) não testa lado nenhum, e fora dele só os lados
+    voltados para ela são testados (veja PoligonoConvexo.contato).
+    """
+    resultado.reiniciar()
+    c, s = quadrado.cos, quadrado.sin
+    dx, dy = posicao.x - quadrado.centro.x, posicao.y - quadrado.centro.y
+    contato = quadrado.poligono.contato(dx * c + dy * s, -dx * s + dy * c, raio)
+    if contato is None:
+        return False
+    # Normal do lado de volta ao referencial da tela
+    profundidade, nx, ny = contato
+    resultado.houve = True
+    resultado.profundidade = profundidade
+    resultado.normal.update(nx * c - ny * s, nx * s + ny * c)
+    return True
 
-    # --- Lógica de Atualização do Jogo ---
-    # Rotaciona o quadrado
-    angulo_quadrado_atual = (angulo_quadrado_atual + VELOCIDADE_ANGULAR_QUADRADO * dt) % 360
-    vertices_globais_quadrado = rotacionar_vertices(vertices_locais_quadrado, angulo_quadrado_atual, CENTRO_QUADRADO)
+def mover_bola_continuo(posicao, velocidade, angulo_graus, dt):
+    """
+    Move a bola durante dt contra o quadrado que gira a partir de angulo_graus.
+    Em cada contato a bola para no instante exato do toque, reflete em relação
+    à parede (que se move) e segue com a nova velocidade pelo resto do passo.
+    Atualiza posicao e velocidade no lugar e retorna se houve colisão.
+    """
+    angulo = math.radians(angulo_graus)
+    velocidade_angular = math.radians(VELOCIDADE_ANGULAR_QUADRADO)
+
+    # Longe das paredes não há o que procurar: no referencial do quadrado a
+    # bola anda no máximo (|v| + |w| r) dt no passo, com r a distância ao
+    # centro, e se isso não alcança a parede mais próxima basta andar em linha reta
+    dx, dy = posicao.x - CENTRO_QUADRADO.x, posicao.y - CENTRO_QUADRADO.y
+    c, s = math.cos(angulo), math.sin(angulo)
+    folga = (LADO_QUADRADO / 2 - RAIO_BOLA) - max(abs(dx * c + dy * s), abs(-dx * s + dy * c))
+    rapidez = velocidade.length()
+    alcance = (rapidez + abs(velocidade_angular) * (math.hypot(dx, dy) + rapidez * dt)) * dt
+    if folga > alcance:
+        posicao.x += velocidade.x * dt
+        posicao.y += velocidade.y * dt
+        return False
+
+    restante = dt
+    houve_colisao = False
+    for _ in range(MAX_IMPACTOS_POR_PASSO):
+        impacto = tempo_de_impacto(posicao, velocidade, CENTRO_QUADRADO, angulo, velocidade_angular,
+                                   LADO_QUADRADO / 2, RAIO_BOLA, restante)
+        if impacto is None:
+            break
+        t, normal, velocidade_parede = impacto
+        posicao.x += velocidade.x * t
+        posicao.y += velocidade.y * t
+        angulo += velocidade_angular * t
+        restante -= t
+        velocidade.update(refletir_velocidade(velocidade, normal, velocidade_parede))
+        houve_colisao = True
+
+    posicao.x += velocidade.x * restante
+    posicao.y += velocidade.y * restante
+
+    # Se ainda sobrou penetração (muitos contatos num só passo), empurra a bola
+    # de volta para dentro ao longo da normal da parede
+    angulo += velocidade_angular * restante
+    sobra = penetracao(posicao, CENTRO_QUADRADO, angulo, LADO_QUADRADO / 2, RAIO_BOLA)
+    if sobra is not None:
+        profundidade, (nx, ny) = sobra
+        posicao.x += nx * profundidade
+        posicao.y += ny * profundidade
+
+    return houve_colisao
+
+def criar_estado():
+    """
+    Estado inicial da simulação: quadrado sem rotação e bola vermelha parada
+    no centro. Retorna (quadrado, posicao, velocidade, cor, colisao).
+    """
+    return (EstadoQuadrado(vertices_locais_quadrado, CENTRO_QUADRADO),
+            pygame.math.Vector2(CENTRO_QUADRADO.x, CENTRO_QUADRADO.y),
+            pygame.math.Vector2(0, 0),
+            pygame.Color(VERMELHO),
+            ResultadoColisao())
+
+def passo_fisica(quadrado, posicao, velocidade, cor, colisao, dt):
+    """
+    Avança a simulação em dt: gira o quadrado (quadrado.angulo guarda o
+    ângulo atual), aplica a gravidade, move a bola contra as paredes e troca
+    a cor dela se houve colisão. Tudo é atualizado no lugar.
+    """
+    # Rotaciona o quadrado (vértices e normais atualizados no lugar)
+    angulo_quadrado_anterior = quadrado.angulo
+    quadrado.girar((angulo_quadrado_anterior + VELOCIDADE_ANGULAR_QUADRADO * dt) % 360)
 
     # Atualiza a física da bola
-    velocidade_bola += ACELERACAO_GRAVIDADE * dt
-    posicao_bola += velocidade_bola * dt
-
-    # Detecção de Colisão e Resposta (Lógica de Resolução Única para Penetração Máxima)
-    num_vertices_quadrado = len(vertices_globais_quadrado)
-    
-    # Armazena informações sobre a colisão que causa a penetração mais profunda
-    colisao_para_resolver = {
-        "profundidade_penetracao": 0.0,  # Quão "fundo" a bola entrou, ao longo da normal
-        "normal_colisao": None,          # Normal da superfície da colisão mais profunda
-        "houve_colisao": False
-    }
-
-    # Testa contra todos os lados para encontrar a melhor colisão para resolver
-    for i in range(num_vertices_quadrado):
-        ponto_lado_1 = vertices_globais_quadrado[i]
-        ponto_lado_2 = vertices_globais_quadrado[(i + 1) % num_vertices_quadrado] # Pega o próximo vértice
-
-        vetor_do_lado = ponto_lado_2 - ponto_lado_1
-        if vetor_do_lado.length_squared() == 0: # Evita divisão por zero se o lado tiver comprimento 0
-            continue
-        
-        # Calcula a normal da superfície do lado (apontando para fora do quadrado)
-        normal_da_superficie = pygame.math.Vector2(vetor_do_lado.y, -vetor_do_lado.x).normalize()
-
-        # Distância do centro da bola à linha infinita do lado, medida ao longo da normal.
-        # Negativa se o centro da bola cruzou para o "interior" da linha.
-        distancia_projetada_a_linha = (posicao_bola - ponto_lado_1).dot(normal_da_superficie)
-
-        # Se o centro da bola está a uma distância menor que RAIO_BOLA da linha (colisão potencial)
-        if distancia_projetada_a_linha < RAIO_BOLA:
-            # Verifica se o ponto de contato real (mais próximo no segmento) também está dentro do raio
-            ponto_de_contato_no_segmento = ponto_mais_proximo_no_segmento(posicao_bola, ponto_lado_1, ponto_lado_2)
-            distancia_real_ao_segmento = (posicao_bola - ponto_de_contato_no_segmento).length()
-
-            # A colisão é válida se a bola estiver penetrando a linha do lado E
-            # a distância ao segmento real também for menor que o raio.
-            # O epsilon (1e-5) evita problemas com ponto flutuante.
-            if distancia_real_ao_segmento < RAIO_BOLA and distancia_real_ao_segmento > 1e-5:
-                # COLISÃO REAL COM ESTE SEGMENTO!
-                # Calcula o quanto a bola penetrou ao longo desta normal.
-                # Se distancia_projetada_a_linha é -2 (2 unidades para dentro) e RAIO_BOLA é 10,
-                # a penetração é 10 - (-2) = 12. Isso é o quanto precisamos empurrar para fora.
-                penetracao_atual = RAIO_BOLA - distancia_projetada_a_linha
-                
-                # Se esta penetração for a mais profunda encontrada até agora, armazena suas informações.
-                if penetracao_atual > colisao_para_resolver["profundidade_penetracao"]:
-                    colisao_para_resolver["profundidade_penetracao"] = penetracao_atual
-                    colisao_para_resolver["normal_colisao"] = normal_da_superficie
-                    colisao_para_resolver["houve_colisao"] = True
-                    
-    # Se qualquer colisão foi detectada e armazenada (ou seja, houve pelo menos uma penetração válida)
-    if colisao_para_resolver["houve_colisao"]:
-        normal_a_usar = colisao_para_resolver["normal_colisao"]
-        penetracao_a_corrigir = colisao_para_resolver["profundidade_penetracao"]
-        
-        epsilon_pushout = 0.1 # Pequena folga para empurrar a bola um pouco mais para fora
-        
-        # 1. Correção de Posição:
-        # Move a bola para fora ao longo da normal da penetração mais significativa.
-        posicao_bola += normal_a_usar * (penetracao_a_corrigir + epsilon_pushout)
-
-        # 2. Reflexão da Velocidade:
-        velocidade_bola = velocidade_bola.reflect(normal_a_usar)
-        
+    velocidade.x += ACELERACAO_GRAVIDADE.x * dt
+    velocidade.y += ACELERACAO_GRAVIDADE.y * dt
+
+    if COLISAO_CONTINUA:
+        # Detecção de Colisão Contínua (instante exato do contato)
+        houve_colisao = mover_bola_continuo(posicao, velocidade, angulo_quadrado_anterior, dt)
+    else:
+        posicao.x += velocidade.x * dt
+        posicao.y += velocidade.y * dt
+
+        # Detecção de Colisão e Resposta (Lógica de Resolução Única para Penetração Máxima)
+        houve_colisao = detectar_colisao(quadrado, posicao, RAIO_BOLA, colisao)
+        if houve_colisao:
+            epsilon_pushout = 0.1 # Pequena folga para empurrar a bola um pouco mais para fora
+
+            # 1. Correção de Posição:
+            # Move a bola para fora ao longo da normal da penetração mais significativa.
+            empurrao = colisao.profundidade + epsilon_pushout
+            posicao.x += colisao.normal.x * empurrao
+            posicao.y += colisao.normal.y * empurrao
+
+            # 2. Reflexão da Velocidade:
+            velocidade.reflect_ip(colisao.normal)
+
+    if houve_colisao:
         # 3. Trocar cor da bola:
-        cor_bola = pygame.Color(random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
-    
-    # --- Desenho na Tela ---
-    TELA.fill(PRETO) # Limpa a tela com a cor preta
+        cor.update(random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
+    return houve_colisao
 
-    # Desenhar o Quadrado
-    pygame.draw.polygon(TELA, BRANCO, vertices_globais_quadrado, ESPESSURA_BORDA_QUADRADO)
+def desenhar(tela, quadrado, posicao, cor, retangulos):
+    """
+    Desenha o quadrado e a bola e registra as áreas alteradas em retangulos.
+    """
+    if SPRITES_QUADRADO:
+        retangulos.registrar(cache_sprites.desenhar(tela, vertices_locais_quadrado, CENTRO_QUADRADO,
+                                                    quadrado.angulo, BRANCO, ESPESSURA_BORDA_QUADRADO,
+                                                    periodo=90))
+    else:
+        retangulos.registrar(pygame.draw.polygon(tela, BRANCO, quadrado.vertices, ESPESSURA_BORDA_QUADRADO))
 
     # Desenhar a Bola
-    pygame.draw.circle(TELA, cor_bola, (int(posicao_bola.x), int(posicao_bola.y)), RAIO_BOLA)
+    retangulos.registrar(pygame.draw.circle(tela, cor, (int(posicao.x), int(posicao.y)), RAIO_BOLA))
 
-    pygame.display.flip() # Atualiza a tela inteira para mostrar o que foi desenhado
+def main():
+    from comum.captura import AgendaCaptura, CapturaQuadro
+    from comum.cronometro import Cronometro, BENCHMARK, PERFIL_ATIVO, PERFIL_HUD, duracao_passo, continuar, salvar_relatorio
+    from comum.gif import GravadorGif
+    from comum.gravacao import GravadorAssincrono
+    from comum.memoria import EXPORTAR_MEMORIA, ExportadorQuadros, codificar_gif, codificar_mp4
+    from comum.painel import PainelPerfil
+    from comum.registro import GravadorEstado
+    from comum.retangulos import RetangulosSujos
 
-    # Gravação de vídeo
-    frame = pygame.surfarray.array3d(pygame.display.get_surface())
-    frame = cv2.cvtColor(cv2.transpose(frame), cv2.COLOR_RGB2BGR)
-    video_writer.write(frame)
+    # Inicialização do Pygame
+    pygame.init()
+    tela = pygame.display.set_mode((LARGURA_TELA, ALTURA_TELA))
+    pygame.display.set_caption("Quadrado Giratório e Bola Quicante")
+    relogio = pygame.time.Clock()
+
+    quadrado, posicao_bola, velocidade_bola, cor_bola, colisao = criar_estado()
+
+    # Com EXPORTAR=memoria o MP4 e o GIF são codificados em outros processos,
+    # que leem os quadros capturados de um anel em memória compartilhada
+    exportador = video_writer = gif_writer = None
+    if EXPORTAR_MEMORIA:
+        exportador = ExportadorQuadros(quadro_tamanho, CAPACIDADE_FILA, consumidores=2, politica=POLITICA_FILA)
+        exportador.iniciar(codificar_mp4, video_nome, fps)
+        exportador.iniciar(codificar_gif, gif_nome, fps)
+    else:
+        video_writer = GravadorAssincrono(video_nome, fps, quadro_tamanho, CAPACIDADE_FILA, POLITICA_FILA,
+                                          converter=None, medir_tempos=BENCHMARK)
+        # GIF montado durante a captura (reduzido para 320px a 10 fps)
+        gif_writer = GravadorGif(gif_nome, fps_entrada=fps, fps_saida=10, largura=320)
+    # O anel copia o quadro na hora, então um buffer de captura basta
+    captura = CapturaQuadro(pygame.display.get_surface(), num_buffers=1 if exportador else CAPACIDADE_FILA + 2,
+                            tamanho_saida=quadro_tamanho)
+    # O loop roda a FPS quadros/s, o vídeo a fps: só os quadros necessários são capturados
+    agenda = AgendaCaptura(captura, fps)
+    # Áreas desenhadas em cada quadro (para limpar e atualizar só elas)
+    retangulos = RetangulosSujos(tela, PRETO, ativo=RENDERIZACAO_PARCIAL)
+
+    registro = GravadorEstado(registro_nome, METADADOS_CENA) if REGISTRAR_ESTADO else None
+    tempo_simulado = 0.0
+
+    # Loop principal do jogo
+    # Tempos de cada fase do quadro (em benchmark ou com PERFIL=1) e o painel
+    # com os percentis recentes (F3)
+    cronometro = Cronometro()
+    painel = PainelPerfil(cronometro, visivel=PERFIL_HUD) if PERFIL_ATIVO else None
+    quadros = 0
+
+    # Tudo o que foi criado até aqui (módulos, pygame, gravadores, buffers) vive
+    # até o fim: congelado, sai das coletas do gc e elas não o percorrem de novo
+    gc.freeze()
+
+    rodando = True
+    while rodando and continuar(quadros):
+        dt = duracao_passo(relogio, FPS)
+        cronometro.iniciar()
+        if dt > DT_MAXIMO: # Limitar dt para evitar saltos muito grandes em caso de lag
+            dt = DT_MAXIMO
+
+        for evento in pygame.event.get():
+            if evento.type == pygame.QUIT:
+                rodando = False
+            elif painel:
+                painel.processar(evento)
+        cronometro.marcar("eventos")
+
+        # --- Lógica de Atualização do Jogo ---
+        passo_fisica(quadrado, posicao_bola, velocidade_bola, cor_bola, colisao, dt)
+        tempo_simulado += dt
+        cronometro.marcar("fisica")
+        if registro:
+            registro.registrar(tempo_simulado, quadrado.angulo, posicao_bola.x, posicao_bola.y,
+                               velocidade_bola.x, velocidade_bola.y, cor_bola)
+            cronometro.marcar("registro")
+
+        # --- Desenho na Tela ---
+        retangulos.limpar() # Limpa com a cor preta (a tela toda ou só o quadro anterior)
+        desenhar(tela, quadrado, posicao_bola, cor_bola, retangulos)
+        cronometro.marcar("desenho")
+
+        # Gravação de vídeo: só os quadros que o vídeo de fps quadros/s
+        # precisa, pelo relógio da simulação (já em BGR; a escrita acontece
+        # em outra thread)
+        quadro_bgr, repeticoes = agenda.capturar(tempo_simulado, retangulos.areas_alteradas())
+        cronometro.marcar("captura")
+        if exportador:
+            exportador.escrever(quadro_bgr, tempo_simulado, repeticoes)
+        else:
+            for _ in range(repeticoes):
+                video_writer.escrever(quadro_bgr)
+                gif_writer.adicionar(quadro_bgr)
+        cronometro.marcar("codificacao")
+
+        # Painel de perfil (depois da captura, para não entrar no vídeo)
+        if painel:
+            retangulos.registrar(painel.desenhar(tela))
+            cronometro.marcar("painel")
+
+        retangulos.apresentar() # Atualiza a tela para mostrar o que foi desenhado
+        cronometro.marcar("apresentacao")
+        quadros += 1
+
+    # Libera o gravador de vídeo e finaliza o GIF
+    if exportador:
+        exportador.fechar()
+    else:
+        video_writer.fechar()
+        gif_writer.fechar()
+    gravacao = exportador.estatisticas() if exportador else video_writer.estatisticas()
+    if registro:
+        registro.fechar()
+    print("Gravação:", gravacao)
+    salvar_relatorio("gemini", cronometro, quadros,
+                     {"escrita": None if exportador else video_writer.duracoes_escrita, "gravacao": gravacao,
+                      "agenda": agenda.estatisticas()})
 
-# Libera o gravador de vídeo e converte para GIF
-video_writer.release()
-converter_para_gif(video_nome, gif_nome)
+    pygame.quit()
 
-pygame.quit()
+    print("Gravação concluída!")
 
-print("Gravação concluída!")
+if __name__ == "__main__":
+    main()
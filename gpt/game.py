@@ -1,47 +1,40 @@
-import pygame
 import pymunk
-import pymunk.pygame_util
 import random
 import math
-import cv2
 import os
+import sys
 
-# Inicialização do Pygame
-pygame.init()
-largura, altura = 800, 600
-tela = pygame.display.set_mode((largura, altura))
-pygame.display.set_caption("Quadrado Rotativo com Bola")
-relogio = pygame.time.Clock()
-
-# Inicialização do Pymunk
-espaco = pymunk.Space()
-espaco.gravity = (0, -900)  # Gravidade para baixo no sistema padrão Y↑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Utilitário para desenhar com Pygame
-desenho_pymunk = pymunk.pygame_util.DrawOptions(tela)
+# Importar este módulo só carrega o pymunk. O pygame, a janela e os
+# gravadores ficam em main(), e desenhar() importa o pygame quando é chamada.
+largura, altura = 800, 600
 
 # Configurações para gravação de vídeo
 video_nome = "gameplay_gpt.mp4"
 gif_nome = "gameplay_gpt.gif"
 quadro_tamanho = (largura, altura)
 fps = 30
-quadro_codificador = cv2.VideoWriter_fourcc(*"mp4v")
-video_writer = cv2.VideoWriter(video_nome, quadro_codificador, fps, quadro_tamanho)
+capacidade_fila = 8
+politica_fila = "bloquear"  # "bloquear", "descartar" ou "subamostrar"
 
-# Função para converter MP4 para GIF
-def converter_para_gif(video_path, gif_path):
-    comando = f"ffmpeg -i {video_path} -vf 'fps=10,scale=320:-1:flags=lanczos' {gif_path}"
-    os.system(comando)
+# Renderização parcial: limpa e envia à janela só as áreas que mudaram
+renderizacao_parcial = True
+
+# Inicialização do Pymunk (um espaço novo para cada simulação)
+def criar_espaco():
+    espaco = pymunk.Space()
+    espaco.gravity = (0, -900)  # Gravidade para baixo no sistema padrão Y↑
+    return espaco
 
 # =======================
 # Parâmetros do Quadrado
 # =======================
 lado_quadrado = 200
-angulo_rotacao = 0  # Ângulo em graus
 velocidade_angular = 60  # graus por segundo
 
 # Criação do quadrado como 4 segmentos
-def criar_quadrado_rotativo():
+def criar_quadrado_rotativo(espaco):
     centro = (largura // 2, altura // 2)
     corpo = pymunk.Body(body_type=pymunk.Body.KINEMATIC)
     corpo.position = centro
@@ -54,19 +47,17 @@ def criar_quadrado_rotativo():
         x2, y2 = math.cos(b) * lado_quadrado / 2, math.sin(b) * lado_quadrado / 2
         segmento = pymunk.Segment(corpo, (x1, y1), (x2, y2), 2)
         segmento.elasticity = 1.0
-        segmento.color = pygame.Color('white')
+        segmento.color = (255, 255, 255, 255)  # Branco
         formas.append(segmento)
 
     # Adicione o corpo e todos os segmentos ao mesmo tempo
     espaco.add(corpo, *formas)
     return corpo, formas
 
-corpo_quadrado, lados_quadrado = criar_quadrado_rotativo()
-
 # =====================
 # Criação da Bola
 # =====================
-def criar_bola():
+def criar_bola(espaco):
     raio = 10
     massa = 1
     inercia = pymunk.moment_for_circle(massa, 0, raio)
@@ -74,63 +65,211 @@ def criar_bola():
     corpo.position = largura // 2, altura // 2
     forma = pymunk.Circle(corpo, raio)
     forma.elasticity = 1.0
-    forma.cor = pygame.Color('#FF0000')  # Vermelho puro
+    forma.cor = (255, 0, 0, 255)  # Vermelho puro
     espaco.add(corpo, forma)
     return corpo, forma
 
-corpo_bola, forma_bola = criar_bola()
-
 # ============================
 # Colisão: troca de cor
 # ============================
 def cor_aleatoria():
-    return pygame.Color(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+    return (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
 
-def callback_colisao(arbiter, space, data):
-    forma_bola.cor = cor_aleatoria()
-    return True  # Permite resposta física normal
+def instalar_troca_de_cor(espaco, forma_bola):
+    def callback_colisao(arbiter, space, data):
+        forma_bola.cor = cor_aleatoria()
+        return True  # Permite resposta física normal
 
-handler = espaco.add_default_collision_handler()
-handler.begin = callback_colisao
+    handler = espaco.add_default_collision_handler()
+    handler.begin = callback_colisao
 
-# ============================
-# Loop principal do jogo
-# ============================
-rodando = True
-frames = 0
-while rodando and frames < 90:  # Limita a 3 segundos (30 FPS)
-    dt = relogio.tick(30) / 1000.0  # Tempo por frame
-    tela.fill((0, 0, 0))  # Fundo preto
-
-    # Eventos
-    for evento in pygame.event.get():
-        if evento.type == pygame.QUIT:
-            rodando = False
+# Espaço, quadrado e bola prontos para simular
+def criar_cena():
+    espaco = criar_espaco()
+    corpo_quadrado, lados_quadrado = criar_quadrado_rotativo(espaco)
+    corpo_bola, forma_bola = criar_bola(espaco)
+    instalar_troca_de_cor(espaco, forma_bola)
+    return espaco, corpo_quadrado, lados_quadrado, corpo_bola, forma_bola
 
+# Um passo de física: gira o quadrado e avança o espaço. Recebe e retorna o
+# ângulo acumulado, em radianos.
+def passo_fisica(espaco, corpo_quadrado, angulo_rotacao, dt):
     # Atualizar rotação do quadrado
     angulo_rotacao += math.radians(velocidade_angular) * dt
     corpo_quadrado.angle = angulo_rotacao
 
     # Passo da simulação física
     espaco.step(dt)
+    return angulo_rotacao
 
-    # Desenhar as formas com Pygame
-    espaco.debug_draw(desenho_pymunk)
+# Desenha o quadrado e a bola com o ângulo e a posição dados (já interpolados)
+# e retorna as áreas alteradas
+def desenhar(tela, corpo_quadrado, lados_quadrado, forma_bola, angulo, posicao):
+    import pygame
+    pontos = []
+    for lado in lados_quadrado:
+        ponto = corpo_quadrado.position + lado.a.rotated(angulo)
+        pontos.append((ponto.x, altura - ponto.y))
+    area_quadrado = pygame.draw.lines(tela, lados_quadrado[0].color, True, pontos, int(2 * lados_quadrado[0].radius))
 
     # Desenhar a bola com a cor atual
-    pos_bola = int(corpo_bola.position.x), altura - int(corpo_bola.position.y)
-    pygame.draw.circle(tela, forma_bola.cor, pos_bola, int(forma_bola.radius))
+    pos_bola = int(posicao.x), altura - int(posicao.y)
+    area_bola = pygame.draw.circle(tela, forma_bola.cor, pos_bola, int(forma_bola.radius))
+    return area_quadrado, area_bola
+
+# Registro compacto do estado de cada passo (reproduza com reproduzir.py).
+# Guarda o que aparece na tela: y da bola invertido e ângulo em graus.
+registrar_estado = True
+registro_nome = "estado_gpt.bin"
+
+def metadados_cena(corpo_quadrado, lados_quadrado, forma_bola):
+    return {
+        "implementacao": "gpt",
+        "largura": largura,
+        "altura": altura,
+        "fps": 30,
+        "centro": list(corpo_quadrado.position),
+        "vertices": [list(lado.a) for lado in lados_quadrado],
+        "espessura": 4,  # Segmentos com raio 2
+        "raio": forma_bola.radius,
+        "cor_quadrado": (255, 255, 255),
+        "fundo": (0, 0, 0),
+    }
+
+def main():
+    import pygame
+    from comum.captura import AgendaCaptura, CapturaQuadro
+    from comum.cronometro import Cronometro, BENCHMARK, PERFIL_ATIVO, PERFIL_HUD, duracao_passo, continuar, salvar_relatorio
+    from comum.gif import GravadorGif
+    from comum.gravacao import GravadorAssincrono
+    from comum.memoria import EXPORTAR_MEMORIA, ExportadorQuadros, codificar_gif, codificar_mp4
+    from comum.painel import PainelPerfil
+    from comum.passo_fixo import PassoFixo, interpolar
+    from comum.registro import GravadorEstado
+    from comum.retangulos import RetangulosSujos
+
+    # Inicialização do Pygame
+    pygame.init()
+    tela = pygame.display.set_mode((largura, altura))
+    pygame.display.set_caption("Quadrado Rotativo com Bola")
+    relogio = pygame.time.Clock()
+
+    espaco, corpo_quadrado, lados_quadrado, corpo_bola, forma_bola = criar_cena()
+    angulo_rotacao = 0  # Ângulo acumulado, em radianos
+
+    # Com EXPORTAR=memoria o MP4 e o GIF são codificados em outros processos,
+    # que leem os quadros capturados de um anel em memória compartilhada
+    exportador = video_writer = gif_writer = None
+    if EXPORTAR_MEMORIA:
+        exportador = ExportadorQuadros(quadro_tamanho, capacidade_fila, consumidores=2, politica=politica_fila)
+        exportador.iniciar(codificar_mp4, video_nome, fps)
+        exportador.iniciar(codificar_gif, gif_nome, fps)
+    else:
+        video_writer = GravadorAssincrono(video_nome, fps, quadro_tamanho, capacidade_fila, politica_fila,
+                                          converter=None, medir_tempos=BENCHMARK)
+        # GIF montado durante a captura (reduzido para 320px a 10 fps)
+        gif_writer = GravadorGif(gif_nome, fps_entrada=fps, fps_saida=10, largura=320)
+    # O anel copia o quadro na hora, então um buffer de captura basta
+    captura = CapturaQuadro(pygame.display.get_surface(), num_buffers=1 if exportador else capacidade_fila + 2,
+                            tamanho_saida=quadro_tamanho)
+    # Quadros do vídeo pelo tempo simulado (repetidos se o loop atrasar)
+    agenda = AgendaCaptura(captura, fps)
+    retangulos = RetangulosSujos(tela, (0, 0, 0), ativo=renderizacao_parcial)
+
+    registro = None
+    if registrar_estado:
+        registro = GravadorEstado(registro_nome, metadados_cena(corpo_quadrado, lados_quadrado, forma_bola))
+    tempo_simulado = 0.0
+
+    # ============================
+    # Loop principal do jogo
+    # ============================
+    # Tempos de cada fase do quadro (em benchmark ou com PERFIL=1) e o painel
+    # com os percentis recentes (F3)
+    cronometro = Cronometro()
+    painel = PainelPerfil(cronometro, visivel=PERFIL_HUD) if PERFIL_ATIVO else None
+
+    rodando = True
+    frames = 0
+    # Física em passo fixo: subpassos_fisica passos de 1/120 s por quadro de
+    # 1/30 s, qualquer que seja o tempo real de cada quadro
+    subpassos_fisica = 4
+    passo_fixo = PassoFixo.por_quadro(30, subpassos_fisica)
+    # Estado da física antes do último passo, para interpolar o desenho
+    angulo_anterior = corpo_quadrado.angle
+    posicao_anterior = corpo_bola.position
+
+    # Limita a 3 segundos (30 FPS); no benchmark quem define o limite é BENCH_PASSOS
+    while rodando and continuar(frames) and (BENCHMARK or frames < 90):
+        dt = duracao_passo(relogio, 30)  # Tempo real do frame
+        cronometro.iniciar()
+
+        # Eventos
+        for evento in pygame.event.get():
+            if evento.type == pygame.QUIT:
+                rodando = False
+            elif painel:
+                painel.processar(evento)
+        cronometro.marcar("eventos")
+
+        for _ in range(passo_fixo.avancar(dt)):
+            angulo_anterior = corpo_quadrado.angle
+            posicao_anterior = corpo_bola.position
+            angulo_rotacao = passo_fisica(espaco, corpo_quadrado, angulo_rotacao, passo_fixo.dt)
+        tempo_simulado = passo_fixo.tempo
+        cronometro.marcar("fisica")
+        if registro:
+            registro.registrar(tempo_simulado, math.degrees(angulo_rotacao),
+                               corpo_bola.position.x, altura - corpo_bola.position.y,
+                               corpo_bola.velocity.x, -corpo_bola.velocity.y, forma_bola.cor)
+            cronometro.marcar("registro")
+
+        # Desenhar as formas com Pygame, na posição interpolada entre os dois
+        # últimos passos da física (fração alfa do próximo passo já decorrida)
+        retangulos.limpar()  # Fundo preto (a tela toda ou só o quadro anterior)
+        alfa = passo_fixo.alfa
+        for area in desenhar(tela, corpo_quadrado, lados_quadrado, forma_bola,
+                             interpolar(angulo_anterior, corpo_quadrado.angle, alfa),
+                             interpolar(posicao_anterior, corpo_bola.position, alfa)):
+            retangulos.registrar(area)
+        cronometro.marcar("desenho")
+
+        # Captura os quadros que o vídeo precisa, pelo tempo simulado (já em
+        # BGR; a escrita acontece em outra thread)
+        quadro_bgr, repeticoes = agenda.capturar(tempo_simulado, retangulos.areas_alteradas())
+        cronometro.marcar("captura")
+        if exportador:
+            exportador.escrever(quadro_bgr, tempo_simulado, repeticoes)
+        else:
+            for _ in range(repeticoes):
+                video_writer.escrever(quadro_bgr)
+                gif_writer.adicionar(quadro_bgr)
+        cronometro.marcar("codificacao")
+
+        # Painel de perfil (depois da captura, para não entrar no vídeo)
+        if painel:
+            retangulos.registrar(painel.desenhar(tela))
+            cronometro.marcar("painel")
 
-    # Captura o quadro atual da tela
-    quadro = pygame.surfarray.array3d(pygame.display.get_surface())
-    quadro = cv2.cvtColor(cv2.transpose(quadro), cv2.COLOR_RGB2BGR)
-    video_writer.write(quadro)
+        retangulos.apresentar()
+        cronometro.marcar("apresentacao")
+        frames += 1
 
-    pygame.display.flip()
-    frames += 1
+    # Libera o gravador de vídeo e finaliza o GIF
+    if exportador:
+        exportador.fechar()
+    else:
+        video_writer.fechar()
+        gif_writer.fechar()
+    gravacao = exportador.estatisticas() if exportador else video_writer.estatisticas()
+    if registro:
+        registro.fechar()
+    print("Gravação:", gravacao)
+    salvar_relatorio("gpt", cronometro, frames,
+                     {"escrita": None if exportador else video_writer.duracoes_escrita, "gravacao": gravacao,
+                      "passo_fixo": passo_fixo.estatisticas(), "agenda": agenda.estatisticas()})
 
-# Libera o gravador de vídeo e converte para GIF
-video_writer.release()
-converter_para_gif(video_nome, gif_nome)
+    pygame.quit()
 
-pygame.quit()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from comum.colisao import penetracao, tempo_de_impacto
+from comum.jogos import carregar_jogo
+from comum.poligono import PoligonoConvexo
+
+# Micro-benchmarks das primitivas de colisão: cada uma roda sobre um lote
+# grande de entradas aleatórias, chamada a chamada (como no loop do jogo), e
+# ao lado de uma versão de referência vetorizada com NumPy. As duas precisam
+# concordar numericamente; o tempo por elemento fica num arquivo de
+# referência, e uma rodada em que alguma primitiva ficou mais lenta que a
+# referência além da tolerância termina com erro.
+#
+# Primitivas de gemini/game.py: a rotação dos vértices (antes
+# rotacionar_vertices) é EstadoQuadrado.girar, e o ponto mais próximo no
+# segmento (antes ponto_mais_proximo_no_segmento) fica em
+# PoligonoConvexo.contato, usado por detectar_colisao.
+REFERENCIA = "microbenchmark_referencia.json"
+TOLERANCIA = 0.25  # Até 25% mais lento que a referência ainda passa
+RTOL = ATOL = 1e-9
+
+# ---------------------------------------------------------------------------
+# Referências vetorizadas
+# ---------------------------------------------------------------------------
+
+def distancia_ponto_segmento_np(pontos, inicios, fins):
+    lados = fins - inicios
+    comprimento_quadrado = (lados * lados).sum(axis=1)
+    projecao = ((pontos - inicios) * lados).sum(axis=1)
+    # Segmento degenerado: distância ao primeiro ponto (parâmetro 0)
+    parametro = np.divide(projecao, comprimento_quadrado, out=np.zeros_like(projecao),
+                          where=comprimento_quadrado > 0).clip(0.0, 1.0)
+    diferenca = pontos - (inicios + parametro[:, None] * lados)
+    return np.hypot(diferenca[:, 0], diferenca[:, 1])
+
+def calcular_normal_np(inicios, fins):
+    lados = fins - inicios
+    normais = np.stack([-lados[:, 1], lados[:, 0]], axis=1)
+    comprimento = np.hypot(normais[:, 0], normais[:, 1])
+    return np.divide(normais, comprimento[:, None], out=normais.copy(), where=comprimento[:, None] > 0)
+
+def girar_np(locais, normais_locais, centro, angulos_graus):
+    # Vértices e normais (quantidade, lados, 2) para cada ângulo
+    angulos = np.radians(angulos_graus)
+    c, s = np.cos(angulos)[:, None], np.sin(angulos)[:, None]
+    x, y = locais[:, 0], locais[:, 1]
+    nx, ny = normais_locais[:, 0], normais_locais[:, 1]
+    vertices = np.stack([x * c - y * s + centro[0], x * s + y * c + centro[1]], axis=2)
+    normais = np.stack([nx * c - ny * s, nx * s + ny * c], axis=2)
+    return vertices, normais
+
+def detectar_colisao_np(vertices, normais, pontos, raio):
+    # Mesma regra de detectar_colisao: por lado, a bola precisa cruzar a linha
+    # (distância ao longo da normal < raio) e estar a menos de raio do
+    # segmento; vale a penetração mais profunda (o primeiro lado no empate)
+    inicios = vertices
+    lados = np.roll(vertices, -1, axis=0) - vertices
+    relativos = pontos[:, None, :] - inicios[None, :, :]
+    comprimento_quadrado = (lados * lados).sum(axis=1)
+    projetada = (relativos * normais[None]).sum(axis=2)
+    parametro = np.divide((relativos * lados[None]).sum(axis=2), comprimento_quadrado,
+                          out=np.zeros(projetada.shape), where=comprimento_quadrado > 0).clip(0.0, 1.0)
+    diferenca = relativos - parametro[:, :, None] * lados[None]
+    distancia = np.hypot(diferenca[:, :, 0], diferenca[:, :, 1])
+    valido = ((comprimento_quadrado > 0) & (projetada < raio) & (distancia > 1e-5) & (distancia < raio))
+    profundidades = np.where(valido, raio - projetada, 0.0)
+    lado = profundidades.argmax(axis=1)
+    profundidade = profundidades[np.arange(len(pontos)), lado]
+    houve = profundidade > 0
+    normal = np.where(houve[:, None], normais[lado], 0.0)
+    return houve, np.where(houve, profundidade, 0.0), normal
+
+def penetracao_np(pontos, centro, angulos, meio_lado, raio):
+    c, s = np.cos(angulos), np.sin(angulos)
+    dx, dy = pontos[:, 0] - centro[0], pontos[:, 1] - centro[1]
+    u, v = dx * c + dy * s, -dx * s + dy * c
+    folga = (meio_lado - raio) - np.maximum(np.abs(u), np.abs(v))
+    houve = folga < 0
+    eixo_u = np.abs(u) >= np.abs(v)
+    nu = np.where(eixo_u, np.where(u > 0, -1.0, 1.0), 0.0)
+    nv = np.where(eixo_u, 0.0, np.where(v > 0, -1.0, 1.0))
+    normal = np.stack([nu * c - nv * s, nu * s + nv * c], axis=1)
+    return houve, np.where(houve, -folga, 0.0), np.where(houve[:, None], normal, 0.0)
+
+def folga_amostrada_np(posicao, velocidade, aceleracao, centro, angulo, velocidade_angular,
+                       meio_lado, raio, tempos):
+    # folga() nos instantes dados, com a bola em parábola e o quadrado girando
+    x = posicao[0] - centro[0] + velocidade[0] * tempos + aceleracao[0] * tempos ** 2 / 2
+    y = posicao[1] - centro[1] + velocidade[1] * tempos + aceleracao[1] * tempos ** 2 / 2
+    angulos = angulo + velocidade_angular * tempos
+    c, s = np.cos(angulos), np.sin(angulos)
+    u, v = x * c + y * s, -x * s + y * c
+    return (meio_lado - raio) - np.maximum(np.abs(u), np.abs(v))
+
+# ---------------------------------------------------------------------------
+# Casos: entradas aleatórias, versão escalar (medida sem guardar resultados),
+# saída escalar (para a comparação) e versão vetorizada
+# ---------------------------------------------------------------------------
+
+def _segmentos(rng, quantidade):
+    inicios = rng.uniform(0, 800, (quantidade, 2))
+    fins = inicios + rng.normal(0, 100, (quantidade, 2))
+    # Alguns segmentos degenerados, para exercitar o caso de comprimento zero
+    fins[::100] = inicios[::100]
+    return inicios, fins
+
+def caso_distancia_ponto_segmento(rng, quantidade):
+    claude = carregar_jogo("claude")
+    inicios, fins = _segmentos(rng, quantidade)
+    pontos = rng.uniform(0, 800, (quantidade, 2))
+    entradas = list(zip(map(tuple, pontos.tolist()),
+                        zip(map(tuple, inicios.tolist()), map(tuple, fins.tolist()))))
+    funcao = claude.distancia_ponto_segmento
+
+    def escalar():
+        for ponto, segmento in entradas:
+            funcao(ponto, segmento)
+
+    def saida_escalar():
+        return np.array([funcao(ponto, segmento) for ponto, segmento in entradas])
+
+    return escalar, saida_escalar, lambda: distancia_ponto_segmento_np(pontos, inicios, fins)
+
+def caso_calcular_normal(rng, quantidade):
+    claude = carregar_jogo("claude")
+    inicios, fins = _segmentos(rng, quantidade)
+    segmentos = list(zip(map(tuple, inicios.tolist()), map(tuple, fins.tolist())))
+    funcao = claude.calcular_normal
+
+    def escalar():
+        for segmento in segmentos:
+            funcao(segmento)
+
+    def saida_escalar():
+        return np.array([funcao(segmento) for segmento in segmentos])
+
+    return escalar, saida_escalar, lambda: calcular_normal_np(inicios, fins)
+
+def caso_girar(rng, quantidade):
+    gemini = carregar_jogo("gemini")
+    quadrado = gemini.EstadoQuadrado(gemini.vertices_locais_quadrado, gemini.CENTRO_QUADRADO)
+    angulos = rng.uniform(0, 360, quantidade)
+    lista_angulos = angulos.tolist()
+    locais = np.array(quadrado._locais)
+    normais_locais = np.array(quadrado._normais_locais)
+    centro = (quadrado.centro.x, quadrado.centro.y)
+
+    def escalar():
+        for angulo in lista_angulos:
+            quadrado.girar(angulo)
+
+    def saida_escalar():
+        saidas = []
+        for angulo in lista_angulos:
+            quadrado.girar(angulo)
+            saidas.append([[(v.x, v.y) for v in quadrado.vertices], [(n.x, n.y) for n in quadrado.normais]])
+        return np.array(saidas)
+
+    def vetorizado():
+        vertices, normais = girar_np(locais, normais_locais, centro, angulos)
+        return np.stack([vertices, normais], axis=1)
+
+    return escalar, saida_escalar, vetorizado
+
+def caso_detectar_colisao(rng, quantidade):
+    gemini = carregar_jogo("gemini")
+    quadrado = gemini.EstadoQuadrado(gemini.vertices_locais_quadrado, gemini.CENTRO_QUADRADO)
+    quadrado.girar(30.0)
+    raio = gemini.RAIO_BOLA
+    resultado = gemini.ResultadoColisao()
+    # Pontos espalhados até um pouco além das paredes, para metade colidir
+    alcance = gemini.LADO_QUADRADO / 2 + raio
+    pontos = rng.uniform(-alcance, alcance, (quantidade, 2)) + (quadrado.centro.x, quadrado.centro.y)
+    vetores = [gemini.pygame.math.Vector2(x, y) for x, y in pontos.tolist()]
+    vertices = np.array([(v.x, v.y) for v in quadrado.vertices])
+    # detectar_colisao usa PoligonoConvexo, com as normais para dentro
+    normais = -np.array([(n.x, n.y) for n in quadrado.normais])
+    funcao = gemini.detectar_colisao
+
+    def escalar():
+        for posicao in vetores:
+            funcao(quadrado, posicao, raio, resultado)
+
+    def saida_escalar():
+        saidas = []
+        for posicao in vetores:
+            # Sem colisão a normal do resultado fica com o valor antigo
+            if funcao(quadrado, posicao, raio, resultado):
+                saidas.append((True, resultado.profundidade, resultado.normal.x, resultado.normal.y))
+            else:
+                saidas.append((False, 0.0, 0.0, 0.0))
+        return np.array(saidas)
+
+    def vetorizado():
+        houve, profundidade, normal = detectar_colisao_np(vertices, normais, pontos, raio)
+        return np.column_stack([houve, profundidade, normal])
+
+    return escalar, saida_escalar, vetorizado
+
+def caso_penetracao(rng, quantidade):
+    centro = (400.0, 300.0)
+    meio_lado, raio = 100.0, 15.0
+    pontos = rng.uniform(-meio_lado - raio, meio_lado + raio, (quantidade, 2)) + centro
+    angulos = rng.uniform(0, 2 * math.pi, quantidade)
+    entradas = list(zip(map(tuple, pontos.tolist()), angulos.tolist()))
+
+    def escalar():
+        for posicao, angulo in entradas:
+            penetracao(posicao, centro, angulo, meio_lado, raio)
+
+    def saida_escalar():
+        saidas = []
+        for posicao, angulo in entradas:
+            resultado = penetracao(posicao, centro, angulo, meio_lado, raio)
+            if resultado is None:
+                saidas.append((False, 0.0, 0.0, 0.0))
+            else:
+                profundidade, (nx, ny) = resultado
+                saidas.append((True, profundidade, nx, ny))
+        return np.array(saidas)
+
+    def vetorizado():
+        houve, profundidade, normal = penetracao_np(pontos, centro, angulos, meio_lado, raio)
+        return np.column_stack([houve, profundidade, normal])
+
+    return escalar, saida_escalar, vetorizado
+
+def caso_poligono(lados):
+    # PoligonoConvexo.contato num polígono regular com o tamanho do quadrado
+    # de gemini/game.py, contra detectar_colisao_np testando todos os lados:
+    # o tempo escalar por bola deve mudar pouco com o número de lados
+    def caso(rng, quantidade):
+        raio, raio_circunscrito = 10.0, 100 * math.sqrt(2)
+        poligono = PoligonoConvexo.regular(lados, raio_circunscrito, math.radians(30))
+        # Pontos num disco até um pouco além da borda: a maioria longe dela
+        distancias = raio_circunscrito * np.sqrt(rng.uniform(0, 1.1, quantidade))
+        angulos = rng.uniform(0, 2 * math.pi, quantidade)
+        pontos = np.column_stack([distancias * np.cos(angulos), distancias * np.sin(angulos)])
+        entradas = list(map(tuple, pontos.tolist()))
+        vertices, normais = np.array(poligono.vertices), np.array(poligono.normais)
+        contato = poligono.contato
+
+        def escalar():
+            for x, y in entradas:
+                contato(x, y, raio)
+
+        def saida_escalar():
+            saidas = []
+            for x, y in entradas:
+                resultado = contato(x, y, raio)
+                saidas.append((False, 0.0, 0.0, 0.0) if resultado is None else (True, *resultado))
+            return np.array(saidas)
+
+        def vetorizado():
+            houve, profundidade, normal = detectar_colisao_np(vertices, normais, pontos, raio)
+            return np.column_stack([houve, profundidade, normal])
+
+        return escalar, saida_escalar, vetorizado
+
+    return caso
+
+def caso_tempo_de_impacto(rng, quantidade):
+    # Sem referência vetorizada (avanço conservador iterativo): só o tempo
+    centro = (400.0, 300.0)
+    meio_lado, raio, dt = 100.0, 15.0, 1.0 / 60
+    velocidade_angular = math.radians(60)
+    pontos = rng.uniform(-meio_lado + raio, meio_lado - raio, (quantidade, 2)) + centro
+    velocidades = rng.normal(0, 600, (quantidade, 2))
+    angulos = rng.uniform(0, 2 * math.pi, quantidade)
+    entradas = list(zip(map(tuple, pontos.tolist()), map(tuple, velocidades.tolist()), angulos.tolist()))
+
+    def escalar():
+        for posicao, velocidade, angulo in entradas:
+            tempo_de_impacto(posicao, velocidade, centro, angulo, velocidade_angular, meio_lado, raio, dt)
+
+    return escalar, None, None
+
+# Verificação de tempo_de_impacto: em estados aleatórios (dt até 0,25 s, com
+# e sem gravidade) a folga amostrada finamente não pode ficar abaixo de
+# -PENETRACAO_MAXIMA antes do contato retornado, nem em nenhum instante do
+# passo quando não há contato. Pega um passo seguro que pula uma parede.
+AMOSTRAS_FOLGA = 4000
+PENETRACAO_MAXIMA = 0.01  # pixels
+
+def verificar_tempo_de_impacto(rng, quantidade, amostras=AMOSTRAS_FOLGA):
+    # Retorna a lista de estados em que o contato foi perdido
+    centro = (400.0, 300.0)
+    meio_lado, raio = 100.0, 15.0
+    limite = meio_lado - raio
+    falhas = []
+    for _ in range(quantidade):
+        angulo = rng.uniform(0, 2 * math.pi)
+        u, v = rng.uniform(-limite, limite, 2)
+        c, s = math.cos(angulo), math.sin(angulo)
+        posicao = (centro[0] + u * c - v * s, centro[1] + u * s + v * c)
+        velocidade = tuple(rng.normal(0, 800, 2).tolist())
+        aceleracao = (0.0, float(rng.choice([0.0, 50.0, 981.0])))
+        velocidade_angular = math.radians(rng.uniform(-120, 120))
+        dt = rng.uniform(0.001, 0.25)
+
+        impacto = tempo_de_impacto(posicao, velocidade, centro, angulo, velocidade_angular,
+                                   meio_lado, raio, dt, aceleracao=aceleracao)
+        fim = impacto[0] if impacto is not None else dt
+        tempos = np.linspace(0.0, fim, amostras)
+        folgas = folga_amostrada_np(posicao, velocidade, aceleracao, centro, angulo,
+                                    velocidade_angular, meio_lado, raio, tempos)
+        if folgas.min() < -PENETRACAO_MAXIMA:
+            falhas.append({"posicao": posicao, "velocidade": velocidade, "aceleracao": aceleracao,
+                           "angulo": angulo, "velocidade_angular": velocidade_angular, "dt": dt,
+                           "impacto": impacto, "folga_minima": float(folgas.min())})
+    return falhas
+
+CASOS = {
+    "distancia_ponto_segmento": caso_distancia_ponto_segmento,
+    "calcular_normal": caso_calcular_normal,
+    "girar": caso_girar,
+    "detectar_colisao": caso_detectar_colisao,
+    "penetracao": caso_penetracao,
+    "tempo_de_impacto": caso_tempo_de_impacto,
+    "poligono_4": caso_poligono(4),
+    "poligono_64": caso_poligono(64),
+    "poligono_1024": caso_poligono(1024),
+}
+# tempo_de_impacto é bem mais cara que as outras, e a referência de
+# poligono_1024 monta matrizes de entradas x lados: rodam sobre um décimo
+FRACAO = {"tempo_de_impacto": 10, "poligono_1024": 10}
+
+def _calibracao(valores):
+    # Carga fixa de Python puro (aritmética e chamadas, como as primitivas)
+    for x, y in valores:
+        math.hypot(x - y, x * y + 1.0)
+
+def medir(funcao, repeticoes):
+    # Melhor de repeticoes rodadas (a menos perturbada pelo resto do sistema)
+    melhor = math.inf
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def medir_relativo(funcao, elementos, valores, repeticoes):
+    # Tempo por elemento (melhor rodada) e razão mediana entre a primitiva e
+    # a calibração, medidas lado a lado em cada rodada
+    tempos, razoes = [], []
+    for _ in range(repeticoes):
+        tempo = medir(funcao, 1) / elementos
+        calibracao = medir(lambda: _calibracao(valores), 1) / len(valores)
+        tempos.append(tempo)
+        razoes.append(tempo / calibracao)
+    return min(tempos), float(np.median(razoes))
+
+def concordancia(escalar, vetorizado):
+    # Maior diferença absoluta; as colunas booleanas (houve) têm que ser iguais
+    if escalar.shape != vetorizado.shape:
+        return math.inf
+    return float(np.max(np.abs(escalar - vetorizado), initial=0.0))
+
+def executar(casos, quantidade, repeticoes, semente):
+    # A velocidade da máquina varia entre rodadas (frequência, outros
+    # processos) e afeta todas as primitivas juntas. Por isso cada uma é
+    # medida ao lado de uma carga de calibração, e a comparação com a
+    # referência usa a razão entre as duas.
+    resultados = {}
+    valores = [(float(i), float(i) * 0.5) for i in range(quantidade)]
+    for nome in casos:
+        rng = np.random.default_rng(semente)
+        elementos = max(1, quantidade // FRACAO.get(nome, 1))
+        escalar, saida_escalar, vetorizado = CASOS[nome](rng, elementos)
+        tempo_escalar, relativo = medir_relativo(escalar, elementos, valores, repeticoes)
+        resultado = {"elementos": elementos, "escalar_ns": tempo_escalar * 1e9, "relativo": relativo}
+        if vetorizado is not None:
+            resultado["vetorizado_ns"] = medir(vetorizado, repeticoes) / elementos * 1e9
+            esperado = saida_escalar().astype(float)
+            obtido = np.asarray(vetorizado(), dtype=float)
+            resultado["diferenca_maxima"] = concordancia(esperado, obtido)
+            resultado["concorda"] = bool(esperado.shape == obtido.shape and
+                                         np.allclose(esperado, obtido, rtol=RTOL, atol=ATOL))
+        resultados[nome] = resultado
+    return resultados
+
+def comparar(resultados, referencia, tolerancia):
+    # Primitivas escalares (as que rodam no loop) mais lentas que a referência,
+    # em relação à calibração
+    regressoes = []
+    for nome, resultado in resultados.items():
+        anterior = referencia.get("primitivas", {}).get(nome)
+        if not anterior:
+            continue
+        razao = resultado["relativo"] / anterior["relativo"]
+        resultado["razao_referencia"] = razao
+        if razao > 1 + tolerancia:
+            regressoes.append(nome)
+    return regressoes
+
+def imprimir(resultados):
+    print(f"{'primitiva':<26}{'escalar ns':>12}{'numpy ns':>10}{'ganho':>8}{'dif. máx.':>11}{'vs ref.':>9}")
+    for nome, r in resultados.items():
+        vetorizado = r.get("vetorizado_ns")
+        colunas = [f"{r['escalar_ns']:12.1f}",
+                   f"{vetorizado:10.1f}" if vetorizado else f"{'-':>10}",
+                   f"{r['escalar_ns'] / vetorizado:7.0f}x" if vetorizado else f"{'-':>8}",
+                   f"{r['diferenca_maxima']:11.1e}" if "diferenca_maxima" in r else f"{'-':>11}",
+                   f"{r['razao_referencia']:8.2f}x" if "razao_referencia" in r else f"{'-':>9}"]
+        print(f"{nome:<26}" + "".join(colunas))
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks das primitivas de colisão")
+    parser.add_argument("--primitivas", nargs="+", default=list(CASOS), choices=list(CASOS),
+                        help="primitivas a medir")
+    parser.add_argument("--quantidade", type=int, default=20000, help="entradas aleatórias por primitiva")
+    parser.add_argument("--repeticoes", type=int, default=7, help="rodadas por medida")
+    parser.add_argument("--semente", type=int, default=0, help="semente das entradas")
+    parser.add_argument("--referencia", default=REFERENCIA, help="arquivo com os tempos de referência")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="quanto mais lento que a referência ainda passa (0.25 = 25%%)")
+    parser.add_argument("--salvar", action="store_true", help="grava esta rodada como a nova referência")
+    parser.add_argument("--verificacoes", type=int, default=2000,
+                        help="estados aleatórios para conferir tempo_de_impacto contra a folga amostrada (0 desliga)")
+    args = parser.parse_args()
+
+    resultados = executar(args.primitivas, args.quantidade, args.repeticoes, args.semente)
+
+    regressoes = []
+    if os.path.exists(args.referencia) and not args.salvar:
+        with open(args.referencia) as arquivo:
+            referencia = json.load(arquivo)
+        if referencia.get("maquina") != platform.node() or referencia.get("python") != platform.python_version():
+            print(f"Aviso: a referência foi medida em {referencia.get('maquina')} "
+                  f"(Python {referencia.get('python')})")
+        regressoes = comparar(resultados, referencia, args.tolerancia)
+    imprimir(resultados)
+
+    divergentes = [nome for nome, r in resultados.items() if r.get("concorda") is False]
+    for nome in divergentes:
+        print(f"ERRO: {nome}: a referência NumPy não concorda com a versão escalar "
+              f"(diferença máxima {resultados[nome]['diferenca_maxima']:.3g})")
+    perdidos = []
+    if "tempo_de_impacto" in args.primitivas and args.verificacoes > 0:
+        perdidos = verificar_tempo_de_impacto(np.random.default_rng(args.semente), args.verificacoes)
+        print(f"tempo_de_impacto: {args.verificacoes} estados conferidos, {len(perdidos)} contatos perdidos")
+        for falha in perdidos[:5]:
+            print(f"ERRO: tempo_de_impacto perdeu um contato: {falha}")
+    for nome in regressoes:
+        print(f"REGRESSÃO: {nome} está {resultados[nome]['razao_referencia']:.2f}x mais lenta que a referência "
+              f"(tolerância {1 + args.tolerancia:.2f}x)")
+
+    if args.salvar:
+        with open(args.referencia, "w") as arquivo:
+            json.dump({"maquina": platform.node(), "python": platform.python_version(),
+                       "quantidade": args.quantidade, "primitivas": resultados}, arquivo, indent=2)
+        print(f"Referência salva em '{args.referencia}'")
+
+    if divergentes or regressoes or perdidos:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import argparse
+import math
+import random
+
+import pygame
+
+from comum.captura import AgendaCaptura, CapturaQuadro
+from comum.cronometro import Cronometro, BENCHMARK, PERFIL_ATIVO, PERFIL_HUD, duracao_passo, continuar, salvar_relatorio
+from comum.gif import GravadorGif
+from comum.gravacao import GravadorAssincrono
+from comum.memoria import EXPORTAR_MEMORIA, ExportadorQuadros, arquivar_miniaturas, codificar_gif, codificar_mp4
+from comum.jogos import carregar_jogo
+from comum.painel import PainelPerfil
+from comum.passo_fixo import PassoFixo
+from comum.retangulos import RetangulosSujos
+
+# Mosaico de simulações: N cenas independentes do quadrado com a bola (de
+# qualquer implementação, repetidas quantas vezes se quiser) rodando num só
+# processo. Cada cena é desenhada reduzida numa célula (subsuperfície) de uma
+# única janela, e uma só captura e codificação grava a grade inteira.
+#
+# As cenas usam a física dos game.py, que podem ser importados sem abrir
+# janela nem criar gravadores. O desenho não é o de cada implementação (fixo
+# em 800x600): a cena é redesenhada na escala da célula a partir do estado,
+# como em reproduzir.py, com os metadados do registro de estado.
+FPS = 30
+PRETO = (0, 0, 0)
+COR_ROTULO = (128, 128, 128)
+CAPACIDADE_FILA = 8
+
+# Cada cena expõe o mesmo protocolo: dt (passo fixo da implementação),
+# metadados (os do registro de estado), passo(dt), deslocar_bola(dx, dy) e
+# estado(), que retorna (ângulo em graus, x, y, cor) em coordenadas de tela.
+class CenaClaude:
+    def __init__(self):
+        self.jogo = carregar_jogo("claude")
+        self.quadrado, self.bola = self.jogo.criar_objetos()
+        self.dt = 1.0 / self.jogo.FPS
+        self.metadados = self.jogo.metadados_cena(self.quadrado, self.bola)
+
+    def passo(self, dt):
+        self.jogo.passo_fisica(self.quadrado, self.bola, dt)
+
+    def deslocar_bola(self, dx, dy):
+        self.bola.x += dx
+        self.bola.y += dy
+
+    def estado(self):
+        return self.quadrado.angulo, self.bola.x, self.bola.y, self.bola.cor
+
+class CenaGemini:
+    def __init__(self):
+        self.jogo = carregar_jogo("gemini")
+        self.quadrado, self.posicao, self.velocidade, self.cor, self.colisao = self.jogo.criar_estado()
+        self.dt = 1.0 / self.jogo.FPS
+        self.metadados = self.jogo.METADADOS_CENA
+
+    def passo(self, dt):
+        self.jogo.passo_fisica(self.quadrado, self.posicao, self.velocidade, self.cor, self.colisao, dt)
+
+    def deslocar_bola(self, dx, dy):
+        self.posicao.x += dx
+        self.posicao.y += dy
+
+    def estado(self):
+        return self.quadrado.angulo, self.posicao.x, self.posicao.y, self.cor
+
+class CenaGpt:
+    def __init__(self):
+        self.jogo = carregar_jogo("gpt")
+        self.espaco, self.corpo_quadrado, self.lados, self.corpo_bola, self.forma_bola = self.jogo.criar_cena()
+        self.angulo = 0
+        self.dt = 1.0 / 120  # 4 passos por quadro de 1/30 s, como em gpt/game.py
+        self.metadados = self.jogo.metadados_cena(self.corpo_quadrado, self.lados, self.forma_bola)
+
+    def passo(self, dt):
+        self.angulo = self.jogo.passo_fisica(self.espaco, self.corpo_quadrado, self.angulo, dt)
+
+    def deslocar_bola(self, dx, dy):
+        # A física do gpt tem y para cima
+        self.corpo_bola.position += (dx, -dy)
+
+    def estado(self):
+        # Com y invertido, o quadrado (simétrico em y) aparece girado de -ângulo
+        posicao = self.corpo_bola.position
+        return (-math.degrees(self.corpo_quadrado.angle), posicao.x,
+                self.jogo.altura - posicao.y, self.forma_bola.cor)
+
+class CenaDeepseek:
+    def __init__(self):
+        self.jogo = carregar_jogo("deepseek")
+        self.espaco = self.jogo.create_space()
+        self.corpo_quadrado, _ = self.jogo.create_rotating_square(self.espaco)
+        self.corpo_bola, self.forma_bola = self.jogo.create_ball(self.espaco)
+        self.jogo.setup_collision_handler(self.espaco, self.forma_bola)
+        self.dt = 1.0 / 60
+        self.metadados = self.jogo.scene_metadata()
+
+    def passo(self, dt):
+        self.jogo.update_square_rotation(self.corpo_quadrado, dt)
+        self.espaco.step(dt)
+
+    def deslocar_bola(self, dx, dy):
+        self.corpo_bola.position += (dx, dy)
+
+    def estado(self):
+        posicao = self.corpo_bola.position
+        return math.degrees(self.corpo_quadrado.angle), posicao.x, posicao.y, self.forma_bola.color
+
+CENAS = {"claude": CenaClaude, "gemini": CenaGemini, "gpt": CenaGpt, "deepseek": CenaDeepseek}
+
+def criar_cenas(implementacoes, repetir=1, dispersao=0.0):
+    # repetir cópias de cada implementação; com dispersao, cada bola começa
+    # deslocada até dispersao pixels do centro, para as cópias divergirem
+    cenas = []
+    for implementacao in implementacoes:
+        for _ in range(repetir):
+            cena = CENAS[implementacao]()
+            if dispersao:
+                cena.deslocar_bola(random.uniform(-dispersao, dispersao), random.uniform(-dispersao, dispersao))
+            cenas.append((implementacao, cena))
+    return cenas
+
+def montar_grade(quantidade, colunas=None):
+    # Colunas e linhas da grade (quase quadrada se colunas não for dado)
+    colunas = colunas or math.ceil(math.sqrt(quantidade))
+    return colunas, math.ceil(quantidade / colunas)
+
+def desenhar_cena(celula, metadados, angulo, x, y, cor, escala):
+    # Desenha a cena na escala da célula e retorna as áreas alteradas, em
+    # coordenadas da célula
+    cx, cy = metadados["centro"]
+    angulo = math.radians(angulo)
+    c, s = math.cos(angulo), math.sin(angulo)
+    pontos = [((cx + vx * c - vy * s) * escala, (cy + vx * s + vy * c) * escala)
+              for vx, vy in metadados["vertices"]]
+    espessura = max(1, round(metadados.get("espessura", 2) * escala))
+    area_quadrado = pygame.draw.polygon(celula, metadados.get("cor_quadrado", (255, 255, 255)), pontos, espessura)
+    area_bola = pygame.draw.circle(celula, tuple(cor)[:3], (round(x * escala), round(y * escala)),
+                                   max(1, round(metadados["raio"] * escala)))
+    return area_quadrado, area_bola
+
+def main():
+    parser = argparse.ArgumentParser(description="Várias simulações do quadrado com a bola numa só janela")
+    parser.add_argument("--cenas", nargs="+", default=sorted(CENAS), choices=sorted(CENAS),
+                        help="implementações a rodar")
+    parser.add_argument("--repetir", type=int, default=1, help="cópias de cada implementação")
+    parser.add_argument("--dispersao", type=float, default=40.0,
+                        help="deslocamento máximo da posição inicial de cada bola, em pixels")
+    parser.add_argument("--semente", type=int, help="semente dos deslocamentos e das cores")
+    parser.add_argument("--colunas", type=int, help="colunas da grade (padrão: grade quase quadrada)")
+    parser.add_argument("--largura-celula", type=int, default=320, help="largura de cada célula, em pixels")
+    parser.add_argument("--quadros", type=int, help="para depois deste número de quadros")
+    parser.add_argument("--mp4", default="mosaico.mp4", help="arquivo MP4 de saída")
+    parser.add_argument("--largura-video", type=int,
+                        help="largura do MP4 (reduzido na captura; padrão: a da janela)")
+    parser.add_argument("--gif", help="arquivo GIF de saída (reduzido para 320px a 10 fps)")
+    parser.add_argument("--sem-video", action="store_true", help="não grava o MP4")
+    parser.add_argument("--miniaturas", help="arquivo ZIP com uma miniatura JPEG por segundo (requer --exportar)")
+    parser.add_argument("--exportar", action="store_true", default=EXPORTAR_MEMORIA,
+                        help="codifica em outros processos, que leem os quadros de memória compartilhada "
+                             "(padrão com EXPORTAR=memoria)")
+    args = parser.parse_args()
+
+    if args.semente is not None:
+        random.seed(args.semente)
+    cenas = criar_cenas(args.cenas, args.repetir, args.dispersao)
+    colunas, linhas = montar_grade(len(cenas), args.colunas)
+    # Todas as cenas têm a mesma proporção (800x600); as células a seguem,
+    # com tamanho par para o codificador
+    largura_cena, altura_cena = cenas[0][1].metadados["largura"], cenas[0][1].metadados["altura"]
+    largura_celula = args.largura_celula // 2 * 2
+    altura_celula = round(largura_celula * altura_cena / largura_cena) // 2 * 2
+    tamanho = (colunas * largura_celula, linhas * altura_celula)
+
+    pygame.init()
+    tela = pygame.display.set_mode(tamanho)
+    pygame.display.set_caption(f"Mosaico: {len(cenas)} cenas")
+    relogio = pygame.time.Clock()
+
+    # Uma subsuperfície por cena: o desenho é recortado na célula e as áreas
+    # que ele retorna são deslocadas para a tela
+    celulas = []
+    for indice in range(len(cenas)):
+        linha, coluna = divmod(indice, colunas)
+        celulas.append(tela.subsurface(pygame.Rect(coluna * largura_celula, linha * altura_celula,
+                                                   largura_celula, altura_celula)))
+    fonte = pygame.font.Font(None, 16)
+    rotulos = [fonte.render(f"{numero} {implementacao}", True, COR_ROTULO)
+               for numero, (implementacao, _) in enumerate(cenas)]
+    escala = largura_celula / largura_cena
+
+    # Física em passo fixo, com o passo de cada implementação
+    passos_fixos = [PassoFixo(cena.dt, max_passos=max(1, round(3 / (FPS * cena.dt)))) for _, cena in cenas]
+
+    # Uma captura e um gravador para a grade inteira; o vídeo pode ser
+    # reduzido já na captura
+    tamanho_video = tamanho
+    if args.largura_video and args.largura_video < tamanho[0]:
+        largura_video = args.largura_video // 2 * 2
+        tamanho_video = (largura_video, round(tamanho[1] * largura_video / tamanho[0]) // 2 * 2)
+    retangulos = RetangulosSujos(tela, PRETO)
+    exportador = video_writer = gif_writer = None
+    if args.exportar:
+        # Cada saída é um consumidor do anel, num processo próprio
+        consumidores = [] if args.sem_video else [(codificar_mp4, args.mp4, FPS)]
+        if args.gif:
+            consumidores.append((codificar_gif, args.gif, FPS))
+        if args.miniaturas:
+            consumidores.append((arquivar_miniaturas, args.miniaturas))
+        if consumidores:
+            exportador = ExportadorQuadros(tamanho_video, CAPACIDADE_FILA, consumidores=len(consumidores))
+            for funcao, *parametros in consumidores:
+                exportador.iniciar(funcao, *parametros)
+    else:
+        if args.miniaturas:
+            parser.error("--miniaturas requer --exportar")
+        video_writer = None if args.sem_video else GravadorAssincrono(
+            args.mp4, FPS, tamanho_video, CAPACIDADE_FILA, converter=None, medir_tempos=BENCHMARK)
+        gif_writer = GravadorGif(args.gif, fps_entrada=FPS, fps_saida=10, largura=320) if args.gif else None
+    agenda = None
+    if exportador or video_writer or gif_writer:
+        # O anel copia o quadro na hora, então um buffer de captura basta
+        captura = CapturaQuadro(tela, num_buffers=1 if exportador else CAPACIDADE_FILA + 2,
+                                tamanho_saida=tamanho_video)
+        agenda = AgendaCaptura(captura, FPS)
+
+    cronometro = Cronometro()
+    painel = PainelPerfil(cronometro, visivel=PERFIL_HUD) if PERFIL_ATIVO else None
+    quadros = 0
+
+    rodando = True
+    while rodando and continuar(quadros) and (args.quadros is None or quadros < args.quadros):
+        dt = duracao_passo(relogio, FPS)
+        cronometro.iniciar()
+
+        for evento in pygame.event.get():
+            if evento.type == pygame.QUIT:
+                rodando = False
+            elif painel:
+                painel.processar(evento)
+        cronometro.marcar("eventos")
+
+        for (_, cena), passo_fixo in zip(cenas, passos_fixos):
+            for _ in range(passo_fixo.avancar(dt)):
+                cena.passo(passo_fixo.dt)
+        # O vídeo segue o tempo simulado (o da primeira cena), não o relógio
+        tempo = passos_fixos[0].tempo
+        cronometro.marcar("fisica")
+
+        retangulos.limpar()
+        for (_, cena), celula, rotulo in zip(cenas, celulas, rotulos):
+            origem = celula.get_offset()
+            for area in desenhar_cena(celula, cena.metadados, *cena.estado(), escala):
+                retangulos.registrar(area.move(origem))
+            retangulos.registrar(celula.blit(rotulo, (4, 4)).move(origem))
+        cronometro.marcar("desenho")
+
+        if agenda:
+            quadro_bgr, repeticoes = agenda.capturar(tempo, retangulos.areas_alteradas())
+            cronometro.marcar("captura")
+            if exportador:
+                exportador.escrever(quadro_bgr, tempo, repeticoes)
+            for _ in range(0 if exportador else repeticoes):
+                if video_writer:
+                    video_writer.escrever(quadro_bgr)
+                if gif_writer:
+                    gif_writer.adicionar(quadro_bgr)
+            cronometro.marcar("codificacao")
+
+        # Painel de perfil (depois da captura, para não entrar no vídeo)
+        if painel:
+            retangulos.registrar(painel.desenhar(tela))
+            cronometro.marcar("painel")
+
+        retangulos.apresentar()
+        cronometro.marcar("apresentacao")
+        quadros += 1
+
+    extras = {"cenas": len(cenas), "grade": [colunas, linhas]}
+    if agenda:
+        extras["agenda"] = agenda.estatisticas()
+    if exportador:
+        exportador.fechar()
+        print("Exportação:", exportador.estatisticas())
+        extras["gravacao"] = exportador.estatisticas()
+    if video_writer:
+        video_writer.fechar()
+        print("Gravação:", video_writer.estatisticas())
+        extras.update(escrita=video_writer.duracoes_escrita, gravacao=video_writer.estatisticas())
+    if gif_writer:
+        gif_writer.fechar()
+    salvar_relatorio("mosaico", cronometro, quadros, extras)
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
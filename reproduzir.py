@@ -0,0 +1,145 @@
+import argparse
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pygame
+
+from comum.captura import CapturaQuadro
+from comum.gif import GravadorGif, concatenar_gif
+from comum.gravacao import GravadorAssincrono
+from comum.mp4 import concatenar_mp4
+from comum.registro import ler_estado
+
+# Reprodução offline de um registro de estado (comum/registro.py): redesenha
+# o quadrado e a bola de cada instante escolhido, sem rodar a física, e grava
+# o trecho pedido como MP4, GIF e/ou imagens PNG.
+#
+# Com vários processos a linha do tempo é dividida em blocos; cada processo
+# desenha e codifica os seus blocos em segmentos separados, que no fim são
+# juntados sem recodificar (comum/mp4.py e concatenar_gif).
+FPS_GIF = 10
+
+def selecionar(registros, inicio, fim, fps):
+    # Índices dos registros mais próximos de cada instante de saída
+    # (inicio, inicio + 1/fps, ...) dentro de [inicio, fim]
+    tempos = registros["tempo"]
+    if len(tempos) == 0:
+        return np.zeros(0, dtype=np.int64)
+    inicio = max(inicio, float(tempos[0]))
+    fim = min(fim, float(tempos[-1]))
+    if fim < inicio:
+        return np.zeros(0, dtype=np.int64)
+    instantes = inicio + np.arange(int(math.floor((fim - inicio) * fps)) + 1) / fps
+    indices = np.searchsorted(tempos, instantes).clip(0, len(tempos) - 1)
+    # searchsorted devolve o primeiro >=; o anterior pode estar mais perto
+    anteriores = (indices - 1).clip(0)
+    mais_perto = np.abs(tempos[anteriores] - instantes) < np.abs(tempos[indices] - instantes)
+    return np.where(mais_perto, anteriores, indices)
+
+def desenhar(superficie, metadados, registro):
+    superficie.fill(metadados.get("fundo", (0, 0, 0)))
+    cx, cy = metadados["centro"]
+    angulo = math.radians(float(registro["angulo"]))
+    c, s = math.cos(angulo), math.sin(angulo)
+    pontos = [(cx + x * c - y * s, cy + x * s + y * c) for x, y in metadados["vertices"]]
+    pygame.draw.polygon(superficie, metadados.get("cor_quadrado", (255, 255, 255)), pontos,
+                        metadados.get("espessura", 2))
+    pygame.draw.circle(superficie, [int(v) for v in registro["cor"]],
+                       (int(registro["x"]), int(registro["y"])), metadados["raio"])
+
+def _renderizar(caminho, indices, fps, mp4=None, gif=None, pasta_quadros=None, primeiro_quadro=0):
+    # Desenha e grava os registros indicados (um bloco inteiro, ou tudo)
+    metadados, registros = ler_estado(caminho)
+    tamanho = (metadados["largura"], metadados["altura"])
+    superficie = pygame.Surface(tamanho, depth=32)
+    captura = CapturaQuadro(superficie, num_buffers=10)
+    video = GravadorAssincrono(mp4, fps, tamanho, capacidade=8, converter=None) if mp4 else None
+    gravador_gif = GravadorGif(gif, fps_entrada=fps, fps_saida=min(fps, FPS_GIF), largura=320) if gif else None
+
+    for numero, indice in enumerate(indices, primeiro_quadro):
+        desenhar(superficie, metadados, registros[indice])
+        quadro = captura.capturar()
+        if video:
+            video.escrever(quadro)
+        if gravador_gif:
+            gravador_gif.adicionar(quadro)
+        if pasta_quadros:
+            cv2.imwrite(os.path.join(pasta_quadros, f"quadro_{numero:06d}.png"), quadro)
+
+    if video:
+        video.fechar()
+    if gravador_gif:
+        gravador_gif.fechar()
+    return len(indices)
+
+def _renderizar_bloco(argumentos):
+    # Cada processo já usa um núcleo; as threads internas do OpenCV só competiriam
+    cv2.setNumThreads(1)
+    return _renderizar(*argumentos)
+
+def dividir(quantidade, processos, fps):
+    # Limites dos blocos: alguns por processo, para equilibrar a carga, e com
+    # tamanho múltiplo do ciclo de descarte de quadros do GIF, para que cada
+    # bloco escolha os mesmos quadros que uma renderização única escolheria
+    ciclo = fps // math.gcd(fps, min(fps, FPS_GIF))
+    tamanho = max(1, math.ceil(quantidade / (processos * 4)))
+    tamanho = math.ceil(tamanho / ciclo) * ciclo
+    return [(inicio, min(inicio + tamanho, quantidade)) for inicio in range(0, quantidade, tamanho)]
+
+def reproduzir(caminho, inicio=0.0, fim=math.inf, fps=30, mp4=None, gif=None, pasta_quadros=None,
+               processos=1):
+    _, registros = ler_estado(caminho)
+    indices = selecionar(registros, inicio, fim, fps)
+    del registros
+    if pasta_quadros:
+        os.makedirs(pasta_quadros, exist_ok=True)
+    if processos <= 1 or len(indices) < 2:
+        return _renderizar(caminho, indices, fps, mp4, gif, pasta_quadros)
+
+    blocos = dividir(len(indices), processos, fps)
+    with tempfile.TemporaryDirectory(prefix="reproduzir-") as pasta:
+        tarefas = []
+        for numero, (a, b) in enumerate(blocos):
+            segmento_mp4 = os.path.join(pasta, f"bloco_{numero:05d}.mp4") if mp4 else None
+            segmento_gif = os.path.join(pasta, f"bloco_{numero:05d}.gif") if gif else None
+            tarefas.append((caminho, indices[a:b], fps, segmento_mp4, segmento_gif, pasta_quadros, a))
+
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            quadros = sum(pool.map(_renderizar_bloco, tarefas))
+
+        if mp4:
+            concatenar_mp4([tarefa[3] for tarefa in tarefas], mp4)
+        if gif:
+            concatenar_gif([tarefa[4] for tarefa in tarefas], gif)
+    return quadros
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera vídeo a partir de um registro de estado")
+    parser.add_argument("registro", help="arquivo gravado por GravadorEstado")
+    parser.add_argument("--inicio", type=float, default=0.0, help="instante inicial, em segundos")
+    parser.add_argument("--fim", type=float, default=math.inf, help="instante final, em segundos")
+    parser.add_argument("--fps", type=int, default=30, help="quadros por segundo da saída")
+    parser.add_argument("--mp4", help="arquivo MP4 de saída")
+    parser.add_argument("--gif", help="arquivo GIF de saída")
+    parser.add_argument("--quadros", help="pasta para salvar cada quadro como PNG")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1,
+                        help="processos de renderização (padrão: núcleos)")
+    args = parser.parse_args()
+
+    if not (args.mp4 or args.gif or args.quadros):
+        parser.error("informe pelo menos uma saída: --mp4, --gif ou --quadros")
+
+    metadados, registros = ler_estado(args.registro)
+    print(f"{metadados.get('implementacao', '?')}: {len(registros)} passos, "
+          f"{float(registros['tempo'][-1]) if len(registros) else 0:.1f}s, "
+          f"{int(registros['colisao'].sum())} colisões")
+    quadros = reproduzir(args.registro, args.inicio, args.fim, args.fps, args.mp4, args.gif, args.quadros,
+                         args.processos)
+    print(f"{quadros} quadros gerados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from comum.fisica_pymunk import PARAMETROS_PADRAO, PREDEFINIDOS, parametros, simular
+
+# Varredura de parâmetros das simulações com pymunk: monta a grade de
+# configurações (produto cartesiano dos valores pedidos), roda cada uma num
+# espaço próprio, em paralelo num pool de processos, e junta as métricas
+# numa tabela só.
+PARAMETROS_NUMERICOS = [nome for nome, valor in PARAMETROS_PADRAO.items() if isinstance(valor, float)]
+METRICAS = ["quiques", "fugas", "primeira_fuga", "energia_inicial", "energia_final",
+            "passos", "passos_por_segundo"]
+
+def montar_grade(predefinidos, valores):
+    # valores: {nome: [valores]}; parâmetros não citados ficam no padrão
+    nomes = sorted(valores)
+    grade = []
+    for predefinido in predefinidos:
+        for combinacao in itertools.product(*(valores[nome] for nome in nomes)):
+            configuracao = parametros(predefinido, **dict(zip(nomes, combinacao)))
+            configuracao["predefinido"] = predefinido
+            grade.append(configuracao)
+    return grade
+
+def _executar(configuracao):
+    p = dict(configuracao)
+    del p["predefinido"]
+    return simular(p)
+
+def varrer(grade, processos=None, tamanho_lote=None):
+    # Roda a grade no pool e devolve uma linha (parâmetros + métricas) por
+    # configuração, na ordem da grade
+    processos = processos or os.cpu_count() or 1
+    if tamanho_lote is None:
+        # Lotes maiores diminuem a troca de mensagens entre processos
+        tamanho_lote = max(1, len(grade) // (processos * 4))
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        resultados = list(pool.map(_executar, grade, chunksize=tamanho_lote))
+    return [dict(configuracao, **resultado) for configuracao, resultado in zip(grade, resultados)]
+
+def salvar_csv(caminho, linhas):
+    colunas = ["predefinido"] + list(PARAMETROS_PADRAO) + METRICAS
+    with open(caminho, "w", newline="") as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=colunas, extrasaction="ignore")
+        escritor.writeheader()
+        escritor.writerows(linhas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros das simulações com pymunk")
+    parser.add_argument("--predefinido", nargs="+", default=["gpt"], choices=sorted(PREDEFINIDOS),
+                        help="configurações de partida")
+    for nome in PARAMETROS_NUMERICOS:
+        parser.add_argument(f"--{nome.replace('_', '-')}", dest=nome, type=float, nargs="+",
+                            metavar="V", help=f"valores de {nome} (padrão: {PARAMETROS_PADRAO[nome]:g})")
+    parser.add_argument("--processos", type=int, default=None, help="tamanho do pool (padrão: núcleos)")
+    parser.add_argument("--csv", default="varredura.csv", help="tabela com uma linha por configuração")
+    parser.add_argument("--json", default=None, help="arquivo opcional com as séries de energia")
+    args = parser.parse_args()
+
+    valores = {nome: getattr(args, nome) for nome in PARAMETROS_NUMERICOS if getattr(args, nome)}
+    grade = montar_grade(args.predefinido, valores)
+    print(f"{len(grade)} configurações em {args.processos or os.cpu_count()} processos...")
+
+    inicio = time.perf_counter()
+    linhas = varrer(grade, args.processos)
+    duracao = time.perf_counter() - inicio
+
+    salvar_csv(args.csv, linhas)
+    if args.json:
+        with open(args.json, "w") as arquivo:
+            json.dump(linhas, arquivo)
+    fugiram = sum(1 for linha in linhas if linha["fugas"])
+    print(f"Concluído em {duracao:.1f}s; {fugiram} configurações com fuga. Resultados em '{args.csv}'")
+
+if __name__ == "__main__":
+    main()